@@ -0,0 +1,72 @@
+"""
+Data-parallel training speedup: model_train with 1 vs N worker processes.
+
+    python -m benchmarks.distributed --rows 2000000 --workers 2 4 --n-estimators 50
+
+Synthetic raw shards (benchmarks/synthetic.py) are preprocessed once, then
+the model is trained single process (the default in-memory fit) and with
+each --workers count (src/model_training/distributed.py). Every model is
+scored on a separately generated test set.
+
+The single-process baseline is model_train as it runs today: the whole
+table loaded and split in memory, XGBoost's default tree method. The worker
+runs stream their shards and use the hist method, so part of their speedup
+holds even on one core. The part that comes from more processes is bounded
+by the cores available (the workers split os.cpu_count() threads between
+them); compare the N > 1 rows with each other to see it.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from src.schema import FEATURES, TARGET
+from src.inference.model_store import load_model
+from benchmarks.synthetic import write_shards, generate
+
+
+def timed_train(processed, model_dir, **kw):
+    from src.model_training.sagemaker_train import model_train
+
+    start = time.perf_counter()
+    model_train(processed, model_dir, input_filename="processed.parquet", **kw)
+    return time.perf_counter() - start
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--shard-rows", type=int, default=250_000)
+    p.add_argument("--test-rows", type=int, default=200_000)
+    p.add_argument("--n-estimators", type=int, default=50)
+    p.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    p.add_argument("--seed", type=int, default=0)
+    a = p.parse_args()
+
+    from src.pipelines.local import prepare_mlflow
+    from src.preprocessing.preprocessing import run_preprocessing
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare_mlflow(tmp)
+        raw, processed = os.path.join(tmp, "raw"), os.path.join(tmp, "processed")
+        write_shards(a.rows, raw, seed=a.seed, shard_rows=a.shard_rows)
+        run_preprocessing(processed, "processed.parquet", input_dir=raw, workers=1)
+
+        runs = []
+        for w in [1] + sorted(set(a.workers) - {1}):
+            model_dir = os.path.join(tmp, f"model-{w}")
+            runs.append((w, model_dir, timed_train(processed, model_dir, n_estimators=a.n_estimators,
+                                                   workers=w)))
+
+        test = generate(a.test_rows, seed=a.seed + 1)
+        base = runs[0][2]
+        print(f"\n{os.cpu_count()} cpu(s), {a.rows} rows, {a.n_estimators} trees")
+        print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'test accuracy':>14}")
+        for w, model_dir, seconds in runs:
+            model = load_model(os.path.join(model_dir, "model.joblib"))
+            acc = (model.predict(test[FEATURES]) == test[TARGET].to_numpy()).mean()
+            print(f"{w:>8} {seconds:>9.2f} {base / seconds:>7.2f}x {acc:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
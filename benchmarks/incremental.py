@@ -0,0 +1,74 @@
+"""
+Warm-start retraining vs full retraining when a new data shard arrives.
+
+    python -m benchmarks.incremental --rows 1000000 --new-rows 100000 --n-estimators 50
+
+Synthetic raw shards (benchmarks/synthetic.py) are preprocessed and a base
+model is trained on them. One more shard is then added and preprocessed
+again, and the model is retrained twice: from scratch on everything, and
+warm started from the base model on the new shard only. Both are timed, and
+scored on a separately generated test set that neither has seen.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from src.schema import FEATURES, TARGET
+from src.inference.model_store import load_model
+from benchmarks.synthetic import write_shards, generate
+
+
+def timed_train(processed, model_dir, **kw):
+    from src.model_training.sagemaker_train import model_train
+
+    start = time.perf_counter()
+    model_train(processed, model_dir, input_filename="processed.parquet", **kw)
+    return time.perf_counter() - start
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=1_000_000, help="Rows the base model is trained on")
+    p.add_argument("--new-rows", type=int, default=100_000, help="Rows in the shard that arrives later")
+    p.add_argument("--shard-rows", type=int, default=250_000)
+    p.add_argument("--test-rows", type=int, default=200_000)
+    p.add_argument("--n-estimators", type=int, default=50)
+    p.add_argument("--warm-rounds", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    a = p.parse_args()
+
+    from src.pipelines.local import prepare_mlflow
+    from src.preprocessing.preprocessing import run_preprocessing
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepare_mlflow(tmp)
+        raw, processed = os.path.join(tmp, "raw"), os.path.join(tmp, "processed")
+        base, full, warm = (os.path.join(tmp, d) for d in ("base", "full", "warm"))
+
+        write_shards(a.rows, raw, seed=a.seed, shard_rows=a.shard_rows)
+        run_preprocessing(processed, "processed.parquet", input_dir=raw, workers=1)
+        base_seconds = timed_train(processed, base, n_estimators=a.n_estimators)
+
+        # the new shard sorts after the existing ones, so their parts are unchanged
+        new = write_shards(a.new_rows, os.path.join(tmp, "new"), seed=a.seed + 1, shard_rows=a.new_rows)[0]
+        os.rename(new, os.path.join(raw, "shard-99999.parquet"))
+        run_preprocessing(processed, "processed.parquet", input_dir=raw, workers=1)
+        full_seconds = timed_train(processed, full, n_estimators=a.n_estimators)
+        warm_seconds = timed_train(processed, warm, n_estimators=a.n_estimators, warm_start_from=base,
+                                   warm_rounds=a.warm_rounds)
+
+        test = generate(a.test_rows, seed=a.seed + 2)
+        print(f"\n{'model':<10} {'train rows':>11} {'seconds':>9} {'trees':>6} {'test accuracy':>14}")
+        for name, model_dir, rows, seconds in [("base", base, a.rows, base_seconds),
+                                               ("full", full, a.rows + a.new_rows, full_seconds),
+                                               ("warm", warm, a.new_rows, warm_seconds)]:
+            model = load_model(os.path.join(model_dir, "model.joblib"))
+            acc = (model.predict(test[FEATURES]) == test[TARGET].to_numpy()).mean()
+            print(f"{name:<10} {rows:>11} {seconds:>9.2f} {model.get_booster().num_boosted_rounds():>6} "
+                  f"{acc:>14.4f}")
+        print(f"warm start: {full_seconds / warm_seconds:.1f}x faster than a full retrain")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Scaling report for sharded batch inference: rows/sec per worker count.
+
+    python -m benchmarks.infer_scaling --rows 1000000 --workers 1 2 4
+
+Without --model-dir, a model is first trained on --source into a temp dir
+with model_train (20 trees), so the benchmark scores what train writes today.
+"""
+import os
+import time
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+import pandas as pd
+
+from src.inference.inference import main as run_inference
+
+
+def make_input(src_file, rows, out_dir):
+    df = pd.read_csv(src_file)
+    reps = -(-rows // len(df))
+    pd.concat([df] * reps, ignore_index=True).head(rows).to_csv(
+        os.path.join(out_dir, "processed.csv"), index=False)
+
+
+def train_model(source, tmp):
+    from src.pipelines.local import prepare_mlflow
+    from src.model_training.sagemaker_train import model_train
+
+    prepare_mlflow(tmp)
+    model_dir = os.path.join(tmp, "model")
+    model_train(os.path.dirname(os.path.abspath(source)), model_dir, input_filename=os.path.basename(source))
+    return model_dir
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--model-dir", default=None, help="default: train one on --source first")
+    p.add_argument("--model-filename", default="model.joblib")
+    p.add_argument("--source", default="src/processed_output/processed.csv")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--chunk-rows", type=int, default=100_000)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count()])
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = a.model_dir or train_model(a.source, tmp)
+        make_input(a.source, a.rows, tmp)
+        print(f"{'workers':>8} {'seconds':>10} {'rows/sec':>12}")
+        for w in sorted(set(a.workers)):
+            args = SimpleNamespace(input_dir=tmp, input_filename="processed.csv",
+                                   model_dir=model_dir, model_filename=a.model_filename,
+                                   output_dir=os.path.join(tmp, f"out-{w}"),
+                                   chunk_rows=a.chunk_rows, workers=w, part_files=False)
+            t0 = time.perf_counter()
+            run_inference(args)
+            dt = time.perf_counter() - t0
+            print(f"{w:>8} {dt:>10.2f} {a.rows / dt:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
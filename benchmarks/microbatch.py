@@ -0,0 +1,64 @@
+"""
+Throughput of per-request predict vs MicroBatcher at several concurrency levels.
+
+    python -m benchmarks.microbatch --model-dir /opt/ml/model --clients 1 16 256
+"""
+import time
+import asyncio
+import argparse
+
+import numpy as np
+
+from src.inference.inference import load_model
+from src.inference.batcher import MicroBatcher
+
+ROW = np.array([[5.1, 3.5, 1.4, 0.2]], dtype=np.float32)
+
+
+async def run_clients(predict, clients, per_client):
+    async def client():
+        for _ in range(per_client):
+            await predict(ROW)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return clients * per_client / (time.perf_counter() - t0)
+
+
+async def bench(model, clients, per_client, max_batch_size, max_wait_ms):
+    loop = asyncio.get_running_loop()
+
+    async def direct(rows):
+        return await loop.run_in_executor(None, model.predict, rows)
+
+    base = await run_clients(direct, clients, per_client)
+
+    batcher = MicroBatcher(model.predict, max_batch_size, max_wait_ms)
+    await batcher.start()
+    batched = await run_clients(batcher.predict, clients, per_client)
+    await batcher.stop()
+    return base, batched, batcher.stats()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--model-dir", default="/opt/ml/model")
+    p.add_argument("--model-filename", default="model.joblib")
+    p.add_argument("--clients", type=int, nargs="+", default=[1, 16, 256])
+    p.add_argument("--requests", type=int, default=2000, help="total per concurrency level")
+    p.add_argument("--max-batch-size", type=int, default=256)
+    p.add_argument("--max-wait-ms", type=float, default=2.0)
+    a = p.parse_args()
+
+    model = load_model(a.model_dir, a.model_filename)
+    print(f"{'clients':>8} {'per-request/s':>14} {'batched/s':>10} {'speedup':>8} "
+          f"{'mean batch':>10} {'delay ms':>9}")
+    for c in a.clients:
+        base, batched, st = asyncio.run(
+            bench(model, c, max(1, a.requests // c), a.max_batch_size, a.max_wait_ms))
+        print(f"{c:>8} {base:>14,.0f} {batched:>10,.0f} {batched / base:>7.1f}x "
+              f"{st['mean_batch_requests']:>10.1f} {st['queue_delay_mean_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Cold vs warm model load times for src.inference.model_store.
+
+    python -m benchmarks.model_load --model-dir /opt/ml/model --repeat 20
+
+cold-tar : extract model.tar.gz into an empty cache, then load
+cold     : load from disk with an empty in-process LRU
+warm     : LRU hit
+"""
+import os
+import time
+import tarfile
+import argparse
+import tempfile
+import statistics
+
+from src.inference import model_store
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--model-dir", default="/opt/ml/model")
+    p.add_argument("--filenames", nargs="+", default=["model.joblib", "model.ubj"])
+    p.add_argument("--repeat", type=int, default=20)
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tar_dir = os.path.join(tmp, "packed")
+        os.makedirs(tar_dir)
+        with tarfile.open(os.path.join(tar_dir, "model.tar.gz"), "w:gz") as tar:
+            for name in a.filenames:
+                tar.add(os.path.join(a.model_dir, name), arcname=name)
+
+        print(f"{'file':<14} {'cold-tar ms':>12} {'cold ms':>10} {'warm ms':>10}")
+        for name in a.filenames:
+            path = os.path.join(a.model_dir, name)
+
+            def cold_tar():
+                model_store.clear_cache()
+                cache = tempfile.mkdtemp(dir=tmp)
+                model_store.load_model(os.path.join(
+                    model_store.extract_cached(os.path.join(tar_dir, "model.tar.gz"), cache), name))
+
+            def cold():
+                model_store.clear_cache()
+                model_store.load_model(path)
+
+            model_store.load_model(path)
+            warm = timed(lambda: model_store.load_model(path), a.repeat)
+            print(f"{name:<14} {timed(cold_tar, a.repeat):>12.2f} {timed(cold, a.repeat):>10.2f} {warm:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
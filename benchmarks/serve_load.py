@@ -0,0 +1,74 @@
+"""
+Closed-loop load test against a running scoring server (STEP=serve).
+
+    python -m benchmarks.serve_load --url http://localhost:8080 --clients 8 --requests 2000
+
+Each client keeps one HTTP/1.1 connection open and sends requests back to
+back; p50/p99 latency and overall throughput are printed at the end. A
+request that fails (non-200 or a connection error) is counted, not timed;
+the run exits non-zero if any did.
+"""
+import sys
+import time
+import argparse
+import threading
+import http.client
+from urllib.parse import urlparse
+
+import numpy as np
+
+ROW = b"5.1,3.5,1.4,0.2"
+
+
+def client(host, port, n, body, latencies, errors):
+    conn = http.client.HTTPConnection(host, port)
+    for _ in range(n):
+        t0 = time.perf_counter()
+        try:
+            conn.request("POST", "/invocations", body, {"Content-Type": "text/csv"})
+            resp = conn.getresponse()
+            resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            conn.close()  # reconnects on the next request
+            continue
+        if resp.status != 200:
+            errors.append(f"HTTP {resp.status}")
+            continue
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--url", default="http://localhost:8080")
+    p.add_argument("--clients", type=int, default=8)
+    p.add_argument("--requests", type=int, default=2000, help="total across all clients")
+    p.add_argument("--rows", type=int, default=1, help="rows per request")
+    a = p.parse_args()
+
+    url = urlparse(a.url)
+    body = b"\n".join([ROW] * a.rows)
+    latencies, errors = [], []
+    per_client = max(1, a.requests // a.clients)
+    threads = [threading.Thread(target=client,
+                                args=(url.hostname, url.port, per_client, body, latencies, errors))
+               for _ in range(a.clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    ms = np.array(latencies) * 1000
+    print(f"requests={len(ms)} clients={a.clients} rows/request={a.rows} errors={len(errors)}")
+    if len(ms):
+        print(f"p50={np.percentile(ms, 50):.2f}ms p99={np.percentile(ms, 99):.2f}ms "
+              f"throughput={len(ms) / elapsed:,.0f} req/s")
+    if errors:
+        sys.exit(f"{len(errors)} request(s) failed, e.g. {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Throughput and end-to-end latency of the prediction sink (src/inference/sinks.py)
+against a local backend, offline.
+
+    python -m benchmarks.sink --rows 1000000 --latency-ms 200 --mb-per-sec 2 --workers 1 2 4
+
+"serial" is the inference-Copy1 path: score everything, then one bulk
+load of the whole frame. The other rows stream the same chunks through a
+BulkSink with that many loader workers, as src/inference/load_scores.py
+does. --latency-ms adds a fixed delay to every load and --mb-per-sec an
+upload time proportional to the compressed batch size, to stand in for the
+network of a remote warehouse.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from src.inference.sinks import make_backend, encode_batch, decode_batch, BulkSink, BATCH_ROWS, QUEUE_SIZE
+from benchmarks.synthetic import generate, class_stats
+
+
+class Delayed:
+    """A backend whose loads take `latency` seconds plus len(data) / `bandwidth` longer."""
+
+    def __init__(self, backend, latency, bandwidth=0.0):
+        self.backend = backend
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def load(self, conn, table, data):
+        time.sleep(self.latency + (len(data) / self.bandwidth if self.bandwidth else 0.0))
+        self.backend.load(conn, table, data)
+
+
+def chunks(rows, chunk_rows, seed=0):
+    stats = class_stats()
+    for i, start in enumerate(range(0, rows, chunk_rows)):
+        df = generate(min(chunk_rows, rows - start), seed=(seed, i), stats=stats).drop(columns="target")
+        df["prediction"] = np.random.default_rng(i).integers(0, 3, len(df))
+        df["run_id"] = "bench"
+        yield df
+
+
+def run_serial(backend, table, rows, chunk_rows):
+    import pandas as pd
+
+    start = time.perf_counter()
+    data = encode_batch(pd.concat(list(chunks(rows, chunk_rows)), ignore_index=True))
+    conn = backend.connect()
+    backend.create_table(conn, table, decode_batch(data).schema)
+    backend.load(conn, table, data)
+    seconds = time.perf_counter() - start
+    n = backend.count(conn, table)
+    conn.close()
+    return {"seconds": seconds, "rows": n, "max_batch_latency": seconds}
+
+
+def run_sink(backend, table, rows, chunk_rows, workers, batch_rows, queue_size):
+    start = time.perf_counter()
+    with BulkSink(backend, table, workers=workers, batch_rows=batch_rows, queue_size=queue_size) as sink:
+        for df in chunks(rows, chunk_rows):
+            sink.put(df)
+    seconds = time.perf_counter() - start
+    conn = backend.connect()
+    n = backend.count(conn, table)
+    conn.close()
+    return dict(sink.stats, seconds=seconds, rows=n)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--chunk-rows", type=int, default=100_000)
+    p.add_argument("--backend", choices=["sqlite", "duckdb"], default="sqlite")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="Extra delay per load")
+    p.add_argument("--mb-per-sec", type=float, default=0.0, help="Simulated upload bandwidth (0 = none)")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    p.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    a = p.parse_args()
+
+    print(f"{'mode':<10} {'seconds':>9} {'rows/sec':>12} {'max latency':>12} {'put wait':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for w in [0] + sorted(set(a.workers)):
+            path = os.path.join(tmp, f"bench-{w}.{a.backend}")
+            backend = Delayed(make_backend(f"{a.backend}:///{path}"), a.latency_ms / 1000,
+                              a.mb_per_sec * 2**20)
+            if w == 0:
+                mode, r = "serial", run_serial(backend, "SCORES", a.rows, a.chunk_rows)
+            else:
+                mode, r = f"sink x{w}", run_sink(backend, "SCORES", a.rows, a.chunk_rows, w,
+                                                 a.batch_rows, a.queue_size)
+            assert r["rows"] == a.rows, f"{mode}: loaded {r['rows']} of {a.rows} rows"
+            print(f"{mode:<10} {r['seconds']:>9.2f} {a.rows / r['seconds']:>12,.0f} "
+                  f"{r['max_batch_latency']:>11.2f}s {r.get('put_wait_seconds', 0.0):>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cold-start import time of the container entry point, per step.
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --steps infer --budget-ms infer=500
+
+Each run is a fresh `python -X importtime` process that imports src.main and
+calls load_step(<step>), i.e. exactly what the dispatcher imports before the
+step starts working. The import time is the sum of the per-module self times
+(median over --repeat runs); the heaviest top-level packages are listed.
+Exits with status 1 if any step is over its budget.
+"""
+import sys
+import argparse
+import statistics
+import subprocess
+from collections import Counter
+
+STEPS = ["preprocess", "train", "infer", "serve", "drift"]
+# generous for a cold container; a regression (e.g. a top-level mlflow import
+# leaking into infer) costs far more than the slack
+BUDGET_MS = {"preprocess": 600, "train": 3000, "infer": 600, "serve": 600, "drift": 600}
+
+
+def import_profile(step):
+    """Total import ms and self ms per top-level package for one cold start."""
+    code = f"from src.main import load_step; load_step({step!r})"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True)
+    per_package = Counter()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us) / 1000
+    return sum(per_package.values()), per_package
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--steps", nargs="+", default=STEPS, choices=STEPS)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--top", type=int, default=5)
+    p.add_argument("--budget-ms", nargs="*", default=[], metavar="STEP=MS",
+                   help="Override the default per-step budget")
+    a = p.parse_args()
+    budgets = dict(BUDGET_MS, **{k: float(v) for k, v in (b.split("=") for b in a.budget_ms)})
+
+    failed = []
+    print(f"{'step':<11} {'import ms':>10} {'budget ms':>10}  heaviest packages (ms)")
+    for step in a.steps:
+        runs = [import_profile(step) for _ in range(a.repeat)]
+        total = statistics.median(t for t, _ in runs)
+        heaviest = ", ".join(f"{name} {ms:.0f}" for name, ms in runs[-1][1].most_common(a.top))
+        over = total > budgets[step]
+        print(f"{step:<11} {total:>10.0f} {budgets[step]:>10.0f}  {heaviest}{'  OVER BUDGET' if over else ''}")
+        if over:
+            failed.append(step)
+
+    if failed:
+        print(f"cold start over budget: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
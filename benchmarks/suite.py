@@ -0,0 +1,159 @@
+"""
+End-to-end scaling benchmark: preprocess, train, infer and drift on
+synthetic iris-like data (benchmarks/synthetic.py).
+
+    python -m benchmarks.suite --sizes 1e3 1e4 1e5 1e6 --out results.json
+    python -m benchmarks.suite --sizes 1e3 1e5 --compare baseline.json --tolerance 0.2
+
+For every size the raw shards are generated once, then each stage runs in
+its own fresh process (so peak RSS is per stage) on the previous stage's
+output: run_preprocessing on the raw shards, model_train on the processed
+dataset (out of core from --out-of-core-rows up), inference.main streaming
+the processed dataset, and drift against the model's reference profile.
+Each result records seconds (stage latency, imports excluded), rows/sec and
+peak RSS. With --compare, any stage/size whose throughput dropped or whose
+peak RSS grew by more than --tolerance is reported and the exit status is 1.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+STAGES = ["preprocess", "train", "infer", "drift"]
+
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss  # e.g. preprocess workers
+    return max(own, children) / 1024
+
+
+def run_stage(stage, work, rows, out_of_core_rows, workers):
+    """Run one stage in this process; returns its elapsed seconds."""
+    processed = os.path.join(work, "processed")
+    model = os.path.join(work, "model")
+    if stage == "preprocess":
+        from src.preprocessing.preprocessing import run_preprocessing
+        fn = lambda: run_preprocessing(processed, "processed.parquet", input_dir=os.path.join(work, "raw"),
+                                       workers=workers)
+    elif stage == "train":
+        from src.pipelines.local import prepare_mlflow
+        from src.model_training.sagemaker_train import model_train
+        prepare_mlflow(work)
+        fn = lambda: model_train(processed, model, input_filename="processed.parquet",
+                                 out_of_core=rows >= out_of_core_rows)
+    elif stage == "infer":
+        from src.inference.inference import main as run_inference
+        args = argparse.Namespace(input_dir=processed, input_filename="processed.parquet",
+                                  model_dir=model, model_filename="model.joblib",
+                                  output_dir=os.path.join(work, "predictions"),
+                                  output_filename="predictions.parquet", chunk_rows=250_000, workers=workers)
+        fn = lambda: run_inference(args)
+    else:
+        from src.monitoring.drift import drift
+        fn = lambda: drift(model, "reference_profile.json", os.path.join(work, "predictions"),
+                           "predictions.parquet", os.path.join(work, "drift"))
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def measure(stage, work, rows, out_of_core_rows, workers):
+    """Run `stage` in a fresh interpreter and return its result record."""
+    cmd = [sys.executable, "-m", "benchmarks.suite", "--run-stage", stage, "--work", work,
+           "--sizes", str(rows), "--out-of-core-rows", str(out_of_core_rows), "--workers", str(workers)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{stage} at {rows} rows failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result.update(stage=stage, rows=rows, rows_per_sec=rows / result["seconds"] if result["seconds"] else 0.0)
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of `results` against a previous run's results."""
+    old = {(r["stage"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        prev = old.get((r["stage"], r["rows"]))
+        if prev is None:
+            continue
+        if r["rows_per_sec"] < prev["rows_per_sec"] * (1 - tolerance):
+            regressions.append(f"{r['stage']}@{r['rows']}: {prev['rows_per_sec']:,.0f} -> "
+                               f"{r['rows_per_sec']:,.0f} rows/s")
+        if r["peak_rss_mb"] > prev["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{r['stage']}@{r['rows']}: peak RSS {prev['peak_rss_mb']:.0f} -> "
+                               f"{r['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", nargs="+", type=float, default=[1e3, 1e4, 1e5, 1e6])
+    p.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES,
+                   help="Stages to report; earlier stages still run to produce their inputs")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--out-of-core-rows", type=float, default=1e7,
+                   help="Train out of core from this many rows up")
+    p.add_argument("--work", default=None, help="Working directory (default: a temp dir)")
+    p.add_argument("--out", default="benchmark_results.json")
+    p.add_argument("--compare", default=None, help="Previous results JSON to check for regressions")
+    p.add_argument("--tolerance", type=float, default=0.2)
+    p.add_argument("--run-stage", choices=STAGES, help=argparse.SUPPRESS)
+    a = p.parse_args()
+    sizes = [int(s) for s in a.sizes]
+
+    if a.run_stage:
+        # child mode: run one stage and report on the last stdout line
+        seconds = run_stage(a.run_stage, a.work, sizes[0], int(a.out_of_core_rows), a.workers)
+        print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss_mb()}))
+        return
+
+    from benchmarks.synthetic import write_shards
+
+    results = []
+    print(f"{'stage':<11} {'rows':>11} {'seconds':>9} {'rows/sec':>13} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory(dir=a.work) as tmp:
+        for rows in sizes:
+            work = os.path.join(tmp, str(rows))
+            write_shards(rows, os.path.join(work, "raw"), seed=a.seed)
+            # every stage reads the previous one's output, so run up to the last one asked for
+            for stage in STAGES[:max(STAGES.index(s) for s in a.stages) + 1]:
+                r = measure(stage, work, rows, int(a.out_of_core_rows), a.workers)
+                if stage not in a.stages:
+                    continue
+                results.append(r)
+                print(f"{stage:<11} {rows:>11} {r['seconds']:>9.3f} {r['rows_per_sec']:>13,.0f} "
+                      f"{r['peak_rss_mb']:>9.0f}")
+
+    report = {"commit": git_commit(), "timestamp": time.time(), "python": platform.python_version(),
+              "cpu_count": os.cpu_count(), "seed": a.seed, "workers": a.workers, "results": results}
+    with open(a.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {a.out}")
+
+    if a.compare:
+        with open(a.compare) as f:
+            regressions = compare(results, json.load(f), a.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Synthetic iris-like data at any size.
+
+Rows are drawn class by class from a multivariate normal fitted to the real
+iris measurements of that class (mean and covariance), with the real class
+proportions, rounded to the data's 0.1 cm resolution and kept positive. The
+same (rows, seed) always gives the same data, and it is generated and
+written one shard at a time, so 10^8 rows never sit in memory at once.
+
+    python -m benchmarks.synthetic --rows 1000000 --out-dir /tmp/raw
+"""
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from src.schema import FEATURES, TARGET
+from src.dataio import write_table
+
+SHARD_ROWS = 1_000_000
+
+
+def class_stats():
+    """(proportions, means, covariances) per class of the real iris data."""
+    from sklearn.datasets import load_iris
+
+    iris = load_iris()
+    X, y = iris.data, iris.target
+    classes = np.unique(y)
+    return (np.array([np.mean(y == c) for c in classes]),
+            np.array([X[y == c].mean(axis=0) for c in classes]),
+            np.array([np.cov(X[y == c], rowvar=False) for c in classes]))
+
+
+def generate(rows, seed=0, stats=None):
+    """One DataFrame of `rows` synthetic rows."""
+    props, means, covs = stats or class_stats()
+    rng = np.random.default_rng(seed)
+    y = rng.choice(len(props), size=rows, p=props)
+    X = np.empty((rows, len(FEATURES)))
+    for c in range(len(props)):
+        idx = np.flatnonzero(y == c)
+        X[idx] = rng.multivariate_normal(means[c], covs[c], size=len(idx))
+    X = np.maximum(np.round(X, 1), 0.1)
+    df = pd.DataFrame(X, columns=FEATURES)
+    df[TARGET] = y
+    return df
+
+
+def write_shards(rows, out_dir, seed=0, shard_rows=SHARD_ROWS, ext=".parquet"):
+    """Write `rows` rows as shard-NNNNN<ext> files in `out_dir`; returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    stats = class_stats()
+    paths = []
+    for i, start in enumerate(range(0, rows, shard_rows)):
+        path = os.path.join(out_dir, f"shard-{i:05d}{ext}")
+        # each shard has its own seed, so a shard does not depend on the shard size before it
+        write_table(generate(min(shard_rows, rows - start), seed=(seed, i), stats=stats), path)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--rows", type=int, default=1_000_000)
+    p.add_argument("--out-dir", required=True)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--shard-rows", type=int, default=SHARD_ROWS)
+    p.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    a = p.parse_args()
+    paths = write_shards(a.rows, a.out_dir, a.seed, a.shard_rows, "." + a.format)
+    print(f"wrote {a.rows} rows in {len(paths)} shards to {a.out_dir}")
@@ -3,11 +3,20 @@ import boto3
 import json
 import time
 import uuid
+import base64
+import random
+import functools
 from botocore.exceptions import ClientError
 
-CF = boto3.client("cloudformation")
-SF = boto3.client("stepfunctions")
-S3 = boto3.client("s3")
+
+@functools.lru_cache(maxsize=None)
+def aws(service):
+    """
+    The boto3 client for `service`, created on first use and then reused, so
+    importing this module (e.g. in tests with fake clients) needs no AWS config.
+    """
+    return boto3.client(service)
+
 
 def s3_url_to_https(s3_url):
     """Convert s3://bucket/key to https://bucket.s3.amazonaws.com/key"""
@@ -18,73 +27,211 @@ def s3_url_to_https(s3_url):
     key = parts[1] if len(parts) > 1 else ""
     return f"https://{bucket}.s3.amazonaws.com/{key}"
 
-def deploy_stack(stack_name, template_s3, parameters, capabilities):
-    """Create or update a stack from S3 template (non-blocking)."""
+TERMINAL_OK = ("CREATE_COMPLETE", "UPDATE_COMPLETE")
+TIMEOUT_MINUTES = 30
+SAFETY_SECONDS = 30  # stop polling this long before the Lambda would be killed
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter: the n-th delay is drawn uniformly from
+    [t/2, t] with t = min(cap, base * factor**n), so pollers spread out but
+    never spin. `attempt` lets a resumed run continue where it stopped.
+    """
+
+    def __init__(self, base=2.0, cap=60.0, factor=2.0, attempt=0, rng=None):
+        self.base, self.cap, self.factor = base, cap, factor
+        self.attempt = attempt
+        self.rng = rng or random.Random()
+
+    def next(self):
+        t = min(self.cap, self.base * self.factor ** self.attempt)
+        self.attempt += 1
+        return self.rng.uniform(t / 2, t)
+
+
+def describe_stack(stack_name, cf=None):
+    """The stack description, or None if the stack does not exist."""
+    try:
+        return (cf or aws("cloudformation")).describe_stacks(StackName=stack_name)["Stacks"][0]
+    except ClientError as e:
+        if "does not exist" in str(e):
+            return None
+        raise
+
+
+def stack_outputs(stack):
+    return {o["OutputKey"]: o["OutputValue"] for o in (stack or {}).get("Outputs", [])}
+
+
+def deploy_stack(stack_name, template_s3, parameters, capabilities, cf=None):
+    """
+    Create or update a stack from S3 template (non-blocking). The one
+    describe_stacks call decides create vs update and, when nothing changes,
+    also supplies the stack outputs.
+    """
+    cf = cf or aws("cloudformation")
     template_url = s3_url_to_https(template_s3)
     cfn_params = [{"ParameterKey": k, "ParameterValue": str(v)} for k, v in (parameters or {}).items()]
 
+    current = describe_stack(stack_name, cf)
     try:
-        CF.describe_stacks(StackName=stack_name)
-        print(f"[deploy_stack] Updating stack {stack_name} ... TemplateURL={template_url}")
-        resp = CF.update_stack(
-            StackName=stack_name,
-            TemplateURL=template_url,
-            Parameters=cfn_params,
-            Capabilities=capabilities or [],
-        )
-        status = "update_started"
-    except ClientError as e:
-        msg = str(e)
-        if "does not exist" in msg or ("Stack with id" in msg and "does not exist" in msg):
+        if current is not None:
+            print(f"[deploy_stack] Updating stack {stack_name} ... TemplateURL={template_url}")
+            resp = cf.update_stack(
+                StackName=stack_name,
+                TemplateURL=template_url,
+                Parameters=cfn_params,
+                Capabilities=capabilities or [],
+            )
+            status = "update_started"
+        else:
             print(f"[deploy_stack] Creating stack {stack_name} ... TemplateURL={template_url}")
-            resp = CF.create_stack(
+            resp = cf.create_stack(
                 StackName=stack_name,
                 TemplateURL=template_url,
                 Parameters=cfn_params,
                 Capabilities=capabilities or [],
             )
             status = "create_started"
-        elif "No updates are to be performed" in msg:
+    except ClientError as e:
+        msg = str(e)
+        if "No updates are to be performed" in msg:
             print(f"[deploy_stack] No updates required for {stack_name}.")
-            return {"status": "no_change", "StackName": stack_name}
-        else:
-            print(f"[deploy_stack] Unexpected error for {stack_name}: {msg}")
-            raise
+            return {"status": "no_change", "StackName": stack_name, "Outputs": stack_outputs(current)}
+        print(f"[deploy_stack] Unexpected error for {stack_name}: {msg}")
+        raise
 
     stack_id = resp.get("StackId")
     print(f"[deploy_stack] {status}: {stack_id}")
-    return {"status": status, "StackId": stack_id}
+    return {"status": status, "StackName": stack_name, "StackId": stack_id}
+
+
+def check_status(stack_name, stack):
+    """True once the stack is complete, False while in progress; raises on failure."""
+    if stack is None:
+        print(f"[wait_for_stack] {stack_name} not found yet.")
+        return False
+    status = stack["StackStatus"]
+    print(f"[wait_for_stack] {stack_name} status={status}")
+    if status in TERMINAL_OK:
+        return True
+    if status.endswith("_FAILED") or status.endswith("ROLLBACK_COMPLETE") or status in ("DELETE_COMPLETE",):
+        raise RuntimeError(f"Stack {stack_name} entered failure state: {status}")
+    return False
 
-def wait_for_stack(stack_name, wait_seconds=15, timeout_minutes=30):
-    """Poll CloudFormation until the stack reaches CREATE_COMPLETE/UPDATE_COMPLETE or fails."""
+
+def wait_for_stack(stack_name, timeout_minutes=TIMEOUT_MINUTES, cf=None, sleep=time.sleep, backoff=None):
+    """Poll CloudFormation with backoff until the stack is complete; returns its description."""
+    backoff = backoff or Backoff()
     deadline = time.time() + timeout_minutes * 60
     while True:
-        try:
-            resp = CF.describe_stacks(StackName=stack_name)
-            stack = resp["Stacks"][0]
-            status = stack["StackStatus"]
-            print(f"[wait_for_stack] {stack_name} status={status}")
-            if status in ("CREATE_COMPLETE", "UPDATE_COMPLETE"):
-                return stack
-            if status.endswith("_FAILED") or status.endswith("_ROLLBACK_COMPLETE") or status in ("DELETE_COMPLETE",):
-                raise RuntimeError(f"Stack {stack_name} entered failure state: {status}")
-        except ClientError as e:
-            msg = str(e)
-            if "does not exist" in msg:
-                print(f"[wait_for_stack] {stack_name} not found yet.")
-            else:
-                print(f"[wait_for_stack] describe_stacks error: {msg}")
-                raise
+        stack = describe_stack(stack_name, cf)
+        if check_status(stack_name, stack):
+            return stack
         if time.time() > deadline:
             raise TimeoutError(f"Timeout waiting for stack {stack_name} after {timeout_minutes} minutes")
-        time.sleep(wait_seconds)
+        sleep(backoff.next())
+
+
+def get_stack_outputs(stack_name, cf=None):
+    return stack_outputs(describe_stack(stack_name, cf))
+
+
+def encode_state(state):
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def decode_state(token):
+    return json.loads(base64.urlsafe_b64decode(token.encode()))
+
+
+class MissingOutputsError(Exception):
+    def __init__(self, stack_name, missing, outputs):
+        super().__init__(f"Missing outputs of {stack_name}: {missing}")
+        self.stack_name, self.missing, self.outputs = stack_name, missing, outputs
+
+
+class StackOrchestrator:
+    """
+    Deploy a set of stacks, each started as soon as the stacks it depends on
+    (`after`) are complete, so independent stacks deploy concurrently. All
+    in-flight stacks are polled once per tick (one describe_stacks each; its
+    result gives both the status and the outputs) and ticks are spaced by
+    Backoff. If the next sleep would pass `deadline`, run() returns instead
+    of sleeping, with the progress in a JSON-able state that run() accepts
+    again to resume.
+
+    A spec is {"name", "template", "parameters", "after": [stack names],
+    "inputs": {param: [stack name, output key]}, "required_outputs": [keys]}.
+    cf / sleep / clock / rng are injectable, e.g. a fake CloudFormation
+    client and a virtual clock for local tests.
+    """
+
+    def __init__(self, specs, capabilities=None, cf=None, sleep=time.sleep, clock=time.time,
+                 rng=None, timeout_minutes=TIMEOUT_MINUTES):
+        self.specs = {s["name"]: s for s in specs}
+        self.capabilities = capabilities or []
+        self.cf = cf or aws("cloudformation")
+        self.sleep, self.clock, self.rng = sleep, clock, rng
+        self.timeout = timeout_minutes * 60
+
+    def run(self, state=None, deadline=None):
+        """Returns (state, retry_after); retry_after is None once every stack is complete."""
+        state = state or {"stacks": {}, "attempt": 0, "started": self.clock()}
+        backoff = Backoff(attempt=state["attempt"], rng=self.rng)
+        while True:
+            self._poll(state)
+            self._start_ready(state)
+            if all(state["stacks"].get(name, {}).get("done") for name in self.specs):
+                return state, None
+            if self.clock() - state["started"] > self.timeout:
+                waiting = [n for n in self.specs if not state["stacks"].get(n, {}).get("done")]
+                raise TimeoutError(f"Timeout waiting for stacks {waiting} after {self.timeout / 60:.0f} minutes")
+            delay = backoff.next()
+            state["attempt"] = backoff.attempt
+            if deadline is not None and self.clock() + delay > deadline:
+                return state, delay
+            self.sleep(delay)
 
-def get_stack_outputs(stack_name):
-    desc = CF.describe_stacks(StackName=stack_name)["Stacks"][0]
-    outputs = {o["OutputKey"]: o["OutputValue"] for o in desc.get("Outputs", [])}
-    return outputs
+    def _start_ready(self, state):
+        """Start every stack whose dependencies are complete (repeating, as no-change stacks complete at once)."""
+        ready = True
+        while ready:
+            ready = [name for name, spec in self.specs.items() if name not in state["stacks"]
+                     and all(state["stacks"].get(d, {}).get("done") for d in spec.get("after", []))]
+            for name in ready:
+                self._start(name, state)
 
-def start_state_machine(state_machine_arn, input_payload):
+    def _start(self, name, state):
+        spec = self.specs[name]
+        params = dict(spec.get("parameters") or {})
+        for param, (stack, key) in spec.get("inputs", {}).items():
+            params[param] = state["stacks"][stack]["outputs"][key]
+        res = deploy_stack(name, spec["template"], params, self.capabilities, self.cf)
+        state["stacks"][name] = {"result": res, "done": res["status"] == "no_change",
+                                 "outputs": res.get("Outputs", {})}
+        if res["status"] == "no_change":
+            self._check_outputs(name, state)
+
+    def _poll(self, state):
+        for name, entry in state["stacks"].items():
+            if entry["done"]:
+                continue
+            stack = describe_stack(name, self.cf)
+            if check_status(name, stack):
+                entry["done"] = True
+                entry["outputs"] = stack_outputs(stack)
+                self._check_outputs(name, state)
+
+    def _check_outputs(self, name, state):
+        outputs = state["stacks"][name]["outputs"]
+        missing = [k for k in self.specs[name].get("required_outputs", []) if k not in outputs]
+        if missing:
+            raise MissingOutputsError(name, missing, outputs)
+
+
+def start_state_machine(state_machine_arn, input_payload, sf=None):
     """Start Step Functions state machine and return executionArn."""
     if not state_machine_arn:
         raise ValueError("state_machine_arn is required to start execution")
@@ -93,7 +240,7 @@ def start_state_machine(state_machine_arn, input_payload):
         payload_str = json.dumps(input_payload)
     else:
         payload_str = str(input_payload)
-    resp = SF.start_execution(
+    resp = (sf or aws("stepfunctions")).start_execution(
         stateMachineArn=state_machine_arn,
         name=f"ci-deploy-{int(time.time())}",
         input=payload_str
@@ -119,9 +266,33 @@ def build_execution_input(event):
         merged = {"RunId": run_id, "trigger": "ci-deploy", "timestamp": int(time.time())}
     return merged
 
-def lambda_handler(event, _context):
+def stack_specs(event):
+    """The infra and pipeline stacks (plus any independent ExtraStacks) from the event."""
+    infra_stack = event.get("InfraStackName", "iris-mlops-infra")
+    specs = [
+        {"name": infra_stack, "template": event["InfraTemplateS3"],
+         "parameters": event.get("InfraParameters", {}) or {},
+         "required_outputs": ["StepFnLogGroupArn", "RoleStepFunctionsArn"]},
+        {"name": event.get("PipelineStackName", "iris-mlops-pipeline"),
+         "template": event["PipelineTemplateS3"],
+         "parameters": event.get("PipelineParameters", {}) or {},
+         "after": [infra_stack],
+         "inputs": {"StepFnLogGroupArn": [infra_stack, "StepFnLogGroupArn"],
+                    "RoleStepFunctionsArn": [infra_stack, "RoleStepFunctionsArn"]}},
+    ]
+    # stacks nothing depends on; deployed concurrently with the infra stack
+    for extra in event.get("ExtraStacks", []) or []:
+        specs.append({"name": extra["StackName"], "template": extra["TemplateS3"],
+                      "parameters": extra.get("Parameters", {}) or {}})
+    return specs
+
+
+def lambda_handler(event, context, cf=None, sf=None, sleep=time.sleep, clock=time.time, rng=None):
     """
-    Deploy infra stack, wait for completion, deploy pipeline stack, wait, then start the StepFunctions state machine.
+    Deploy infra stack, then the pipeline stack with the infra outputs, then start the StepFunctions state machine.
+    Stacks are polled with jittered exponential backoff. If they are still in progress when the Lambda's
+    remaining time (or event MaxWaitSeconds) runs out, returns status "in_progress" with a resumeToken and
+    retryAfterSeconds; invoking again with the same event plus "ResumeToken" continues from there.
     Returns: JSON with stack statuses and (if started) executionArn.
     """
     results = []
@@ -132,45 +303,33 @@ def lambda_handler(event, _context):
         if not infra_template or not pipeline_template:
             return {"status": "error", "message": "InfraTemplateS3 and PipelineTemplateS3 are required in event"}
 
-        infra_params = event.get("InfraParameters", {}) or {}
-        infra_stack = event.get("InfraStackName", "iris-mlops-infra")
-        capabilities = event.get("Capabilities", [])
+        specs = stack_specs(event)
+        infra_stack, pipeline_stack_name = specs[0]["name"], specs[1]["name"]
+        orchestrator = StackOrchestrator(specs, event.get("Capabilities", []), cf=cf, sleep=sleep,
+                                         clock=clock, rng=rng)
 
-        # Start infra stack
-        infra_res = deploy_stack(infra_stack, infra_template, infra_params, capabilities)
-        results.append(infra_res)
-
-        # Wait for infra to finish (if it started)
-        if infra_res.get("status") in ("create_started", "update_started"):
-            infra_desc = wait_for_stack(infra_stack, wait_seconds=15, timeout_minutes=30)
-        else:
-            infra_desc = CF.describe_stacks(StackName=infra_stack)["Stacks"][0]
+        deadline = None
+        if event.get("MaxWaitSeconds") is not None:
+            deadline = clock() + float(event["MaxWaitSeconds"])
+        elif context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            deadline = clock() + context.get_remaining_time_in_millis() / 1000 - SAFETY_SECONDS
 
-        infra_outputs = {o["OutputKey"]: o["OutputValue"] for o in infra_desc.get("Outputs", [])}
-        print("[lambda_handler] Infra outputs:", infra_outputs)
-
-        # Validate required infra outputs exist
-        required_infra_outputs = ["StepFnLogGroupArn", "RoleStepFunctionsArn"]
-        missing = [k for k in required_infra_outputs if k not in infra_outputs]
-        if missing:
-            return {"status": "error", "message": f"Missing infra outputs: {missing}", "outputs": infra_outputs}
-
-        # Prepare pipeline parameters (merge provided ones and infra outputs)
-        pipeline_params = (event.get("PipelineParameters", {}) or {}).copy()
-        pipeline_params["StepFnLogGroupArn"] = infra_outputs["StepFnLogGroupArn"]
-        pipeline_params["RoleStepFunctionsArn"] = infra_outputs["RoleStepFunctionsArn"]
-
-        pipeline_stack_name = event.get("PipelineStackName", "iris-mlops-pipeline")
-        pipeline_res = deploy_stack(pipeline_stack_name, pipeline_template, pipeline_params, capabilities)
-        results.append(pipeline_res)
+        state = decode_state(event["ResumeToken"]) if event.get("ResumeToken") else None
+        try:
+            state, retry_after = orchestrator.run(state, deadline)
+        except MissingOutputsError as e:
+            return {"status": "error", "message": f"Missing outputs of stack {e.stack_name}: {e.missing}",
+                    "stack": e.stack_name, "outputs": e.outputs}
+        results = [entry["result"] for entry in state["stacks"].values()]
 
-        # Wait for pipeline stack
-        if pipeline_res.get("status") in ("create_started", "update_started"):
-            pipeline_desc = wait_for_stack(pipeline_stack_name, wait_seconds=15, timeout_minutes=30)
-        else:
-            pipeline_desc = CF.describe_stacks(StackName=pipeline_stack_name)["Stacks"][0]
+        if retry_after is not None:
+            print(f"[lambda_handler] Stacks still in progress; resume in {retry_after:.0f}s")
+            return {"status": "in_progress", "stacks": results, "resumeToken": encode_state(state),
+                    "retryAfterSeconds": retry_after}
 
-        pipeline_outputs = {o["OutputKey"]: o["OutputValue"] for o in pipeline_desc.get("Outputs", [])}
+        infra_outputs = state["stacks"][infra_stack]["outputs"]
+        pipeline_outputs = state["stacks"][pipeline_stack_name]["outputs"]
+        print("[lambda_handler] Infra outputs:", infra_outputs)
         print("[lambda_handler] Pipeline outputs:", pipeline_outputs)
 
         # Try to find the State Machine ARN in pipeline outputs (supports multiple key variants)
@@ -186,7 +345,7 @@ def lambda_handler(event, _context):
             exec_input = build_execution_input(event)
             print("[lambda_handler] Execution input:", exec_input)
             try:
-                execution_arn = start_state_machine(state_machine_arn, input_payload=exec_input)
+                execution_arn = start_state_machine(state_machine_arn, input_payload=exec_input, sf=sf)
                 print("[lambda_handler] Started StepFunctions execution:", execution_arn)
             except ClientError as e:
                 print("[lambda_handler] Failed to start state machine:", str(e))
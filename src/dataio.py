@@ -0,0 +1,295 @@
+"""
+Table I/O shared by preprocess, train and infer.
+
+The format is picked from the file extension: .parquet/.pq for Parquet,
+.feather/.arrow/.ipc for Arrow IPC, .f32 for the memory-mapped float32
+feature store (src/feature_store.py), anything else is read and written as CSV.
+A directory (e.g. processed.parquet/) is a partitioned dataset whose
+part-NNNNN files are read in name order.
+"""
+import io
+import os
+import shutil
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+CSV, PARQUET, ARROW, STORE = "csv", "parquet", "arrow", "store"
+EXTENSIONS = {
+    ".csv": CSV,
+    ".parquet": PARQUET, ".pq": PARQUET,
+    ".feather": ARROW, ".arrow": ARROW, ".ipc": ARROW,
+    ".f32": STORE,
+}
+
+
+def list_parts(path):
+    """The data files behind `path`: itself, or the sorted parts of a directory."""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(os.path.join(path, f) for f in os.listdir(path)
+                  if os.path.splitext(f)[1].lower() in EXTENSIONS)
+
+
+def detect_format(path):
+    fmt = EXTENSIONS.get(os.path.splitext(path.rstrip("/"))[1].lower())
+    if fmt is None and os.path.isdir(path):
+        parts = list_parts(path)
+        if not parts:
+            raise FileNotFoundError(f"No data files found in {path}")
+        fmt = detect_format(parts[0])
+    return fmt or CSV
+
+
+def read_columns(path):
+    """Column names of a file (or the first part of a directory) without reading any rows."""
+    part = list_parts(path)[0]
+    fmt = detect_format(part)
+    if fmt == PARQUET:
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(part).names)
+    if fmt == ARROW:
+        import pyarrow as pa
+        with pa.memory_map(part) as src:
+            return list(pa.ipc.open_file(src).schema.names)
+    if fmt == STORE:
+        from src.feature_store import read_header
+        return read_header(part)["columns"]
+    return list(pd.read_csv(part, nrows=0).columns)
+
+
+def _select(df, columns):
+    # CSV usecols keeps file order; always hand back the requested order
+    return df if columns is None else df[list(columns)]
+
+
+def read_table(path, columns=None, dtype=None):
+    """
+    Read a whole file or partitioned directory into one DataFrame.
+    Only `columns` are read when given; `dtype` applies to CSV parsing.
+    """
+    frames = []
+    for part in list_parts(path):
+        fmt = detect_format(part)
+        if fmt == PARQUET:
+            frames.append(pd.read_parquet(part, columns=columns))
+        elif fmt == ARROW:
+            frames.append(pd.read_feather(part, columns=columns))
+        elif fmt == STORE:
+            from src.feature_store import FeatureStore
+            frames.append(FeatureStore(part).frame(columns))
+        else:
+            frames.append(_select(pd.read_csv(part, usecols=columns, dtype=dtype), columns))
+    if not frames:
+        raise FileNotFoundError(f"No data files found in {path}")
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def iter_batches(path, batch_rows, columns=None, dtype=None):
+    """Yield DataFrames of at most `batch_rows` rows, one file at a time."""
+    for part in list_parts(path):
+        fmt = detect_format(part)
+        if fmt == PARQUET:
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_rows, columns=columns):
+                yield batch.to_pandas()
+        elif fmt == ARROW:
+            import pyarrow as pa
+            # memory-mapped, so only the record batch being converted is materialised
+            with pa.memory_map(part) as src:
+                reader = pa.ipc.open_file(src)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    if columns is not None:
+                        batch = batch.select(list(columns))
+                    for offset in range(0, batch.num_rows, batch_rows):
+                        yield batch.slice(offset, batch_rows).to_pandas()
+        elif fmt == STORE:
+            from src.feature_store import FeatureStore
+            store = FeatureStore(part)
+            for start in range(0, store.rows, batch_rows):
+                yield store.frame(columns, start, start + batch_rows)  # views of the mapping
+        else:
+            empty = True
+            for chunk in pd.read_csv(part, usecols=columns, dtype=dtype, chunksize=batch_rows):
+                empty = False
+                yield _select(chunk, columns)
+            if empty:
+                # a header-only file still yields its (empty) frame, so writers emit the header
+                yield _select(pd.read_csv(part, usecols=columns, dtype=dtype, nrows=0), columns)
+
+
+# rows of one part, addressed without parsing the rest of it: [start, stop) are
+# bytes for CSV, row groups for Parquet and rows for Arrow IPC / feature stores;
+# row_offset is the index of its first row within the part
+RowRange = namedtuple("RowRange", "path start stop row_offset")
+
+
+def _csv_ranges(part, batch_rows, block_size):
+    """Byte ranges of `batch_rows` lines each, found by scanning for newlines."""
+    ranges, row_offset, need = [], 0, batch_rows
+    with open(part, "rb") as f:
+        start = pos = len(f.readline())  # past the header
+        for block in iter(lambda: f.read(block_size), b""):
+            newlines = np.flatnonzero(np.frombuffer(block, np.uint8) == ord("\n"))
+            while need <= len(newlines):
+                cut = pos + int(newlines[need - 1]) + 1
+                ranges.append(RowRange(part, start, cut, row_offset))
+                start, row_offset = cut, row_offset + batch_rows
+                newlines, need = newlines[need:], batch_rows
+            need -= len(newlines)
+            pos += len(block)
+    if pos > start:
+        ranges.append(RowRange(part, start, pos, row_offset))
+    return ranges
+
+
+def row_ranges(path, batch_rows, block_size=1 << 24):
+    """
+    Split every part of `path` into RowRanges of about `batch_rows` rows
+    (one per row group for Parquet) that read_range() reads independently,
+    e.g. in different processes. Only CSV is scanned, for line breaks; no
+    rows are parsed. CSV rows must not contain quoted line breaks.
+    """
+    ranges = []
+    for part in list_parts(path):
+        fmt = detect_format(part)
+        if fmt == CSV:
+            ranges += _csv_ranges(part, batch_rows, block_size)
+            continue
+        if fmt == PARQUET:
+            import pyarrow.parquet as pq
+            meta, offset = pq.ParquetFile(part).metadata, 0
+            for i in range(meta.num_row_groups):
+                ranges.append(RowRange(part, i, i + 1, offset))
+                offset += meta.row_group(i).num_rows
+            continue
+        if fmt == ARROW:
+            import pyarrow as pa
+            with pa.memory_map(part) as src:
+                reader = pa.ipc.open_file(src)
+                rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+        else:
+            from src.feature_store import read_header
+            rows = read_header(part)["rows"]
+        ranges += [RowRange(part, s, min(s + batch_rows, rows), s) for s in range(0, rows, batch_rows)]
+    return ranges
+
+
+def read_range(rows, columns=None, dtype=None):
+    """The DataFrame of one RowRange; `dtype` applies to CSV parsing."""
+    fmt = detect_format(rows.path)
+    if fmt == PARQUET:
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(rows.path).read_row_groups(range(rows.start, rows.stop), columns=columns).to_pandas()
+    if fmt == ARROW:
+        import pyarrow as pa
+        with pa.memory_map(rows.path) as src:
+            table = pa.ipc.open_file(src).read_all().slice(rows.start, rows.stop - rows.start)
+            return (table if columns is None else table.select(list(columns))).to_pandas()
+    if fmt == STORE:
+        from src.feature_store import FeatureStore
+        return FeatureStore(rows.path).frame(columns, rows.start, rows.stop)
+    names = read_columns(rows.path)
+    with open(rows.path, "rb") as f:
+        f.seek(rows.start)
+        data = f.read(rows.stop - rows.start)
+    return _select(pd.read_csv(io.BytesIO(data), header=None, names=names, usecols=columns, dtype=dtype), columns)
+
+
+class TableWriter:
+    """
+    Append DataFrames to a CSV, Parquet or Arrow IPC file.
+
+    With `partition_rows` > 0, `path` is a directory and a new
+    <prefix>-NNNNN<ext> file is started every `partition_rows` rows.
+    """
+
+    def __init__(self, path, partition_rows=0, prefix="part"):
+        self.path = path
+        self.format = detect_format(path)
+        self.partition_rows = partition_rows
+        self.prefix = prefix
+        self.parts = []
+        self.part_rows = []
+        self.rows = 0
+        self._sink = None
+        self._sink_rows = 0
+        # an earlier output of the same name but the other kind (file / partitioned
+        # directory) is replaced, as a file of the same kind would be overwritten
+        if partition_rows:
+            if os.path.isfile(path):
+                os.remove(path)
+            os.makedirs(path, exist_ok=True)
+        elif os.path.isdir(path):
+            shutil.rmtree(path)
+
+    def write(self, df):
+        start = 0
+        while True:
+            if self.partition_rows and self._sink_rows >= self.partition_rows:
+                self._close_sink()
+            take = len(df) - start
+            if self.partition_rows:
+                take = min(take, self.partition_rows - self._sink_rows)
+            self._write_part(df.iloc[start:start + take])
+            start += take
+            if start >= len(df):
+                break
+        self.rows += len(df)
+
+    def _write_part(self, df):
+        new = self._sink is None
+        if new:
+            if self.partition_rows:
+                ext = os.path.splitext(self.path.rstrip("/"))[1] or ".csv"
+                part = os.path.join(self.path, f"{self.prefix}-{len(self.parts):05d}{ext}")
+            else:
+                part = self.path
+            self.parts.append(part)
+            self.part_rows.append(0)
+
+        if self.format == CSV:
+            if new:
+                self._sink = open(self.parts[-1], "w", newline="")
+            df.to_csv(self._sink, index=False, header=new)
+        elif self.format == STORE:
+            if new:
+                from src.feature_store import FeatureStore
+                self._sink = FeatureStore.for_frame(self.parts[-1], df)
+            self._sink.append(df)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if new:
+                if self.format == PARQUET:
+                    self._sink = pq.ParquetWriter(self.parts[-1], table.schema)
+                else:
+                    self._sink = pa.ipc.new_file(self.parts[-1], table.schema)
+            self._sink.write_table(table)
+        self._sink_rows += len(df)
+        self.part_rows[-1] += len(df)
+
+    def _close_sink(self):
+        if self._sink is not None:
+            self._sink.close()
+        self._sink = None
+        self._sink_rows = 0
+
+    def close(self):
+        self._close_sink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_table(df, path, partition_rows=0):
+    """Write `df` to `path` (a directory of parts when `partition_rows` > 0)."""
+    with TableWriter(path, partition_rows) as w:
+        w.write(df)
+    return w.parts
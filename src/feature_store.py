@@ -0,0 +1,163 @@
+"""
+Fixed-width float32 feature store, memory-mapped by its readers.
+
+A .f32 file is a HEADER_BYTES header (MAGIC, then JSON with the column
+names, row count, dtype and which columns hold integers, space padded)
+followed by the values row-major, one float32 per column. Readers map the
+file and get NumPy/pandas views of it, so nothing is parsed or copied and
+every process reading the same store shares one page-cache copy:
+
+    store = FeatureStore("processed/features.f32")
+    X = store.frame(FEATURES)            # DataFrame backed by the mapping
+    y = store.column("target")
+
+append() writes the new rows first and bumps the header's row count last,
+so a reader never sees a partly written row. dataio reads and writes .f32
+like any other format; integer columns (the target) come back as int64.
+"""
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"IRISF32\n"
+HEADER_BYTES = 4096  # the data starts page aligned
+DTYPE = "float32"
+EXTENSION = ".f32"
+FEATURE_STORE_FILENAME = "features" + EXTENSION
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_BYTES)
+    if not raw.startswith(MAGIC):
+        raise ValueError(f"{path} is not a feature store")
+    return json.loads(raw[len(MAGIC):])
+
+
+def _write_header(f, header):
+    raw = MAGIC + json.dumps(header).encode()
+    if len(raw) > HEADER_BYTES:
+        raise ValueError(f"feature store header exceeds {HEADER_BYTES} bytes; too many columns")
+    f.seek(0)
+    f.write(raw.ljust(HEADER_BYTES))
+
+
+class FeatureStore:
+    def __init__(self, path):
+        self.path = path
+        header = read_header(path)
+        self.columns = header["columns"]
+        self.int_columns = header["int_columns"]
+        self.rows = header["rows"]
+        self.dtype = np.dtype(header["dtype"])
+
+    @classmethod
+    def create(cls, path, columns, int_columns=()):
+        """An empty store with `columns`, replacing any file at `path`."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            _write_header(f, {"columns": list(columns), "int_columns": list(int_columns),
+                              "rows": 0, "dtype": DTYPE})
+        return cls(path)
+
+    @classmethod
+    def for_frame(cls, path, df):
+        """An empty store with the columns of `df`, which must all be numeric."""
+        for c in df.columns:
+            if not (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])):
+                raise ValueError(f"feature stores hold numeric columns only; {c!r} is {df[c].dtype}")
+        return cls.create(path, df.columns, [c for c in df.columns if pd.api.types.is_integer_dtype(df[c])])
+
+    def __len__(self):
+        return self.rows
+
+    def _header(self):
+        return {"columns": self.columns, "int_columns": self.int_columns,
+                "rows": self.rows, "dtype": self.dtype.name}
+
+    def _commit(self, f, rows):
+        f.flush()
+        self.rows += rows
+        _write_header(f, self._header())
+
+    def append(self, df):
+        """Append the rows of `df`, which must have the store's columns."""
+        values = np.ascontiguousarray(df[self.columns].to_numpy(dtype=self.dtype))
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER_BYTES + self.rows * len(self.columns) * self.dtype.itemsize)
+            f.write(values.tobytes())
+            self._commit(f, len(values))
+
+    def extend(self, path, block_size=1 << 24):
+        """Append every row of another store with the same columns, copying the raw bytes."""
+        other = FeatureStore(path)
+        if other.columns != self.columns or other.dtype != self.dtype:
+            raise ValueError(f"{path} has columns {other.columns}, expected {self.columns}")
+        row_bytes = len(self.columns) * self.dtype.itemsize
+        remaining = other.rows * row_bytes  # only the rows its header covers
+        with open(self.path, "r+b") as f, open(path, "rb") as src:
+            f.seek(HEADER_BYTES + self.rows * row_bytes)
+            src.seek(HEADER_BYTES)
+            while remaining:
+                block = src.read(min(block_size, remaining))
+                f.write(block)
+                remaining -= len(block)
+            self._commit(f, other.rows)
+
+    def array(self):
+        """All rows as a read-only (rows, columns) view of the file."""
+        if not self.rows:
+            return np.empty((0, len(self.columns)), self.dtype)
+        return np.memmap(self.path, self.dtype, mode="r", offset=HEADER_BYTES,
+                         shape=(self.rows, len(self.columns)))
+
+    def column(self, name, start=0, stop=None):
+        """One column as a (strided) view; integer columns are converted, i.e. copied."""
+        values = self.array()[start:stop, self.columns.index(name)]
+        return values.astype(np.int64) if name in self.int_columns else values
+
+    def frame(self, columns=None, start=0, stop=None):
+        """
+        Rows [start, stop) as a DataFrame. Float columns that sit next to
+        each other in the store (e.g. FEATURES) are a view of the mapping;
+        integer columns are converted copies.
+        """
+        columns = list(self.columns if columns is None else columns)
+        missing = [c for c in columns if c not in self.columns]
+        if missing:
+            raise KeyError(f"{missing} not in feature store {self.path}")
+        rows = self.array()[start:stop]
+        floats = [c for c in columns if c not in self.int_columns]
+        idx = [self.columns.index(c) for c in floats]
+        if idx and idx == list(range(idx[0], idx[0] + len(idx))):
+            values = rows[:, idx[0]:idx[0] + len(idx)]  # a slice: no copy
+        else:
+            values = rows[:, idx]
+        df = pd.DataFrame(values, columns=floats, copy=False)
+        for c in columns:
+            if c in self.int_columns:
+                df.insert(columns.index(c), c, rows[:, self.columns.index(c)].astype(np.int64))
+        return df
+
+    def slices(self, batch_rows, columns=None):
+        """Picklable StoreSlice handles covering the store, for worker processes to map themselves."""
+        return [StoreSlice(self.path, start, min(start + batch_rows, self.rows), columns)
+                for start in range(0, self.rows, batch_rows)]
+
+    def close(self):
+        pass  # every append opens and closes the file; kept for TableWriter
+
+
+class StoreSlice:
+    """Rows [start, stop) of a store; sent to workers instead of the rows themselves."""
+
+    def __init__(self, path, start, stop, columns=None):
+        self.path, self.start, self.stop, self.columns = path, start, stop, columns
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def frame(self):
+        return FeatureStore(self.path).frame(self.columns, self.start, self.stop)
@@ -0,0 +1,113 @@
+"""
+Adaptive micro-batching in front of model.predict.
+
+Concurrent callers `await batcher.predict(rows)`; a single background task
+collects requests until `max_batch_size` rows are queued or `max_wait_ms`
+has passed since the first one, runs one vectorised predict in a worker
+thread and hands each caller back its slice of the result.
+
+The wait is adaptive: a lone caller (previous batch held one request) is
+dispatched as soon as nothing else is queued, so low concurrency does not
+pay max_wait_ms per request.
+"""
+import time
+import asyncio
+from collections import Counter
+
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+        self._last_batch_requests = 1
+        # counters
+        self.batch_sizes = Counter()  # rows per batch, bucketed to powers of two
+        self.requests = 0
+        self.batches = 0
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def predict(self, rows):
+        """Predict a 2-D array of rows; resolves once its batch has run."""
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((np.asarray(rows), fut, time.perf_counter()))
+        return await fut
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        n_rows = len(batch[0][0])
+        while n_rows < self.max_batch_size and not self._queue.empty():
+            item = self._queue.get_nowait()
+            batch.append(item)
+            n_rows += len(item[0])
+        if len(batch) == 1 and self._last_batch_requests == 1:
+            return batch
+
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            try:
+                # inside the try: rows of mismatched width fail this batch, not the batcher task
+                X = np.concatenate([rows for rows, _, _ in batch])
+                preds = await loop.run_in_executor(None, self.predict_fn, X)
+            except Exception as e:
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            offset = 0
+            for rows, fut, enqueued in batch:
+                if not fut.done():
+                    fut.set_result(preds[offset:offset + len(rows)])
+                offset += len(rows)
+                delay = started - enqueued
+                self.queue_delay_total += delay
+                self.queue_delay_max = max(self.queue_delay_max, delay)
+            self.requests += len(batch)
+            self.batches += 1
+            self._last_batch_requests = len(batch)
+            self.batch_sizes[1 << (len(X) - 1).bit_length()] += 1
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_requests": self.requests / self.batches if self.batches else 0.0,
+            "batch_rows_histogram": dict(sorted(self.batch_sizes.items())),
+            "queue_delay_mean_ms": 1000 * self.queue_delay_total / self.requests if self.requests else 0.0,
+            "queue_delay_max_ms": 1000 * self.queue_delay_max,
+        }
@@ -1,32 +1,213 @@
-import os, tarfile, joblib, pandas as pd, argparse
+import os, argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.schema import FEATURES
+from src.dataio import read_table, iter_batches, write_table, TableWriter, detect_format, STORE
+from src.feature_store import FeatureStore, StoreSlice
+from src.inference.model_store import resolve_model_path, load_model as load_model_file, file_sha256
+from src.inference.prediction_cache import PredictionCache, stats_delta, merge_stats
+from src.instrumentation import StepMetrics
+
+# Feature columns are always parsed as float64 so a chunked read formats every
+# value exactly like a whole-file read would.
+DTYPES = {c: "float64" for c in FEATURES}
+SHARD_ROWS = 100_000  # default shard size for --workers > 1 without --chunk-rows
+
+_MODEL = None  # per-process model, loaded once by _init_worker
+_CACHE = None
+
+
+def load_model(model_dir, model_filename, predictor="xgboost"):
+    return load_model_file(resolve_model_path(model_dir, model_filename), predictor)
+
+
+def score(model, df, cache=None):
+    """Drop the target (if any) and append a `prediction` column."""
+    df_out = df.drop(columns=["target"], errors="ignore")
+    if not len(df_out):
+        # XGBoost cannot predict zero rows; keep the header-only output
+        df_out["prediction"] = np.empty(0, dtype=np.int64)
+    elif cache is not None:
+        df_out["prediction"] = cache.predict(model, df_out)
+    else:
+        df_out["prediction"] = model.predict(df_out)
+    return df_out
+
+
+def make_cache(model_path, cache_size):
+    return PredictionCache(file_sha256(model_path), cache_size) if cache_size > 0 else None
+
+
+def _init_worker(model_path, predictor, cache_size=0):
+    global _MODEL, _CACHE
+    _MODEL = load_model_file(model_path, predictor)
+    _CACHE = make_cache(model_path, cache_size)
+
+
+def _rows(shard):
+    # a StoreSlice is mapped here, in the worker, instead of being pickled over
+    return shard.frame() if isinstance(shard, StoreSlice) else shard
+
+
+def _score_shard(shard):
+    """score() in a worker, plus what it added to the worker's cache counters."""
+    before = _CACHE.stats() if _CACHE is not None else None
+    out = score(_MODEL, _rows(shard), _CACHE)
+    if before is None:
+        return out, None
+    delta = stats_delta(before, _CACHE.stats())
+    delta["worker"] = os.getpid()
+    return out, delta
+
+
+def _score_part(shard, out_file):
+    out, delta = _score_shard(shard)
+    write_table(out, out_file)
+    return len(shard), delta
+
+
+def score_parallel(shards, model_path, out_file, workers, part_files=False, predictor="xgboost",
+                   cache_size=0, metrics=None):
+    """
+    Score an iterable of DataFrame shards (or StoreSlices of a feature
+    store) in a pool of `workers` processes.
+    Results are merged into `out_file` in input order, or written by the
+    workers as `<out_file stem>-<part><ext>` when `part_files` is set.
+    At most 2 * workers shards are in flight, so memory stays bounded.
+    Returns (rows scored, prediction cache stats summed over the workers,
+    or None without a cache). With `metrics`, time spent waiting for the
+    workers is charged to "predict".
+    """
+    stem, ext = os.path.splitext(out_file)
+    metrics = metrics or StepMetrics("infer", enabled=False)
+    deltas = []
+    n_rows = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path, predictor, cache_size)) as pool:
+        pending = deque()
+
+        def collect():
+            with metrics.stage("predict"):
+                result, delta = pending.popleft().result()
+            if delta is not None:
+                deltas.append(delta)
+            return result
+
+        if part_files:
+            for i, shard in enumerate(shards):
+                pending.append(pool.submit(_score_part, shard, f"{stem}-{i:05d}{ext}"))
+                if len(pending) >= 2 * workers:
+                    n_rows += collect()
+            while pending:
+                n_rows += collect()
+        else:
+            with TableWriter(out_file) as writer:
+                for shard in shards:
+                    pending.append(pool.submit(_score_shard, shard))
+                    if len(pending) >= 2 * workers:
+                        _write_result(writer, collect(), metrics)
+                while pending:
+                    _write_result(writer, collect(), metrics)
+            n_rows = writer.rows
+    return n_rows, (merge_stats(deltas) if cache_size > 0 else None)
+
+
+def _write_result(writer, df, metrics):
+    with metrics.stage("write", rows=len(df)):
+        writer.write(df)
+
 
 def main(args):
-    # --- Load model ---
-    model_path = os.path.join(args.model_dir, args.model_filename)
-    if not os.path.exists(model_path):  
-        tar_path = os.path.join(args.model_dir, "model.tar.gz")
-        if os.path.exists(tar_path):
-            with tarfile.open(tar_path) as tar:
-                tar.extractall(args.model_dir)
-    model = joblib.load(model_path)
-
-    # --- Load input data ---
-    df = pd.read_csv(os.path.join(args.input_dir, args.input_filename))
-    X = df.drop(columns=["target"], errors="ignore")
-    df_out = X.copy()
-    
-    # --- Predict & save output ---
-    df_out["prediction"] = model.predict(X)
+    if getattr(args, "models", None) or getattr(args, "mlruns_dir", None):
+        from src.inference.multi_model import main as score_models  # champion/challenger mode
+        return score_models(args)
+
+    in_file = os.path.join(args.input_dir, args.input_filename)
     os.makedirs(args.output_dir, exist_ok=True)
-    out_file = os.path.join(args.output_dir, "predictions.csv")
-    df_out.to_csv(out_file, index=False)
-    print(f"Predictions saved to {out_file}")
+    out_file = os.path.join(args.output_dir, getattr(args, "output_filename", "predictions.csv"))
+    chunk_rows = getattr(args, "chunk_rows", 0) or 0
+    workers = getattr(args, "workers", 1) or 1
+    predictor = getattr(args, "predictor", "xgboost")
+    cache_size = getattr(args, "prediction_cache_size", 0) or 0
+    metrics = StepMetrics("infer")
+
+    if workers > 1:
+        # --- Shard the input and score it across a process pool ---
+        model_path = resolve_model_path(args.model_dir, args.model_filename)
+        if detect_format(in_file) == STORE:
+            shards = FeatureStore(in_file).slices(chunk_rows or SHARD_ROWS, FEATURES)
+        else:
+            shards = metrics.timed_iter("parse", iter_batches(in_file, chunk_rows or SHARD_ROWS,
+                                                              columns=FEATURES, dtype=DTYPES))
+        n_rows, cache_stats = score_parallel(shards, model_path, out_file, workers,
+                                part_files=getattr(args, "part_files", False), predictor=predictor,
+                                cache_size=cache_size, metrics=metrics)
+        print(f"Predictions saved to {out_file} ({n_rows} rows, workers={workers})")
+        metrics.set(rows=n_rows, workers=workers)
+        if cache_stats is not None:
+            print(f"Prediction cache: {cache_stats}")
+            metrics.set(prediction_cache=cache_stats)
+        metrics.write(args.output_dir)
+        return
+
+    # --- Load model ---
+    with metrics.stage("load"):
+        model_path = resolve_model_path(args.model_dir, args.model_filename)
+        model = load_model_file(model_path, predictor)
+        cache = make_cache(model_path, cache_size)
+
+    if chunk_rows > 0:
+        # --- Stream: read, predict & append one chunk at a time ---
+        with TableWriter(out_file) as writer:
+            for chunk in metrics.timed_iter("parse", iter_batches(in_file, chunk_rows, columns=FEATURES,
+                                                                  dtype=DTYPES)):
+                with metrics.stage("predict", rows=len(chunk)):
+                    out = score(model, chunk, cache)
+                with metrics.stage("write", rows=len(out)):
+                    writer.write(out)
+        print(f"Predictions saved to {out_file} ({writer.rows} rows, chunk_rows={chunk_rows})")
+        metrics.set(rows=writer.rows)
+    else:
+        # --- Load input data, predict & save output ---
+        with metrics.stage("parse"):
+            df = read_table(in_file, columns=FEATURES, dtype=DTYPES)
+        with metrics.stage("predict", rows=len(df)):
+            out = score(model, df, cache)
+        with metrics.stage("write", rows=len(out)):
+            write_table(out, out_file)
+        print(f"Predictions saved to {out_file}")
+        metrics.set(rows=len(out))
+
+    if cache is not None:
+        print(f"Prediction cache: {cache.stats()}")
+        metrics.set(prediction_cache=cache.stats())
+    metrics.write(args.output_dir)
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     p.add_argument("--input-dir", default="/opt/ml/processing/input")
     p.add_argument("--input-filename", default="processed.csv")
     p.add_argument("--model-dir", default="/opt/ml/processing/model")
-    p.add_argument("--model-filename", default="model.joblib")
+    p.add_argument("--model-filename", default="model.joblib",
+                   help="model.ubj / model.json load the native XGBoost booster")
     p.add_argument("--output-dir", default="/opt/ml/processing/output")
+    p.add_argument("--output-filename", default="predictions.csv",
+                   help="Output file; .parquet/.feather/.arrow select a columnar format")
+    p.add_argument("--chunk-rows", type=int, default=0,
+                   help="Stream the input in chunks of this many rows (0 = read whole file)")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Score shards in this many processes (1 = in-process)")
+    p.add_argument("--predictor", choices=["xgboost", "numpy"], default="xgboost",
+                   help="numpy scores with the flattened-tree TreeEnsemblePredictor")
+    p.add_argument("--prediction-cache-size", type=int, default=0,
+                   help="Deduplicate rows and cache up to this many unique-row predictions (0 = off)")
+    p.add_argument("--part-files", action="store_true",
+                   help="With --workers > 1, write one predictions-NNNNN.csv per shard instead of merging")
+    p.add_argument("--models", nargs="+", default=None, metavar="[NAME=]PATH",
+                   help="Challenger models scored next to the champion in the same pass "
+                        "(model files, model dirs or MLflow model dirs)")
+    p.add_argument("--mlruns-dir", default=None,
+                   help="Also score every run with a logged model in this MLflow file store")
     main(p.parse_args())
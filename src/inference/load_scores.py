@@ -0,0 +1,100 @@
+"""
+Score a batch and stream the predictions into the INFERENCE_SCORES table.
+
+    python -m src.inference.load_scores --sink snowflake:// --sf-user ... --sf-password ...
+    python -m src.inference.load_scores --sink sqlite:///scores.db   # local stand-in
+
+The streaming replacement for inference-Copy1.py. Chunks are scored and
+handed to a BulkSink (src/inference/sinks.py) as they come, so the load
+overlaps with scoring. predictions.csv keeps the features, as before. The
+table gets the existing INFERENCE_SCORES columns only: ID (the input's ID
+column, or else the row number), prediction, run_id and scored_at.
+"""
+import os, argparse
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.dataio import iter_batches, TableWriter
+from src.inference.inference import load_model, score, DTYPES
+from src.inference.sinks import open_sink, QUEUE_SIZE, BATCH_ROWS, WORKERS, RETRIES
+
+TABLE = "SNOWFLAKE_LEARNING_DB.PUBLIC.INFERENCE_SCORES"
+SCORE_COLUMNS = ["ID", "prediction", "run_id", "scored_at"]
+
+
+def score_rows(chunk, preds, offset, run_id, scored_at):
+    """The INFERENCE_SCORES rows of one scored chunk."""
+    if "ID" in chunk:
+        ids = chunk["ID"].astype(str).to_numpy()
+    else:
+        ids = np.arange(offset, offset + len(chunk)).astype(str)
+    return pd.DataFrame({"ID": ids, "prediction": np.asarray(preds, dtype=np.float64),
+                         "run_id": run_id, "scored_at": scored_at}, columns=SCORE_COLUMNS)
+
+
+def main(args):
+    # --- Load model ---
+    model = load_model(args.model_dir, args.model_filename)
+    scored_at = pd.Timestamp(datetime.now(timezone.utc))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_file = os.path.join(args.output_dir, "predictions.csv")
+    connect_kwargs = {}
+    if args.sink.startswith("snowflake"):
+        connect_kwargs = dict(
+            account="xj17520",
+            user=args.sf_user,
+            password=args.sf_password,
+            warehouse=args.sf_warehouse,
+            database=args.sf_database,
+            schema=args.sf_schema,
+            host="xj17520.eu-north-1.aws.snowflakecomputing.com"
+        )
+    sink = open_sink(args.sink, args.table, workers=args.sink_workers, queue_size=args.sink_queue,
+                     batch_rows=args.sink_batch_rows, retries=args.sink_retries, **connect_kwargs)
+    print(f"Streaming predictions to {args.sink} {args.table}")
+
+    # --- Predict, save and upload chunk by chunk; loading overlaps with scoring ---
+    offset = 0
+    with TableWriter(out_file) as writer, sink:
+        for chunk in iter_batches(os.path.join(args.input_dir, args.input_filename), args.chunk_rows,
+                                  dtype=DTYPES):
+            df_out = score(model, chunk)
+            df_out["run_id"] = args.run_id
+            df_out["scored_at"] = scored_at
+            writer.write(df_out)
+            sink.put(score_rows(chunk, df_out["prediction"], offset, args.run_id, scored_at))
+            offset += len(chunk)
+    print(f"Predictions saved to {out_file}")
+
+    s = sink.stats
+    print(f"Loaded {s['rows']} rows in {s['batches']} batches ({s['bytes'] / 2**20:.1f} MB compressed) "
+          f"over {s['connections']} connections in {s['seconds']:.2f}s; retries={s['retries']} "
+          f"put_wait={s['put_wait_seconds']:.2f}s max_batch_latency={s['max_batch_latency']:.2f}s")
+    return s
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--input-dir", default="/opt/ml/processing/input")
+    p.add_argument("--input-filename", default="processed.csv")
+    p.add_argument("--model-dir", default="/opt/ml/processing/model")
+    p.add_argument("--model-filename", default="model.joblib")
+    p.add_argument("--output-dir", default="/opt/ml/processing/output")
+    p.add_argument("--sf-user")
+    p.add_argument("--sf-password")
+    p.add_argument("--sf-warehouse", default="COMPUTE_WH")
+    p.add_argument("--sf-database", default="SNOWFLAKE_LEARNING_DB")
+    p.add_argument("--sf-schema", default="PUBLIC")
+    p.add_argument("--run_id", default="batch-run")
+    p.add_argument("--chunk-rows", type=int, default=100_000)
+    p.add_argument("--sink", default="snowflake://",
+                   help="snowflake://, or sqlite:///path.db / duckdb:///path.duckdb to load locally")
+    p.add_argument("--table", default=TABLE)
+    p.add_argument("--sink-workers", type=int, default=WORKERS)
+    p.add_argument("--sink-queue", type=int, default=QUEUE_SIZE, help="Chunks scored ahead of the upload")
+    p.add_argument("--sink-batch-rows", type=int, default=BATCH_ROWS)
+    p.add_argument("--sink-retries", type=int, default=RETRIES)
+    main(p.parse_args())
@@ -0,0 +1,120 @@
+"""
+Model loading shared by batch inference, serving and benchmarks.
+
+- model.tar.gz is extracted once per content hash into MODEL_CACHE_DIR,
+  via a temp dir + rename so concurrent jobs on one volume never see a
+  half-written model.
+- Loaded models are kept in a small in-process LRU keyed by path, size and
+  mtime, so repeated loads of an unchanged file are free.
+- Files ending in .json / .ubj / .xgb are XGBoost's native format and are loaded
+  without unpickling, .npz is an exported TreeEnsemblePredictor; anything
+  else goes through joblib. predictor="numpy" converts an XGBoost model to
+  a TreeEnsemblePredictor once at load time.
+"""
+import os
+import json
+import shutil
+import hashlib
+import tarfile
+import tempfile
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+
+from src.inference.tree_predictor import TreeEnsemblePredictor
+
+CACHE_DIR = os.getenv("MODEL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "iris-model-cache"))
+LRU_SIZE = int(os.getenv("MODEL_LRU_SIZE", "4"))
+NATIVE_EXTENSIONS = (".json", ".ubj", ".xgb")
+
+_loaded = OrderedDict()
+
+
+def file_sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def extract_cached(tar_path, cache_dir=None):
+    """Extract `tar_path` into <cache_dir>/<sha256> once and return that dir."""
+    cache_dir = cache_dir or CACHE_DIR
+    target = os.path.join(cache_dir, file_sha256(tar_path))
+    if os.path.isdir(target):
+        return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".extract-", dir=cache_dir)
+    try:
+        with tarfile.open(tar_path) as tar:
+            tar.extractall(tmp)
+        os.rename(tmp, target)
+    except OSError:
+        # another process finished the same extraction first
+        if not os.path.isdir(target):
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return target
+
+
+def resolve_model_path(model_dir, model_filename):
+    """
+    Return the path of `model_filename`, looking in `model_dir` first and
+    then in the cached extraction of `model_dir`/model.tar.gz.
+    """
+    model_path = os.path.join(model_dir, model_filename)
+    if os.path.exists(model_path):
+        return model_path
+    tar_path = os.path.join(model_dir, "model.tar.gz")
+    if os.path.exists(tar_path):
+        return os.path.join(extract_cached(tar_path), model_filename)
+    return model_path
+
+
+def save_native(model, path):
+    """Save an XGBClassifier's booster as .json or .ubj."""
+    model.save_model(path)
+
+
+def load_native(path):
+    from xgboost import XGBClassifier
+    model = XGBClassifier()
+    model.load_model(path)
+    if not hasattr(model, "n_classes_"):
+        # saved by another xgboost version (e.g. an MLflow run's model.xgb) without
+        # the sklearn attributes this one looks for; the booster config has them
+        config = json.loads(model.get_booster().save_config())
+        model.n_classes_ = int(config["learner"]["learner_model_param"]["num_class"]) or 2
+        model.classes_ = np.arange(model.n_classes_)
+    return model
+
+
+def load_model(model_path, predictor="xgboost"):
+    """Load a model file through the in-process LRU."""
+    st = os.stat(model_path)
+    key = (os.path.realpath(model_path), st.st_size, st.st_mtime_ns, predictor)
+    if key in _loaded:
+        _loaded.move_to_end(key)
+        return _loaded[key]
+
+    if model_path.endswith(".npz"):
+        model = TreeEnsemblePredictor.load(model_path)
+    elif model_path.endswith(NATIVE_EXTENSIONS):
+        model = load_native(model_path)
+    else:
+        model = joblib.load(model_path)
+    if predictor == "numpy" and not model_path.endswith(".npz"):
+        model = TreeEnsemblePredictor.from_model(model)
+
+    _loaded[key] = model
+    while len(_loaded) > LRU_SIZE:
+        _loaded.popitem(last=False)
+    return model
+
+
+def clear_cache():
+    _loaded.clear()
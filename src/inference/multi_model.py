@@ -0,0 +1,177 @@
+"""
+Champion/challenger scoring: several models over a single read of the input.
+
+    python -m src.inference.inference --input-dir data --model-dir model \
+        --models candidate=runs/abc/model.ubj --mlruns-dir src/model_training/mlruns
+
+The champion (--model-dir/--model-filename) and every challenger (--models
+[name=]path, plus each run under --mlruns-dir with a logged xgb_model) are
+loaded once. Each chunk of the input is then parsed once and predicted by
+every model concurrently in a thread pool, since XGBoost releases the GIL
+while predicting. The cost is roughly one read plus N predicts, not N jobs.
+
+The output has the features, `prediction` (the champion's, so drift and
+other consumers are unchanged), one prediction_<name> column per model and
+`all_agree`. model_comparison.json next to it holds each model's class
+counts, its agreement with the champion and with every other model, and,
+when the input carries a target, its accuracy.
+"""
+import os
+import glob
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.schema import FEATURES, TARGET
+from src.dataio import read_table, iter_batches, read_columns, TableWriter
+from src.inference.model_store import resolve_model_path, load_model
+from src.instrumentation import StepMetrics
+
+COMPARISON_FILENAME = "model_comparison.json"
+MLMODEL = "MLmodel"
+
+
+def mlflow_model_file(model_dir):
+    """The model file an MLflow-logged xgboost model directory points at."""
+    import yaml
+
+    with open(os.path.join(model_dir, MLMODEL)) as f:
+        flavors = yaml.safe_load(f)["flavors"]
+    data = (flavors.get("xgboost") or flavors["python_function"])["data"]
+    return os.path.join(model_dir, data)
+
+
+def resolve_spec(spec, model_filename="model.joblib"):
+    """(name, model file) for `[name=]path`; path is a model file, a model dir or an MLflow model dir."""
+    name, _, path = spec.rpartition("=")
+    path = path.rstrip("/")
+    if os.path.isdir(path):
+        if os.path.exists(os.path.join(path, MLMODEL)):
+            return name or os.path.basename(path), mlflow_model_file(path)
+        return name or os.path.basename(path), resolve_model_path(path, model_filename)
+    return name or os.path.splitext(os.path.basename(path))[0], path
+
+
+def discover_runs(mlruns_dir):
+    """(run id prefix, model file) of every run in a file-store mlruns dir that logged a model."""
+    found = []
+    for mlmodel in sorted(glob.glob(os.path.join(mlruns_dir, "*", "*", "artifacts", "*", MLMODEL))):
+        run_id = mlmodel.split(os.sep)[-4]
+        found.append((run_id[:8], mlflow_model_file(os.path.dirname(mlmodel))))
+    return found
+
+
+class Agreement:
+    """Streaming class counts, pairwise agreement and (optional) accuracy of N models."""
+
+    def __init__(self, names):
+        self.names = names
+        n = len(names)
+        self.rows = 0
+        self.counts = [np.zeros(0, np.int64) for _ in names]
+        self.pairs = np.zeros((n, n), np.int64)
+        self.all_agree = 0
+        self.labelled = 0
+        self.correct = np.zeros(n, np.int64)
+
+    def update(self, preds, target=None):
+        P = np.stack(preds)  # (models, rows)
+        self.rows += P.shape[1]
+        for i, p in enumerate(preds):
+            c = np.bincount(p, minlength=len(self.counts[i]))
+            c[:len(self.counts[i])] += self.counts[i]
+            self.counts[i] = c
+        self.pairs += (P[:, None, :] == P[None, :, :]).sum(axis=2)
+        agree = (P == P[0]).all(axis=0)
+        self.all_agree += int(agree.sum())
+        if target is not None:
+            self.labelled += len(target)
+            self.correct += (P == np.asarray(target)[None, :]).sum(axis=1)
+        return agree
+
+    def to_dict(self, paths):
+        rows = max(self.rows, 1)
+        models = {}
+        for i, name in enumerate(self.names):
+            models[name] = {
+                "path": paths[i],
+                "class_counts": {str(k): int(v) for k, v in enumerate(self.counts[i]) if v},
+                "agreement_with_champion": self.pairs[0, i] / rows,
+                "agreement": {other: self.pairs[i, j] / rows
+                              for j, other in enumerate(self.names) if j != i},
+            }
+            if self.labelled:
+                models[name]["accuracy"] = self.correct[i] / self.labelled
+        return {"rows": self.rows, "champion": self.names[0], "all_agree_rate": self.all_agree / rows,
+                "models": models}
+
+
+def load_models(args):
+    """[(name, model file)]: the champion (which must exist) first, then --models, then --mlruns-dir runs."""
+    champion = resolve_model_path(args.model_dir, args.model_filename)
+    if not os.path.exists(champion):
+        # the champion's predictions are the `prediction` column drift and other consumers read
+        raise FileNotFoundError(f"Champion model not found: {champion}")
+    specs = [("champion", champion)]
+    specs += [resolve_spec(s, args.model_filename) for s in getattr(args, "models", None) or []]
+    if getattr(args, "mlruns_dir", None):
+        specs += discover_runs(args.mlruns_dir)
+    names = [name for name, _ in specs]
+    duplicates = {n for n in names if names.count(n) > 1}
+    if duplicates:
+        raise ValueError(f"Model names must be unique; name them with name=path: {sorted(duplicates)}")
+    if len(specs) < 2:
+        raise ValueError(f"Multi-model scoring needs at least two models, got {names}")
+    return specs
+
+
+def main(args):
+    in_file = os.path.join(args.input_dir, args.input_filename)
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_file = os.path.join(args.output_dir, getattr(args, "output_filename", "predictions.csv"))
+    chunk_rows = getattr(args, "chunk_rows", 0) or 0
+    predictor = getattr(args, "predictor", "xgboost")
+    metrics = StepMetrics("infer")
+
+    with metrics.stage("load"):
+        specs = load_models(args)
+        names = [name for name, _ in specs]
+        models = [load_model(path, predictor) for _, path in specs]
+    print(f"[multi-model] scoring with {len(models)} models: {', '.join(names)}")
+
+    from src.inference.inference import DTYPES  # the same parsing as single-model inference
+
+    columns = FEATURES + ([TARGET] if TARGET in read_columns(in_file) else [])
+    if chunk_rows > 0:
+        chunks = iter_batches(in_file, chunk_rows, columns=columns, dtype=DTYPES)
+    else:
+        chunks = (read_table(in_file, columns=columns, dtype=DTYPES) for _ in range(1))
+
+    stats = Agreement(names)
+    with ThreadPoolExecutor(len(models)) as pool, TableWriter(out_file) as writer:
+        for chunk in metrics.timed_iter("parse", chunks):
+            X = chunk[FEATURES]
+            with metrics.stage("predict", rows=len(chunk) * len(models)):
+                preds = [np.asarray(p).astype(np.int64)
+                         for p in pool.map(lambda m: m.predict(X), models)]
+                agree = stats.update(preds, chunk[TARGET] if TARGET in chunk else None)
+            with metrics.stage("write", rows=len(chunk)):
+                out = X.copy()
+                out["prediction"] = preds[0]
+                for name, p in zip(names, preds):
+                    out[f"prediction_{name}"] = p
+                out["all_agree"] = agree
+                writer.write(out)
+
+    report = stats.to_dict([path for _, path in specs])
+    with open(os.path.join(args.output_dir, COMPARISON_FILENAME), "w") as f:
+        json.dump(report, f, indent=2, default=float)
+    print(f"Predictions saved to {out_file} ({stats.rows} rows, {len(models)} models, "
+          f"all agree on {report['all_agree_rate']:.2%})")
+    for name, m in report["models"].items():
+        acc = f" accuracy={m['accuracy']:.4f}" if "accuracy" in m else ""
+        print(f"  {name:<12} agreement_with_champion={m['agreement_with_champion']:.4f}{acc}")
+    metrics.set(rows=stats.rows, models=names)
+    metrics.write(args.output_dir)
+    return report
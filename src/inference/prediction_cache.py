@@ -0,0 +1,101 @@
+"""
+Row-deduplicating prediction cache.
+
+Iris measurements are low-cardinality (0.1 cm resolution), so scoring
+inputs repeat the same feature rows many times. PredictionCache.predict
+collapses a batch to its unique rows with np.unique(..., return_inverse=True),
+looks each one up in an LRU keyed by (model hash, row bytes), predicts only
+the misses in one call and scatters the results back with the inverse index.
+There is no explicit invalidation: a cache is built for one model file, and
+since the key starts with that file's SHA-256, predictions of another model
+can never be served from it. Lookups, inserts and stats() are locked so the
+server's handler threads can share the cache; the predict for the misses
+runs outside the lock.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.schema import FEATURES
+
+COUNTERS = ("rows", "unique_rows", "hits", "misses")
+
+
+class PredictionCache:
+    def __init__(self, model_hash, maxsize=100_000):
+        self.maxsize = maxsize
+        self.model_hash = model_hash
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rows = 0
+
+    def predict(self, model, X):
+        if hasattr(X, "columns"):
+            X = X[FEATURES]
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        uniq, inverse = np.unique(X, axis=0, return_inverse=True)
+
+        keys = [(self.model_hash, row.tobytes()) for row in uniq]
+        cached, miss = [], []
+        with self._lock:
+            for i, k in enumerate(keys):
+                v = self._lru.get(k)
+                if v is None:
+                    miss.append(i)
+                else:
+                    self._lru.move_to_end(k)
+                cached.append(v)
+
+        if miss:
+            preds = model.predict(pd.DataFrame(uniq[miss], columns=FEATURES)).tolist()
+            for i, p in zip(miss, preds):
+                cached[i] = p
+
+        with self._lock:
+            for i in miss:
+                self._lru[keys[i]] = cached[i]
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+            self.hits += len(uniq) - len(miss)
+            self.misses += len(miss)
+            self.rows += len(X)
+        return np.asarray(cached)[inverse.reshape(-1)]
+
+    def stats(self):
+        with self._lock:  # one consistent snapshot while handler threads predict
+            rows, hits, misses, entries = self.rows, self.hits, self.misses, len(self._lru)
+        lookups = hits + misses
+        return {
+            "rows": rows,
+            "unique_rows": lookups,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+def stats_delta(before, after):
+    """What the counters of one cache grew by between two stats() snapshots."""
+    delta = {k: after[k] - before[k] for k in COUNTERS}
+    delta["entries"] = after["entries"]
+    return delta
+
+
+def merge_stats(deltas):
+    """
+    Sum stats_delta() results from the caches of several worker processes.
+    Each delta carries its "worker"; entries counts the last size of each
+    worker's cache.
+    """
+    total = {k: sum(d[k] for d in deltas) for k in COUNTERS}
+    entries = {d.get("worker"): d["entries"] for d in deltas}
+    lookups = total["hits"] + total["misses"]
+    total["hit_rate"] = total["hits"] / lookups if lookups else 0.0
+    total["entries"] = sum(entries.values())
+    total["workers"] = len(entries)
+    return total
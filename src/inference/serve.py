@@ -0,0 +1,182 @@
+"""
+Long-lived HTTP scoring server compatible with SageMaker hosting.
+
+GET  /ping         -> 200 once the model is loaded
+POST /invocations  -> text/csv (one row per line, no header) or
+                      application/json ({"instances": [[...], ...]},
+                      a bare list of rows, or a list of {feature: value})
+
+Responses are application/json ({"predictions": [...]}) unless the
+client asks for text/csv via the Accept header.
+
+With max_batch_size > 1, requests from all handler threads go through a
+MicroBatcher; with cache_size > 0, predictions go through a PredictionCache.
+GET /stats reports the counters of whichever of the two is enabled.
+"""
+import os
+import io
+import json
+import socket
+import asyncio
+import argparse
+import threading
+import concurrent.futures
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+from src.schema import FEATURES
+from src.inference.inference import make_cache
+from src.inference.model_store import resolve_model_path, load_model
+from src.inference.batcher import MicroBatcher
+
+PREDICT_TIMEOUT = 30.0  # seconds a handler waits for its micro-batch
+
+
+def parse_payload(body, content_type):
+    """Parse a request body straight into a 2-D float32 array of len(FEATURES) columns."""
+    content_type = (content_type or "text/csv").split(";")[0].strip().lower()
+    if not body.strip():
+        raise ValueError("Empty request body")
+    if content_type == "text/csv":
+        X = np.loadtxt(io.StringIO(body.decode("utf-8")), delimiter=",",
+                       dtype=np.float32, ndmin=2)
+    elif content_type == "application/json":
+        data = json.loads(body)
+        if isinstance(data, dict):
+            data = data.get("instances", data.get("inputs"))
+        if data and isinstance(data[0], dict):
+            data = [[row[f] for f in FEATURES] for row in data]
+        X = np.asarray(data, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)  # a single bare row
+    else:
+        raise ValueError(f"Unsupported content type: {content_type}")
+    if X.ndim != 2 or X.shape[1] != len(FEATURES) or not len(X):
+        raise ValueError(f"Expected rows of {len(FEATURES)} features, got shape {X.shape}")
+    return X
+
+
+def format_predictions(preds, accept):
+    if (accept or "").split(";")[0].strip().lower() == "text/csv":
+        return "\n".join(str(p) for p in preds.tolist()).encode(), "text/csv"
+    return json.dumps({"predictions": preds.tolist()}).encode(), "application/json"
+
+
+def start_batcher(predict_fn, max_batch_size, max_wait_ms, timeout=PREDICT_TIMEOUT):
+    """
+    Run a MicroBatcher on its own event loop thread; return a blocking
+    predict that raises concurrent.futures.TimeoutError after `timeout` seconds.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    batcher = MicroBatcher(predict_fn, max_batch_size, max_wait_ms)
+    asyncio.run_coroutine_threadsafe(batcher.start(), loop).result()
+
+    def predict(X):
+        fut = asyncio.run_coroutine_threadsafe(batcher.predict(X), loop)
+        try:
+            return fut.result(timeout)
+        except concurrent.futures.TimeoutError:  # not the builtin before Python 3.11
+            fut.cancel()
+            raise
+    return predict, batcher
+
+
+class ScoringServer(ThreadingHTTPServer):
+    # the default listen backlog of 5 resets new connections under concurrent load
+    request_queue_size = socket.SOMAXCONN
+
+
+def make_handler(predict, stats=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive for repeated clients
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def _send(self, status, body=b"", content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/ping":
+                self._send(200)
+            elif self.path == "/stats" and stats is not None:
+                self._send(200, json.dumps(stats()).encode())
+            else:
+                self._send(404)
+
+        def do_POST(self):
+            if self.path != "/invocations":
+                self._send(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError as e:
+                self.close_connection = True  # the body can't be skipped without its length
+                self._send(400, json.dumps({"error": f"Bad Content-Length: {e}"}).encode())
+                return
+            body = self.rfile.read(length)
+            try:
+                X = parse_payload(body, self.headers.get("Content-Type"))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(400, json.dumps({"error": str(e)}).encode())
+                return
+            try:
+                preds = predict(X)
+            except Exception as e:
+                self._send(500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode())
+                return
+            out, content_type = format_predictions(preds, self.headers.get("Accept"))
+            self._send(200, out, content_type)
+
+        def log_message(self, *args):
+            pass  # one access-log line per request dominates latency at low ms
+
+    return Handler
+
+
+def serve(model_dir, model_filename="model.joblib", host="0.0.0.0", port=8080,
+          max_batch_size=0, max_wait_ms=2.0, cache_size=0):
+    model_path = resolve_model_path(model_dir, model_filename)
+    model = load_model(model_path)
+    cache = make_cache(model_path, cache_size)
+    counters = {}
+
+    def predict(X):
+        return cache.predict(model, X) if cache is not None else model.predict(X)
+
+    def stats():
+        return {name: fn() for name, fn in counters.items()}
+
+    if cache is not None:
+        counters["prediction_cache"] = cache.stats
+    if max_batch_size > 1:
+        predict, batcher = start_batcher(predict, max_batch_size, max_wait_ms)
+        counters["batcher"] = batcher.stats
+    handler = make_handler(predict, stats if counters else None)
+    server = ScoringServer((host, port), handler)
+    print(f"Serving {model_dir}/{model_filename} on {host}:{port} (max_batch_size={max_batch_size})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--model-dir", default="/opt/ml/model")
+    p.add_argument("--model-filename", default="model.joblib")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=int(os.getenv("SAGEMAKER_BIND_TO_PORT", 8080)))
+    p.add_argument("--max-batch-size", type=int, default=0,
+                   help="Micro-batch concurrent requests up to this many rows (0 = off)")
+    p.add_argument("--max-wait-ms", type=float, default=2.0)
+    p.add_argument("--prediction-cache-size", type=int, default=0)
+    a = p.parse_args()
+    serve(a.model_dir, a.model_filename, a.host, a.port, a.max_batch_size, a.max_wait_ms,
+          a.prediction_cache_size)
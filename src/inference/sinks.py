@@ -0,0 +1,343 @@
+"""
+Pipelined bulk loading of scored predictions into a warehouse table.
+
+    with open_sink("sqlite:///scores.db", "INFERENCE_SCORES", workers=2) as sink:
+        for chunk in iter_batches(...):
+            sink.put(score(model, chunk))
+
+put() hands a chunk to a bounded queue and returns at once; it only blocks
+when `queue_size` chunks are already waiting, so scoring runs at most that
+far ahead of the upload. `workers` loader threads merge queued chunks into
+batches of about `batch_rows` rows (or whatever has waited `max_wait`
+seconds), encode each batch as a compressed Parquet buffer and bulk-load it
+over a connection taken from a pool, so connections are opened once per
+worker rather than once per batch. A failed load is retried with
+exponential backoff on a fresh connection; once a batch has failed
+`retries` times the error is raised from the next put() or from close().
+
+Backends, by URL:
+    sqlite:///path/to.db       local stand-in (stdlib sqlite3)
+    duckdb:///path/to.duckdb   local stand-in (needs the duckdb package)
+    snowflake://               PUT + COPY INTO through snowflake-connector-python;
+                               connection arguments are passed as keywords
+"""
+import os
+import time
+import queue
+import random
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+QUEUE_SIZE = 8
+BATCH_ROWS = 100_000
+WORKERS = 2
+RETRIES = 3
+MAX_WAIT = 5.0
+COMPRESSION = "zstd"
+
+_STOP = object()
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def encode_batch(df, compression=COMPRESSION):
+    """`df` as an in-memory compressed Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    buf = pa.BufferOutputStream()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buf, compression=compression)
+    return buf.getvalue().to_pybytes()
+
+
+def decode_batch(data):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    return pq.read_table(pa.BufferReader(data))
+
+
+class SQLiteBackend:
+    TYPES = {"int": "INTEGER", "uint": "INTEGER", "float": "REAL", "double": "REAL", "bool": "INTEGER"}
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def create_table(self, conn, table, schema):
+        cols = ", ".join(f"{quote(f.name)} {self._type(f.type)}" for f in schema)
+        with conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(table)} ({cols})")
+
+    def _type(self, arrow_type):
+        name = str(arrow_type)
+        return next((t for prefix, t in self.TYPES.items() if name.startswith(prefix)), "TEXT")
+
+    def load(self, conn, table, data):
+        import pyarrow as pa
+
+        batch = decode_batch(data)
+        for i, field in enumerate(batch.schema):
+            if pa.types.is_timestamp(field.type):  # sqlite has no timestamp type; store ISO text
+                batch = batch.set_column(i, field.name, batch.column(i).cast(pa.string()))
+        df = batch.to_pandas()
+        marks = ", ".join("?" * len(df.columns))
+        with conn:
+            conn.executemany(f"INSERT INTO {quote(table)} VALUES ({marks})",
+                             df.itertuples(index=False, name=None))
+
+    def count(self, conn, table):
+        return conn.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+
+
+class DuckDBBackend:
+    def __init__(self, path):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("the duckdb sink needs `pip install duckdb`") from e
+        self._db = duckdb.connect(path)
+
+    def connect(self):
+        return self._db.cursor()  # one cursor per loader thread
+
+    def create_table(self, conn, table, schema):
+        conn.register("_batch", schema.empty_table())
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {quote(table)} AS SELECT * FROM _batch")
+        conn.unregister("_batch")
+
+    def load(self, conn, table, data):
+        conn.register("_batch", decode_batch(data))
+        conn.execute(f"INSERT INTO {quote(table)} SELECT * FROM _batch")
+        conn.unregister("_batch")
+
+    def count(self, conn, table):
+        return conn.execute(f"SELECT COUNT(*) FROM {quote(table)}").fetchone()[0]
+
+
+class SnowflakeBackend:
+    """Each batch is PUT to the table stage as a Parquet file and loaded with COPY INTO."""
+    TYPES = {"int": "NUMBER", "uint": "NUMBER", "float": "DOUBLE", "double": "DOUBLE",
+             "bool": "BOOLEAN", "timestamp": "TIMESTAMP_TZ"}
+
+    def __init__(self, **connect_kwargs):
+        self.connect_kwargs = connect_kwargs
+
+    def connect(self):
+        from snowflake.connector import connect
+
+        return connect(**self.connect_kwargs)
+
+    def create_table(self, conn, table, schema):
+        cols = ", ".join(f"{quote(f.name)} {self._type(f.type)}" for f in schema)
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE TABLE IF NOT EXISTS {table} ({cols})")
+
+    def _type(self, arrow_type):
+        name = str(arrow_type)
+        return next((t for prefix, t in self.TYPES.items() if name.startswith(prefix)), "STRING")
+
+    @staticmethod
+    def _stage(table):
+        *qualifier, name = table.split(".")
+        return "@" + ".".join(qualifier + ["%" + name])
+
+    def load(self, conn, table, data):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"batch-{threading.get_ident()}-{time.monotonic_ns()}.parquet")
+            with open(path, "wb") as f:
+                f.write(data)
+            stage = self._stage(table)
+            with conn.cursor() as cur:
+                cur.execute(f"PUT 'file://{path}' {stage} AUTO_COMPRESS=FALSE OVERWRITE=TRUE")
+                cur.execute(f"COPY INTO {table} FROM {stage} FILES=('{os.path.basename(path)}') "
+                            "FILE_FORMAT=(TYPE=PARQUET) MATCH_BY_COLUMN_NAME=CASE_INSENSITIVE PURGE=TRUE")
+
+    def count(self, conn, table):
+        with conn.cursor() as cur:
+            return cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def make_backend(url, **kwargs):
+    scheme, _, rest = url.partition("://")
+    path = rest[1:] if rest.startswith("/") else rest
+    if scheme == "sqlite":
+        return SQLiteBackend(path)
+    if scheme == "duckdb":
+        return DuckDBBackend(path)
+    if scheme == "snowflake":
+        return SnowflakeBackend(**kwargs)
+    raise ValueError(f"Unknown sink {url!r}; expected sqlite:///, duckdb:/// or snowflake://")
+
+
+class ConnectionPool:
+    """Connections are reused across batches; one that raised is closed instead of returned."""
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self.opened = 0
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+            self.opened += 1
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class BulkSink:
+    def __init__(self, backend, table, workers=WORKERS, queue_size=QUEUE_SIZE, batch_rows=BATCH_ROWS,
+                 retries=RETRIES, max_wait=MAX_WAIT, compression=COMPRESSION, backoff=0.5, sleep=time.sleep):
+        self.backend = backend
+        self.table = table
+        self.batch_rows = batch_rows
+        self.retries = retries
+        self.max_wait = max_wait
+        self.compression = compression
+        self.backoff = backoff
+        self.sleep = sleep
+        self.pool = ConnectionPool(backend.connect)
+        self._queue = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._created = False
+        self._error = None
+        self._closed = False
+        self._start = time.perf_counter()
+        self.stats = {"rows": 0, "batches": 0, "bytes": 0, "retries": 0, "put_wait_seconds": 0.0,
+                      "load_seconds": 0.0, "max_batch_latency": 0.0}
+        self._threads = [threading.Thread(target=self._run, name=f"sink-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def put(self, df):
+        """Queue a chunk for loading; blocks while the queue is full."""
+        if self._error is not None:
+            raise self._error
+        if len(df):
+            start = time.perf_counter()
+            self._queue.put((start, df))
+            self._add(put_wait_seconds=time.perf_counter() - start)
+
+    def _add(self, **values):
+        with self._lock:
+            for k, v in values.items():
+                self.stats[k] += v
+
+    def _run(self):
+        chunks, rows, first = [], 0, None
+        while True:
+            timeout = None if first is None else max(0.0, first + self.max_wait - time.perf_counter())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # oldest queued chunk has waited max_wait
+            if item is not None and item is not _STOP:
+                queued_at, df = item
+                first = queued_at if first is None else first
+                chunks.append(df)
+                rows += len(df)
+            if chunks and (item is None or item is _STOP or rows >= self.batch_rows):
+                self._flush(chunks, first)
+                chunks, rows, first = [], 0, None
+            if item is _STOP:
+                return
+
+    def _flush(self, chunks, queued_at):
+        if self._error is not None:
+            return  # keep draining so put() never blocks on a dead sink
+        df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+        try:
+            data = encode_batch(df, self.compression)
+            self._load(data)
+        except Exception as e:
+            self._error = e
+            return
+        self._add(rows=len(df), batches=1, bytes=len(data))
+        latency = time.perf_counter() - queued_at
+        with self._lock:
+            self.stats["max_batch_latency"] = max(self.stats["max_batch_latency"], latency)
+
+    def _load(self, data):
+        for attempt in range(self.retries + 1):
+            try:
+                with self.pool.connection() as conn:
+                    self._ensure_table(conn, data)
+                    start = time.perf_counter()
+                    self.backend.load(conn, self.table, data)
+                    self._add(load_seconds=time.perf_counter() - start)
+                    return
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                delay = random.uniform(delay / 2, delay)
+                self._add(retries=1)
+                print(f"[sink] load failed ({e!r}); retry {attempt + 1}/{self.retries} in {delay:.1f}s")
+                self.sleep(delay)
+
+    def _ensure_table(self, conn, data):
+        with self._lock:
+            if not self._created:
+                self.backend.create_table(conn, self.table, decode_batch(data).schema)
+                self._created = True
+
+    def close(self):
+        """Load everything still queued, stop the workers and raise the first load error, if any."""
+        if not self._closed:
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(_STOP)
+            for t in self._threads:
+                t.join()
+            self.pool.close()
+            self.stats["seconds"] = time.perf_counter() - self._start
+            self.stats["connections"] = self.pool.opened
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            # the step already failed; stop the workers without masking its error
+            try:
+                self.close()
+            except Exception:
+                pass
+
+
+def open_sink(url, table, workers=WORKERS, queue_size=QUEUE_SIZE, batch_rows=BATCH_ROWS,
+              retries=RETRIES, max_wait=MAX_WAIT, compression=COMPRESSION, **connect_kwargs):
+    """A BulkSink writing to `table` of the backend named by `url` (see the module docstring)."""
+    return BulkSink(make_backend(url, **connect_kwargs), table, workers, queue_size, batch_rows,
+                    retries, max_wait, compression)
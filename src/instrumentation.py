@@ -0,0 +1,134 @@
+"""
+Per-stage timing for the preprocess, train and infer steps.
+
+    metrics = StepMetrics("infer")
+    with metrics.stage("load"):
+        model = ...
+    for chunk in metrics.timed_iter("parse", iter_batches(...)):
+        with metrics.stage("predict", rows=len(chunk)):
+            ...
+    metrics.write(output_dir)          # -> <output_dir>/infer_metrics.json
+
+Each stage accumulates wall seconds, calls and rows (so rows/sec), and the
+file also records total seconds and peak RSS (this process and any worker
+processes it waited for). Stage totals from worker processes are merged
+with merge(). With STEP_METRICS=0 every call returns immediately and
+write() does nothing. With STEP_METRICS_MLFLOW=1 the numbers are also
+logged as MLflow metrics; the train step always logs them to its run.
+"""
+import os
+import json
+import time
+import resource
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.getenv("STEP_METRICS", "1") != "0"
+MIRROR_MLFLOW = os.getenv("STEP_METRICS_MLFLOW", "0") == "1"
+
+_NULL = nullcontext()
+
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024  # KiB on Linux
+
+
+class StepMetrics:
+    def __init__(self, step, enabled=None):
+        self.step = step
+        self.enabled = ENABLED if enabled is None else enabled
+        self.stages = {}
+        self.extra = {}
+        self._start = time.perf_counter()
+
+    def _add(self, name, seconds, rows=0, calls=1):
+        s = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0, "rows": 0})
+        s["seconds"] += seconds
+        s["calls"] += calls
+        s["rows"] += rows
+
+    def stage(self, name, rows=0):
+        """Context manager timing one stage; `rows` counts towards its rows/sec."""
+        if not self.enabled:
+            return _NULL
+        return self._timed(name, rows)
+
+    @contextmanager
+    def _timed(self, name, rows):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start, rows)
+
+    def timed_iter(self, name, iterable):
+        """Yield from `iterable`, charging the time spent producing each item (and its rows) to `name`."""
+        if not self.enabled:
+            yield from iterable
+            return
+        it = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self._add(name, time.perf_counter() - start, calls=0)
+                return
+            self._add(name, time.perf_counter() - start, len(item) if hasattr(item, "__len__") else 0)
+            yield item
+
+    def set(self, **values):
+        """Extra fields for the metrics file, e.g. row counts."""
+        if self.enabled:
+            self.extra.update(values)
+
+    def merge(self, stages):
+        """Add stage totals collected elsewhere, e.g. by worker processes (to_dict()["stages"])."""
+        if self.enabled:
+            for name, s in stages.items():
+                self._add(name, s["seconds"], s["rows"], s["calls"])
+
+    def to_dict(self):
+        return {
+            "step": self.step,
+            "total_seconds": time.perf_counter() - self._start,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {name: dict(s, rows_per_sec=s["rows"] / s["seconds"] if s["rows"] and s["seconds"] else None)
+                       for name, s in self.stages.items()},
+            **self.extra,
+        }
+
+    def mlflow_metrics(self, doc=None):
+        doc = doc or self.to_dict()
+        out = {"total_seconds": doc["total_seconds"], "peak_rss_mb": doc["peak_rss_mb"]}
+        for name, s in doc["stages"].items():
+            out[f"{name}_seconds"] = s["seconds"]
+            if s["rows_per_sec"]:
+                out[f"{name}_rows_per_sec"] = s["rows_per_sec"]
+        return {f"{self.step}_{k}": v for k, v in out.items()}
+
+    def write(self, output_dir, tracker=None):
+        """
+        Write <output_dir>/<step>_metrics.json and return its content. The
+        numbers also go to `tracker` (an AsyncRunLogger) if given, or to a
+        new MLflow run if STEP_METRICS_MLFLOW=1.
+        """
+        if not self.enabled:
+            return None
+        doc = self.to_dict()
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"{self.step}_metrics.json")
+        with open(path, "w") as f:
+            json.dump(doc, f, indent=2)
+
+        if tracker is not None:
+            tracker.log_metrics(self.mlflow_metrics(doc))
+        elif MIRROR_MLFLOW:
+            import mlflow
+
+            with mlflow.start_run(run_name=f"{self.step}-metrics"):
+                mlflow.log_metrics(self.mlflow_metrics(doc))
+        print(f"[metrics] {self.step}: " + ", ".join(
+            f"{name} {s['seconds']:.3f}s" for name, s in doc["stages"].items()) + f" -> {path}")
+        return doc
@@ -1,18 +1,83 @@
 import os
+import sys
 import argparse
-from src.preprocessing.preprocessing import run_preprocessing
-from src.model_training.sagemaker_train import model_train
-from src.inference.inference import main as run_inference 
+from src.step_cache import StepCache
+
+
+def load_step(step):
+    """
+    Import only the entry point of `step`, so e.g. STEP=infer never pays for
+    mlflow or the training stack (see benchmarks/startup.py).
+    """
+    if step == "preprocess":
+        from src.preprocessing.preprocessing import run_preprocessing
+        return run_preprocessing
+    if step == "train":
+        from src.model_training.sagemaker_train import model_train
+        return model_train
+    if step == "infer":
+        from src.inference.inference import main as run_inference
+        return run_inference
+    if step == "serve":
+        from src.inference.serve import serve
+        return serve
+    if step == "drift":
+        from src.monitoring.drift import drift
+        return drift
+    raise ValueError(f"Unknown STEP={step}. Use preprocess | train | infer | serve | drift.")
+
+
+def run_step(step, args, inputs, outputs, fn, paths=()):
+    """
+    Run `fn` through the step cache, keyed on the content of `inputs` and on
+    every argument except the directories in `paths` (content is hashed instead).
+    """
+    if args.no_cache:
+        print(f"[cache] disabled for step={step}")
+        return fn()
+    params = {k: v for k, v in vars(args).items() if k != "no_cache" and k not in paths}
+    return StepCache().run(step, params, inputs, outputs, fn)
+
+
+def model_input(model_dir, model_filename):
+    """
+    The file a model dir's content is read from: the model file itself, or
+    model.tar.gz when only the archive is there (see resolve_model_path).
+    """
+    path = os.path.join(model_dir, model_filename)
+    tar_path = os.path.join(model_dir, "model.tar.gz")
+    return path if os.path.exists(path) or not os.path.exists(tar_path) else tar_path
 
 
 def main():
-    step = os.getenv("STEP", "train").lower()
+    # SageMaker hosting starts the container as `<entrypoint> serve`
+    default_step = "serve" if sys.argv[1:2] == ["serve"] else "train"
+    step = os.getenv("STEP", default_step).lower()
 
     if step == "preprocess":
         # SageMaker Processing writes outputs here
         out_dir = os.getenv("OUTPUT_DIR", "/opt/ml/processing/output")
-        print(f"STEP=preprocess → output_dir={out_dir}")
-        run_preprocessing(out_dir)
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--output-filename", type=str, default="processed.csv")
+        parser.add_argument("--partition-rows", type=int, default=0)
+        parser.add_argument("--input-dir", type=str, default=os.getenv("INPUT_DIR"))
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--chunk-rows", type=int, default=250_000)
+        parser.add_argument("--repair", action="store_true")
+        parser.add_argument("--feature-store", action="store_true")
+        parser.add_argument("--no-cache", action="store_true")
+        args, _ = parser.parse_known_args()
+
+        run_preprocessing = load_step(step)
+        print(f"STEP=preprocess → input_dir={args.input_dir or '<bundled iris>'} output_dir={out_dir}")
+        run_step("preprocess", args, [args.input_dir] if args.input_dir else [],
+                 [os.path.join(out_dir, args.output_filename)]
+                 + ([os.path.join(out_dir, "features.f32")] if args.feature_store else []),
+                 lambda: run_preprocessing(out_dir, args.output_filename, args.partition_rows,
+                                           input_dir=args.input_dir, workers=args.workers,
+                                           chunk_rows=args.chunk_rows, repair=args.repair,
+                                           feature_store=args.feature_store),
+                 paths=("input_dir",))
 
     elif step == "train":
       
@@ -21,10 +86,40 @@ def main():
                             default="/opt/ml/input/data/train")
         parser.add_argument("--model-path", type=str, default="/opt/ml/model")
         parser.add_argument("--n-estimators", type=int, default=20)
+        parser.add_argument("--input-filename", type=str, default="processed.csv")
+        parser.add_argument("--search", action="store_true")
+        parser.add_argument("--search-space", type=str, default=None)
+        parser.add_argument("--search-workers", type=int, default=None)
+        parser.add_argument("--cv-folds", type=int, default=3)
+        parser.add_argument("--eta", type=int, default=3)
+        parser.add_argument("--out-of-core", action="store_true")
+        parser.add_argument("--chunk-rows", type=int, default=250_000)
+        parser.add_argument("--memory", choices=["quantile", "external"], default="quantile")
+        parser.add_argument("--warm-start", type=str, default=os.getenv("WARM_START"))
+        parser.add_argument("--warm-rounds", type=int, default=10)
+        parser.add_argument("--max-degradation", type=float, default=0.01)
+        parser.add_argument("--workers", type=int, default=int(os.getenv("TRAIN_WORKERS", "1")))
+        parser.add_argument("--no-cache", action="store_true")
         args, _unknown = parser.parse_known_args()
+        if args.eta < 2:
+            parser.error(f"--eta must be at least 2, got {args.eta}")
 
+        model_train = load_step(step)
         print(f"STEP=train → input={args.input_path} model_dir={args.model_path}")
-        model_train(args.input_path, args.model_path, n_estimators=args.n_estimators)
+        inputs = [os.path.join(args.input_path, args.input_filename)]
+        if args.search_space and os.path.isfile(args.search_space):
+            inputs.append(args.search_space)
+        if args.warm_start:
+            inputs.append(args.warm_start)
+        run_step("train", args, inputs, [args.model_path],
+                 lambda: model_train(args.input_path, args.model_path, n_estimators=args.n_estimators,
+                                     input_filename=args.input_filename, search=args.search,
+                                     search_space=args.search_space, search_workers=args.search_workers,
+                                     cv_folds=args.cv_folds, eta=args.eta, out_of_core=args.out_of_core,
+                                     chunk_rows=args.chunk_rows, memory=args.memory,
+                                     warm_start_from=args.warm_start, warm_rounds=args.warm_rounds,
+                                     max_degradation=args.max_degradation, workers=args.workers),
+                 paths=("input_path", "model_path", "warm_start"))
 
     elif step == "infer":
         
@@ -34,14 +129,62 @@ def main():
         parser.add_argument("--model-dir", type=str, default="/opt/ml/processing/model")
         parser.add_argument("--model-filename", type=str, default="model.joblib")
         parser.add_argument("--output-dir", type=str, default="/opt/ml/processing/output")
+        parser.add_argument("--output-filename", type=str, default="predictions.csv")
+        parser.add_argument("--chunk-rows", type=int, default=0)
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--part-files", action="store_true")
+        parser.add_argument("--predictor", choices=["xgboost", "numpy"], default="xgboost")
+        parser.add_argument("--prediction-cache-size", type=int, default=0)
+        parser.add_argument("--models", nargs="+", default=None)
+        parser.add_argument("--mlruns-dir", type=str, default=None)
+        parser.add_argument("--no-cache", action="store_true")
         args, _ = parser.parse_known_args()
 
+        run_inference = load_step(step)
         print(f"STEP=infer → input={args.input_dir}/{args.input_filename}, "
               f"model={args.model_dir}/{args.model_filename}, output={args.output_dir}")
-        run_inference(args)
+        run_step("infer", args,
+                 [os.path.join(args.input_dir, args.input_filename),
+                  model_input(args.model_dir, args.model_filename)]
+                 + [m.rpartition("=")[2] for m in args.models or []]
+                 + ([args.mlruns_dir] if args.mlruns_dir else []),
+                 [args.output_dir], lambda: run_inference(args),
+                 paths=("input_dir", "model_dir", "output_dir", "models", "mlruns_dir"))
+
+    elif step == "serve":
+
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--model-dir", type=str, default="/opt/ml/model")
+        parser.add_argument("--model-filename", type=str, default="model.joblib")
+        parser.add_argument("--port", type=int, default=int(os.getenv("SAGEMAKER_BIND_TO_PORT", 8080)))
+        parser.add_argument("--max-batch-size", type=int, default=0)
+        parser.add_argument("--max-wait-ms", type=float, default=2.0)
+        parser.add_argument("--prediction-cache-size", type=int, default=0)
+        args, _ = parser.parse_known_args()
+
+        serve = load_step(step)
+        print(f"STEP=serve → model={args.model_dir}/{args.model_filename} port={args.port}")
+        serve(args.model_dir, args.model_filename, port=args.port,
+              max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms,
+              cache_size=args.prediction_cache_size)
+
+    elif step == "drift":
+
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--ref-dir", type=str, default="/opt/ml/processing/reference")
+        parser.add_argument("--ref-filename", type=str, default="processed.csv")
+        parser.add_argument("--curr-dir", type=str, default="/opt/ml/processing/current")
+        parser.add_argument("--curr-filename", type=str, default="predictions.csv")
+        parser.add_argument("--output-dir", type=str, default="/opt/ml/processing/output")
+        args, _ = parser.parse_known_args()
+
+        drift = load_step(step)
+        print(f"STEP=drift → reference={args.ref_dir}/{args.ref_filename}, "
+              f"current={args.curr_dir}/{args.curr_filename}, output={args.output_dir}")
+        drift(args.ref_dir, args.ref_filename, args.curr_dir, args.curr_filename, args.output_dir)
 
     else:
-        raise ValueError(f"Unknown STEP={step}. Use preprocess | train | infer.")
+        load_step(step)  # raises for an unknown step
 
 
 if __name__ == "__main__":
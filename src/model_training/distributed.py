@@ -0,0 +1,145 @@
+"""
+Data-parallel XGBoost training across local worker processes.
+
+A RabitTracker is started in this process and `workers` processes join it
+through xgboost.collective. The input is cut into dataio.row_ranges of
+about `chunk_rows` rows (CSV byte ranges found by a newline scan, Parquet
+row groups, Arrow / .f32 row slices), dealt round robin to the workers; a
+worker reads and parses only its own ranges. There are never more workers
+than ranges. Each worker builds a DMatrix of its train rows. xgboost.train
+with the hist tree method then allreduces the gradient histograms, so every
+worker ends up with the same booster, trained on the union of the shards.
+
+The train/holdout split is the per-part row hash of out_of_core.iter_split
+(and incremental.py), applied to each range at its row offset within its
+part, in the same pass that reads it.
+The label count and the holdout accuracy are allreduced as well. Rank 0
+hands back the booster, which is wrapped exactly like an
+XGBClassifier.fit() result, so model.joblib / model.ubj are unchanged. The
+per-worker reference profiles are merged into one.
+"""
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xgboost
+from xgboost import XGBClassifier, collective
+
+from src.schema import FEATURES, TARGET
+from src.dataio import row_ranges, read_range
+from src.monitoring.sketches import DatasetProfile
+from src.model_training.out_of_core import holdout_mask, booster_params, as_classifier, CHUNK_ROWS
+from src.instrumentation import StepMetrics
+
+TEST_SIZE = 0.2
+SAMPLE_ROWS = 100
+
+
+def shard_chunks(ranges, rank, workers, test_size=TEST_SIZE):
+    """Yield (chunk, train rows, holdout rows) for each of worker `rank`'s share of `ranges`."""
+    for rows in ranges[rank::workers]:
+        chunk = read_range(rows, FEATURES + [TARGET])
+        mask = holdout_mask(rows.row_offset, len(chunk), test_size)
+        yield chunk, chunk[~mask], chunk[mask]
+
+
+def _empty():
+    return pd.DataFrame({**{c: pd.Series(dtype=np.float64) for c in FEATURES},
+                         TARGET: pd.Series(dtype=np.int64)})
+
+
+def _allreduce(values, op):
+    return collective.allreduce(np.asarray(values, dtype=np.float64), op)
+
+
+def _train_worker(envs, ranges, params, test_size, nthread):
+    """Runs in each worker process; rank 0 returns the booster."""
+    with collective.CommunicatorContext(**envs):
+        rank, workers = collective.get_rank(), collective.get_world_size()
+        start = time.perf_counter()
+        profile = DatasetProfile(FEATURES, TARGET)
+        trains, holdouts = [], []
+        for chunk, train, holdout in shard_chunks(ranges, rank, workers, test_size):
+            profile.update(chunk)
+            trains.append(train)
+            holdouts.append(holdout)
+        train = pd.concat(trains, ignore_index=True) if trains else _empty()
+        holdout = pd.concat(holdouts, ignore_index=True) if holdouts else _empty()
+        parse_seconds = time.perf_counter() - start
+
+        # every worker must agree on the number of classes before boosting
+        n_classes = int(_allreduce([train[TARGET].max() if len(train) else 0], collective.Op.MAX)[0]) + 1
+        model = XGBClassifier(**params, tree_method="hist", n_jobs=nthread)
+        xgb_params = booster_params(model, n_classes)
+        dtrain = xgboost.DMatrix(train[FEATURES], label=train[TARGET], nthread=nthread)
+        start = time.perf_counter()
+        booster = xgboost.train(xgb_params, dtrain, num_boost_round=model.get_num_boosting_rounds())
+        fit_seconds = time.perf_counter() - start
+
+        correct = 0
+        if len(holdout):
+            proba = booster.predict(xgboost.DMatrix(holdout[FEATURES], nthread=nthread))
+            pred = proba.argmax(axis=1) if proba.ndim > 1 else (proba > 0.5).astype(int)
+            correct = int((pred == holdout[TARGET].to_numpy()).sum())
+        correct, total = _allreduce([correct, len(holdout)], collective.Op.SUM)
+
+        return {
+            "rank": rank,
+            "rows": len(train),
+            "parse_seconds": parse_seconds,
+            "fit_seconds": fit_seconds,
+            "profile": profile.to_dict(),
+            "accuracy": correct / max(total, 1),
+            "n_classes": n_classes,
+            "objective": xgb_params["objective"],
+            "booster": bytes(booster.save_raw()) if rank == 0 else None,
+            "sample": train[FEATURES].head(SAMPLE_ROWS) if rank == 0 else None,
+        }
+
+
+def train_distributed(path, params, workers, chunk_rows=CHUNK_ROWS, test_size=TEST_SIZE, metrics=None):
+    """
+    Train on `path` across `workers` local processes; returns (model,
+    holdout accuracy, reference profile, sample input rows), like
+    train_out_of_core.
+    """
+    metrics = metrics or StepMetrics("train", enabled=False)
+    ranges = row_ranges(path, chunk_rows)
+    if not ranges:
+        raise ValueError(f"No training rows in {path}")
+    if workers > len(ranges):
+        print(f"[distributed] {path} has {len(ranges)} range(s) of up to {chunk_rows} rows; "
+              f"using {len(ranges)} worker(s) instead of {workers}")
+        workers = len(ranges)
+    tracker = xgboost.RabitTracker(host_ip="127.0.0.1", n_workers=workers)
+    tracker.start(workers)
+    waiter = threading.Thread(target=tracker.join, daemon=True)
+    waiter.start()
+    envs = tracker.worker_envs()
+    nthread = max(1, (os.cpu_count() or 1) // workers)
+
+    # spawn: the workers must not inherit this process's xgboost/OpenMP state
+    ctx = multiprocessing.get_context("spawn")
+    with metrics.stage("fit"), ProcessPoolExecutor(workers, mp_context=ctx) as pool:
+        futures = [pool.submit(_train_worker, envs, ranges, params, test_size, nthread)
+                   for _ in range(workers)]
+        results = sorted((f.result() for f in futures), key=lambda r: r["rank"])
+    waiter.join(timeout=10)
+
+    head = results[0]
+    booster = xgboost.Booster(model_file=bytearray(head["booster"]))
+    model = as_classifier(XGBClassifier(**params, tree_method="hist"), booster, head["n_classes"],
+                          head["objective"])
+    profile = DatasetProfile.from_dict(head["profile"])
+    for r in results[1:]:
+        profile.merge(DatasetProfile.from_dict(r["profile"]))
+    rows = sum(r["rows"] for r in results)
+    print(f"[distributed] workers={workers} train_rows={rows} "
+          f"rows/worker={[r['rows'] for r in results]} "
+          f"fit={max(r['fit_seconds'] for r in results):.2f}s parse={max(r['parse_seconds'] for r in results):.2f}s")
+    metrics.set(train_rows=rows, workers=workers)
+    return model, head["accuracy"], profile, head["sample"]
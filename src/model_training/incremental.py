@@ -0,0 +1,189 @@
+"""
+Warm-start retraining: keep boosting the previous model on the new data only.
+
+Every model_train run writes trained_parts.json next to the model: name,
+size and SHA-256 of each data file it was trained on (the file itself, or
+every part of a partitioned preprocess output). Given the previous model's
+directory (or its model.tar.gz / a model file in it), plan() checks that
+list against the current input: every part the previous model saw must
+still be there unchanged, and the parts that are not on the list are the
+new data. A single CSV that only grew (e.g. the default unpartitioned
+processed.csv after a new raw shard) also counts: when its first `bytes`
+still hash to the recorded sha, the rows after them are the new data.
+
+warm_start() then loads the previous model.joblib (or native model.ubj) and
+adds `rounds` trees fit on the train side of the new parts only. The split
+is the per-row hash of out_of_core.holdout_mask, applied per part, so a part
+keeps the same holdout rows in every later run. Every model_train mode holds
+out these rows, so neither model was fit on them. The guard scores the
+previous and the new model on the holdout side of every part, old and new,
+in one streaming predict-only pass. model_train falls back to a full
+retrain when there is nothing to warm start from, or when accuracy drops by
+more than `max_degradation`.
+"""
+import os
+import json
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import xgboost
+from xgboost import XGBClassifier
+
+from src.schema import FEATURES, TARGET
+from src.dataio import list_parts, detect_format, CSV
+from src.inference.model_store import resolve_model_path, load_model, file_sha256
+from src.monitoring.sketches import DatasetProfile, PROFILE_FILENAME
+from src.model_training.out_of_core import iter_split, holdout_mask, booster_params, as_classifier, CHUNK_ROWS
+from src.instrumentation import StepMetrics
+
+TRAINED_PARTS_FILENAME = "trained_parts.json"
+WARM_ROUNDS = 10
+MAX_DEGRADATION = 0.01
+TEST_SIZE = 0.2
+
+# new data: a whole part (offsets 0), or the rows of a CSV from byte/row offset on
+NewRows = namedtuple("NewRows", "path byte_offset row_offset", defaults=(0, 0))
+
+
+def fingerprint(path):
+    return [{"file": os.path.basename(p), "bytes": os.path.getsize(p), "sha256": file_sha256(p)}
+            for p in list_parts(path)]
+
+
+def save_trained_parts(model_path, parts, **meta):
+    with open(os.path.join(model_path, TRAINED_PARTS_FILENAME), "w") as f:
+        json.dump({"parts": parts, **meta}, f, indent=2)
+
+
+def previous_model_file(previous):
+    """model.joblib (or model.ubj) of a model dir, model.tar.gz dir or model file."""
+    if os.path.isfile(previous):
+        return previous
+    path = resolve_model_path(previous, "model.joblib")
+    return path if os.path.exists(path) else resolve_model_path(previous, "model.ubj")
+
+
+def appended_rows(path, prefix_bytes, prefix_sha256, block_size=1 << 20):
+    """
+    Number of data rows in the first `prefix_bytes` of a CSV whose first
+    `prefix_bytes` hash to `prefix_sha256`, i.e. that only had rows appended;
+    None otherwise.
+    """
+    if detect_format(path) != CSV or os.path.getsize(path) <= prefix_bytes:
+        return None
+    h, lines, last, remaining = hashlib.sha256(), 0, b"", prefix_bytes
+    with open(path, "rb") as f:
+        while remaining:
+            block = f.read(min(block_size, remaining))
+            h.update(block)
+            lines += block.count(b"\n")
+            last, remaining = block[-1:], remaining - len(block)
+    if h.hexdigest() != prefix_sha256 or last != b"\n":
+        return None
+    return lines - 1  # the header line
+
+
+def iter_new_split(new, chunk_rows=CHUNK_ROWS, test_size=TEST_SIZE, holdout=False):
+    """iter_split() over the new rows of a NewRows, with the same per-row split as the whole file."""
+    if not new.byte_offset:
+        yield from iter_split(new.path, chunk_rows, test_size, holdout)
+        return
+    names = list(pd.read_csv(new.path, nrows=0).columns)
+    offset = new.row_offset
+    with open(new.path, "rb") as f:
+        f.seek(new.byte_offset)
+        for chunk in pd.read_csv(f, header=None, names=names, usecols=FEATURES + [TARGET],
+                                 chunksize=chunk_rows):
+            chunk = chunk[FEATURES + [TARGET]]
+            mask = holdout_mask(offset, len(chunk), test_size)
+            offset += len(chunk)
+            yield chunk, chunk[mask if holdout else ~mask]
+
+
+def plan(input_file, previous):
+    """
+    (new data as NewRows, current fingerprint, None) if the previous model
+    can be warm started on `input_file`, else (None, current fingerprint,
+    reason).
+    """
+    current = fingerprint(input_file)
+    model_file = previous_model_file(previous)
+    manifest = os.path.join(os.path.dirname(model_file), TRAINED_PARTS_FILENAME)
+    if not os.path.exists(model_file) or not os.path.exists(manifest):
+        return None, current, f"no previous model with {TRAINED_PARTS_FILENAME} in {previous}"
+    with open(manifest) as f:
+        seen = {p["file"]: p for p in json.load(f)["parts"]}
+
+    paths = {os.path.basename(p): p for p in list_parts(input_file)}
+    by_name = {p["file"]: p["sha256"] for p in current}
+    new, changed = [], []
+    for name, prev in sorted(seen.items()):
+        if by_name.get(name) == prev["sha256"]:
+            continue
+        rows = appended_rows(paths[name], prev["bytes"], prev["sha256"]) if name in paths else None
+        if rows is None:
+            changed.append(name)
+        else:
+            new.append(NewRows(paths[name], prev["bytes"], rows))
+    if changed:
+        return None, current, (f"{len(changed)} previously trained part(s) changed (not only appended to) "
+                               f"or are gone: {changed[:3]}; warm start needs new data as new parts "
+                               f"(preprocess --partition-rows) or rows appended to a CSV")
+    new += [NewRows(p) for name, p in paths.items() if name not in seen]
+    if not new:
+        return None, current, "no new data"
+    return new, current, None
+
+
+def holdout_accuracies(models, parts, chunk_rows=CHUNK_ROWS, test_size=TEST_SIZE):
+    """Accuracy of each model on the holdout rows of `parts`, streamed."""
+    correct, n = np.zeros(len(models)), 0
+    for part in parts:
+        for _, rows in iter_split(part, chunk_rows, test_size, holdout=True):
+            if len(rows):
+                n += len(rows)
+                for i, m in enumerate(models):
+                    correct[i] += int((np.asarray(m.predict(rows[FEATURES])) == rows[TARGET].to_numpy()).sum())
+    return correct / max(n, 1)
+
+
+def warm_start(previous, new_parts, all_parts, params, rounds=WARM_ROUNDS, chunk_rows=CHUNK_ROWS,
+               test_size=TEST_SIZE, metrics=None):
+    """
+    Continue the previous model with `rounds` trees on the train rows of
+    `new_parts` (NewRows, from plan()). Returns (model, holdout accuracy,
+    previous model's holdout accuracy, profile of all data, train rows).
+    """
+    metrics = metrics or StepMetrics("train", enabled=False)
+    model_file = previous_model_file(previous)
+    prev = load_model(model_file)
+    with metrics.stage("parse"):
+        frames, profile = [], DatasetProfile(FEATURES, TARGET)
+        for new in new_parts:
+            for chunk, rows in iter_new_split(new, chunk_rows, test_size):
+                profile.update(chunk)
+                frames.append(rows)
+        train = pd.concat(frames, ignore_index=True)
+    if not len(train):
+        raise ValueError(f"No training rows in the new parts {new_parts}")
+
+    n_classes = prev.n_classes_
+    model = XGBClassifier(**{**params, "n_estimators": prev.get_booster().num_boosted_rounds() + rounds})
+    xgb_params = booster_params(model, n_classes)
+    with metrics.stage("fit", rows=len(train)):
+        # xgboost.train copies xgb_model, so `prev` stays intact for the guard below
+        booster = xgboost.train(xgb_params, xgboost.DMatrix(train[FEATURES], label=train[TARGET]),
+                                num_boost_round=rounds, xgb_model=prev.get_booster())
+    as_classifier(model, booster, n_classes, xgb_params["objective"])
+
+    with metrics.stage("predict"):
+        prev_acc, acc = holdout_accuracies([prev, model], all_parts, chunk_rows, test_size)
+
+    # the new rows on top of the previous model's reference profile
+    previous_profile = os.path.join(os.path.dirname(model_file), PROFILE_FILENAME)
+    if os.path.exists(previous_profile):
+        profile = DatasetProfile.load(previous_profile).merge(profile)
+    metrics.set(train_rows=len(train))
+    return model, float(acc), float(prev_acc), profile, train
@@ -0,0 +1,157 @@
+"""
+Out-of-core XGBoost training from a chunk iterator.
+
+ChunkIter is an xgboost.DataIter over iter_batches, so a CSV file, a
+Parquet/Arrow file or a partitioned preprocess output directory is read one
+chunk at a time, however large it is. The train/holdout split is a seeded
+hash of each row's index within its part (file), so it is identical on every
+pass and the same one distributed.py and incremental.py use. The holdout
+rows are never materialised: XGBoost sees only the train rows, and accuracy
+is accumulated over the holdout rows in a separate streaming pass.
+
+memory="quantile" builds a QuantileDMatrix (only the quantised, compressed
+feature matrix is kept in RAM); memory="external" builds an external-memory
+DMatrix whose pages are cached on disk under `cache_dir`, so peak memory is
+bounded by the chunk size rather than the dataset. Both train with the hist
+tree method. The first pass also collects the label set and the reference
+DatasetProfile, so no extra read is needed for either.
+"""
+import os
+import tempfile
+
+import numpy as np
+import xgboost
+from xgboost import XGBClassifier
+
+from src.schema import FEATURES, TARGET
+from src.dataio import iter_batches, list_parts
+from src.monitoring.sketches import DatasetProfile
+from src.instrumentation import StepMetrics
+
+CHUNK_ROWS = 250_000
+MAX_BIN = 256
+
+
+def holdout_mask(offset, n, test_size, seed=42):
+    """True for rows offset..offset+n-1 that belong to the holdout (splitmix64 hash)."""
+    # the seed's offset as a Python int: a NumPy scalar product would warn about the (intended) wraparound
+    z = np.arange(offset, offset + n, dtype=np.uint64) + np.uint64(seed * 0x9E3779B97F4A7C15 % 2 ** 64)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) * 2.0 ** -53 < test_size
+
+
+def iter_split(path, chunk_rows, test_size, holdout=False):
+    """Yield (full chunk, selected rows) for the train or the holdout side of the split."""
+    for part in list_parts(path):
+        offset = 0  # per part, so adding a part never moves the split of the others
+        for chunk in iter_batches(part, chunk_rows, columns=FEATURES + [TARGET]):
+            mask = holdout_mask(offset, len(chunk), test_size)
+            offset += len(chunk)
+            yield chunk, chunk[mask if holdout else ~mask]
+
+
+class ChunkIter(xgboost.DataIter):
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, test_size=0.2, cache_prefix=None):
+        super().__init__(cache_prefix=cache_prefix)
+        self.path, self.chunk_rows, self.test_size = path, chunk_rows, test_size
+        self.profile = DatasetProfile(FEATURES, TARGET)
+        self.classes = set()
+        self.rows = 0
+        self.sample = None
+        self._passes = 0
+        self._it = None
+
+    def next(self, input_data):
+        if self._it is None:
+            self._it = iter_split(self.path, self.chunk_rows, self.test_size)
+        for chunk, train in self._it:
+            if self._passes == 0:
+                self.profile.update(chunk)
+            if not len(train):
+                continue
+            if self._passes == 0:
+                self.classes.update(np.unique(train[TARGET]).tolist())
+                self.rows += len(train)
+                if self.sample is None:
+                    self.sample = train[FEATURES].head(3).reset_index(drop=True)
+            input_data(data=train[FEATURES].astype(np.float32), label=train[TARGET].to_numpy())
+            return 1
+        return 0
+
+    def reset(self):
+        if self._it is not None:
+            self._passes += 1
+        self._it = None
+
+
+def holdout_accuracy(booster, path, chunk_rows=CHUNK_ROWS, test_size=0.2):
+    correct = total = 0
+    for _, rows in iter_split(path, chunk_rows, test_size, holdout=True):
+        if not len(rows):
+            continue
+        proba = booster.inplace_predict(rows[FEATURES].astype(np.float32))
+        pred = proba.argmax(axis=1) if proba.ndim == 2 else (proba > 0.5).astype(int)
+        correct += int((pred == rows[TARGET].to_numpy()).sum())
+        total += len(rows)
+    if not total:
+        raise ValueError("The holdout split is empty; the dataset is too small for out-of-core training")
+    return correct / total
+
+
+def booster_params(model, n_classes):
+    """xgboost.train params for an XGBClassifier's settings and `n_classes` labels."""
+    xgb_params = model.get_xgb_params()
+    if n_classes > 2:
+        xgb_params.update(objective="multi:softprob", num_class=n_classes)
+    return xgb_params
+
+
+def as_classifier(model, booster, n_classes, objective):
+    """Attach a trained booster to an unfitted XGBClassifier, setting the attributes fit() would."""
+    model._Booster = booster
+    model.classes_ = np.arange(n_classes)
+    model.n_classes_ = n_classes
+    model.objective = objective
+    return model
+
+
+def train_out_of_core(path, params, chunk_rows=CHUNK_ROWS, memory="quantile", cache_dir=None,
+                      test_size=0.2, metrics=None):
+    """
+    Train an XGBClassifier on `path` without loading it; returns
+    (model, holdout accuracy, reference profile, sample input rows).
+    `params` are XGBClassifier keyword arguments (incl. n_estimators).
+    Building the DMatrix is timed as "parse", boosting as "fit" and the
+    holdout pass as "predict" on `metrics` (a StepMetrics), if given.
+    """
+    if memory not in ("quantile", "external"):
+        raise ValueError(f"memory must be 'quantile' or 'external', got {memory!r}")
+    metrics = metrics or StepMetrics("train", enabled=False)
+    model = XGBClassifier(**params, tree_method="hist", max_bin=MAX_BIN)
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        with metrics.stage("parse"):
+            if memory == "external":
+                it = ChunkIter(path, chunk_rows, test_size, cache_prefix=os.path.join(tmp, "dmatrix"))
+                dtrain = xgboost.DMatrix(it)
+            else:
+                it = ChunkIter(path, chunk_rows, test_size)
+                dtrain = xgboost.QuantileDMatrix(it, max_bin=MAX_BIN)
+        if not it.rows:
+            raise ValueError(f"No training rows read from {path}")
+
+        n_classes = int(max(it.classes)) + 1
+        xgb_params = booster_params(model, n_classes)
+        with metrics.stage("fit", rows=it.rows):
+            booster = xgboost.train(xgb_params, dtrain, num_boost_round=model.get_num_boosting_rounds())
+        del dtrain
+
+    # the same attributes XGBClassifier.fit sets, so model.joblib is interchangeable
+    as_classifier(model, booster, n_classes, xgb_params["objective"])
+    with metrics.stage("predict"):
+        acc = holdout_accuracy(booster, path, chunk_rows, test_size)
+    metrics.set(train_rows=it.rows)
+    print(f"[out-of-core] memory={memory} train_rows={it.rows} classes={n_classes}")
+    return model, acc, it.profile, it.sample
@@ -1,9 +1,9 @@
 import os
+import numpy as np
 import pandas as pd
 import joblib
 # from sklearn.ensemble import RandomForestClassifier
 from xgboost import XGBClassifier
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import argparse
 
@@ -11,60 +11,169 @@ import mlflow
 import mlflow.xgboost
 from mlflow.models import infer_signature
 
-FEATURES = ['sepal length (cm)','sepal width (cm)','petal length (cm)','petal width (cm)']
+from src.schema import FEATURES
+from src.dataio import read_table
+from src.inference.model_store import save_native, file_sha256
+from src.monitoring.sketches import DatasetProfile, PROFILE_FILENAME
+from src.model_training.search import successive_halving, load_space
+from src.model_training.tracking import AsyncRunLogger
+from src.model_training.out_of_core import train_out_of_core, holdout_mask, CHUNK_ROWS
+from src.model_training.distributed import train_distributed
+from src.model_training.incremental import (plan, warm_start, fingerprint, save_trained_parts,
+                                            WARM_ROUNDS, MAX_DEGRADATION, TEST_SIZE)
+from src.dataio import list_parts
+from src.instrumentation import StepMetrics
 
-def model_train(input_path: str, model_path: str, n_estimators: int = 20):
+DEFAULT_PARAMS = dict(
+    max_depth=3,
+    learning_rate=0.1,
+    subsample=1.0,
+    colsample_bytree=1.0,
+    random_state=42,
+    eval_metric="mlogloss",
+)
+
+def log_trials(tracker, trials):
+    """Log every search trial through the batching logger."""
+    for t in trials:
+        tracker.log_metrics({"search_cv_logloss": t["cv_logloss"],
+                             "search_cv_accuracy": t["cv_accuracy"]}, step=t["trial"])
+    tracker.log_dict(trials, "search_trials.json")
+
+def load_split(input_file, metrics):
+    with metrics.stage("parse"):
+        try:
+            frames = [read_table(part, columns=FEATURES + ['target']) for part in list_parts(input_file)]
+        except (ValueError, KeyError) as e:
+            raise ValueError("Input must contain iris feature columns and 'target'") from e
+        if not frames:
+            raise FileNotFoundError(f"No data files found in {input_file}")
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    with metrics.stage("transform", rows=len(df)):
+        X = df[FEATURES]
+        y = df['target']
+
+        # the per-part row hash of out_of_core.py: every training mode, and the
+        # warm-start guard, hold out the same rows
+        holdout = np.concatenate([holdout_mask(0, len(f), TEST_SIZE) for f in frames])
+        Xtr, Xte, ytr, yte = X[~holdout], X[holdout], y[~holdout], y[holdout]
+    metrics.set(train_rows=len(Xtr))
+    return df, Xtr, Xte, ytr, yte
+
+def model_train(input_path: str, model_path: str, n_estimators: int = 20,
+                input_filename: str = "processed.csv", search: bool = False,
+                search_space: str = None, search_workers: int = None,
+                cv_folds: int = 3, eta: int = 3, out_of_core: bool = False,
+                chunk_rows: int = CHUNK_ROWS, memory: str = "quantile",
+                warm_start_from: str = None, warm_rounds: int = WARM_ROUNDS,
+                max_degradation: float = MAX_DEGRADATION, workers: int = 1):
     print(f"Training with input={input_path}")
-    input_file = os.path.join(input_path, "processed.csv") 
+    input_file = os.path.join(input_path, input_filename)
 
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Training data not found: {input_file}")
+    if out_of_core and search:
+        raise ValueError("--search needs the training data in memory; drop --out-of-core")
+    if warm_start_from and (search or out_of_core):
+        raise ValueError("--warm-start continues the previous model as is; drop --search / --out-of-core")
+    if search and eta < 2:
+        raise ValueError(f"--eta must be at least 2, got {eta}")
+    space = load_space(search_space) if search else None  # a bad space fails before any work
+    if workers > 1 and (search or out_of_core or warm_start_from):
+        raise ValueError("--workers trains one model across worker processes; "
+                         "drop --search / --out-of-core / --warm-start")
+    metrics = StepMetrics("train")
 
-    df = pd.read_csv(input_file)
-    
-    if not set(FEATURES).issubset(df.columns) or 'target' not in df.columns:
-        raise ValueError("Input must contain iris feature columns and 'target'")
-
-    X = df[FEATURES]
-    y = df['target']
+    # retrain: "full", "warm" (more trees on the new parts only) or "full_fallback"
+    retrain = "full"
+    if warm_start_from:
+        new_parts, parts, reason = plan(input_file, warm_start_from)
+        retrain = "warm" if reason is None else "full_fallback"
+        if reason:
+            print(f"[warm-start] {reason}; retraining from scratch")
+    else:
+        parts = fingerprint(input_file)
 
-    Xtr, Xte, ytr, yte = train_test_split(X, y, test_size=0.2, random_state=42)
+    distributed = workers > 1
+    if not (out_of_core or distributed) and retrain != "warm":
+        df, Xtr, Xte, ytr, yte = load_split(input_file, metrics)
 
     mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "arn:aws:sagemaker:ap-south-1:718036509811:mlflow-tracking-server/iris-sagemaker-tracking"))
     mlflow.set_experiment(os.getenv("MLFLOW_EXPERIMENT_NAME", "iris-sagemaker"))
 
-    with mlflow.start_run():
-        model = XGBClassifier(
-        n_estimators=n_estimators,
-        max_depth=3,
-        learning_rate=0.1,
-        subsample=1.0,
-        colsample_bytree=1.0,
-        random_state=42,
-        eval_metric="mlogloss"
-        )
-
-        mlflow.log_param("n_estimators", n_estimators)
-        mlflow.log_param("max_depth", 3)
-        mlflow.log_param("learning_rate", 0.1)
-        mlflow.log_param("subsample", 1.0)
-        mlflow.log_param("colsample_bytree", 1.0)
-        mlflow.log_param("random_state", 42)
-        mlflow.log_param("eval_metric", "mlogloss")
-    
-        model.fit(Xtr, ytr)
-        acc = accuracy_score(yte, model.predict(Xte))
-        mlflow.log_metric("accuracy", float(acc))
+    params = {"n_estimators": n_estimators, **DEFAULT_PARAMS}
+
+    # params/metrics are flushed in batches from a background thread and the
+    # model upload overlaps with writing the local artifacts; leaving the
+    # `with` closes the logger (flush + wait) before the run is ended
+    with mlflow.start_run() as run, AsyncRunLogger(run.info.run_id) as tracker:
+        if search:
+            # successive halving over the training split; the holdout stays untouched
+            with metrics.stage("search"):
+                best, trials = successive_halving(Xtr, ytr, space,
+                                                  max_estimators=n_estimators, eta=eta,
+                                                  cv_folds=cv_folds, workers=search_workers)
+            params.update(best)
+            log_trials(tracker, trials)
+            print(f"[search] {len(trials)} trials, best={best}")
+
+        if retrain == "warm":
+            tracker.log_params({"warm_start_from": warm_start_from, "warm_rounds": warm_rounds})
+            model, acc, prev_acc, profile, train = warm_start(
+                warm_start_from, new_parts, list_parts(input_file), params, warm_rounds, chunk_rows,
+                metrics=metrics)
+            tracker.log_metric("previous_accuracy", prev_acc)
+            print(f"[warm-start] +{warm_rounds} trees on {len(new_parts)} new part(s)/appended file(s), {len(train)} rows: "
+                  f"holdout accuracy {prev_acc:.4f} -> {acc:.4f}")
+            if prev_acc - acc > max_degradation:
+                # the guard: the continued model is worse than the one it started from
+                print(f"[warm-start] accuracy dropped by more than {max_degradation}; retraining from scratch")
+                retrain = "full_fallback"
+                df, Xtr, Xte, ytr, yte = load_split(input_file, metrics)
+            else:
+                Xtr = train[FEATURES]
+
+        if out_of_core:
+            # streamed from disk; the split is hashed per row, see out_of_core.py
+            tracker.log_params({"out_of_core": memory, "chunk_rows": chunk_rows})
+            model, acc, profile, Xtr = train_out_of_core(input_file, params, chunk_rows, memory,
+                                                         metrics=metrics)
+        elif distributed:
+            # each worker process reads its own shard; see distributed.py
+            tracker.log_params({"workers": workers, "chunk_rows": chunk_rows})
+            model, acc, profile, Xtr = train_distributed(input_file, params, workers, chunk_rows,
+                                                         metrics=metrics)
+        elif retrain != "warm":
+            model = XGBClassifier(**params)
+            with metrics.stage("fit", rows=len(Xtr)):
+                model.fit(Xtr, ytr)
+            with metrics.stage("predict", rows=len(Xte)):
+                acc = accuracy_score(yte, model.predict(Xte))
+            profile = DatasetProfile(FEATURES, 'target').update(df)
+        if retrain == "warm":
+            # the previous model's trees plus warm_rounds
+            params["n_estimators"] = model.get_booster().num_boosted_rounds()
+        tracker.log_params(params)
+        tracker.set_tag("retrain", retrain)
+        tracker.log_metric("accuracy", float(acc))
         print(f"accuracy={acc:.4f}")
 
+        sig = infer_signature(Xtr, model.predict(Xtr))
+        tracker.log_model(mlflow.xgboost, model, "xgb_model",
+                          signature=sig, input_example=Xtr.head(3))
+
         os.makedirs(model_path, exist_ok=True)
-        joblib.dump(model, os.path.join(model_path, "model.joblib"))
+        with metrics.stage("write"):
+            joblib.dump(model, os.path.join(model_path, "model.joblib"))
+            save_native(model, os.path.join(model_path, "model.ubj"))
+            profile.save(
+                os.path.join(model_path, PROFILE_FILENAME),
+                model_sha256=file_sha256(os.path.join(model_path, "model.joblib")),
+                mlflow_run_id=run.info.run_id)
+            save_trained_parts(model_path, parts, retrain=retrain, accuracy=float(acc))
         print(f"[INFO] Saved model to {model_path}")
-
-        sig = infer_signature(Xtr, model.predict(Xtr))
-        mlflow.xgboost.log_model(model, artifact_path="xgb_model",
-                                signature=sig,
-                                input_example=Xtr.head(3))
+        metrics.write(model_path, tracker=tracker)
 
 def parse_args():
     parser = argparse.ArgumentParser()
@@ -72,8 +181,36 @@ def parse_args():
                         default="/opt/ml/input/data/train")
     parser.add_argument("--model-path", type=str, default="/opt/ml/model")
     parser.add_argument("--n-estimators", type=int, default=20)
-    return parser.parse_args()
+    parser.add_argument("--input-filename", type=str, default="processed.csv")
+    parser.add_argument("--search", action="store_true",
+                        help="Successive-halving search before training the final model")
+    parser.add_argument("--search-space", type=str, default=None,
+                        help="JSON file or inline JSON of {param: [values]}")
+    parser.add_argument("--search-workers", type=int, default=None)
+    parser.add_argument("--cv-folds", type=int, default=3)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="Stream the input in chunks into an XGBoost DataIter instead of loading it")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--memory", choices=["quantile", "external"], default="quantile",
+                        help="quantile: in-memory QuantileDMatrix; external: disk-cached DMatrix pages")
+    parser.add_argument("--warm-start", type=str, default=None,
+                        help="Previous model dir (or model.tar.gz dir / model file): add trees on new data parts only")
+    parser.add_argument("--warm-rounds", type=int, default=WARM_ROUNDS)
+    parser.add_argument("--max-degradation", type=float, default=MAX_DEGRADATION,
+                        help="Retrain from scratch if warm-start holdout accuracy drops by more than this")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Train data parallel across this many local worker processes (XGBoost collective)")
+    args = parser.parse_args()
+    if args.eta < 2:
+        parser.error(f"--eta must be at least 2, got {args.eta}")
+    return args
 
 if __name__ == "__main__":
     a = parse_args()
-    model_train(a.input_path, a.model_path, n_estimators=a.n_estimators)
+    model_train(a.input_path, a.model_path, n_estimators=a.n_estimators,
+                input_filename=a.input_filename, search=a.search,
+                search_space=a.search_space, search_workers=a.search_workers,
+                cv_folds=a.cv_folds, eta=a.eta, out_of_core=a.out_of_core,
+                chunk_rows=a.chunk_rows, memory=a.memory, warm_start_from=a.warm_start,
+                warm_rounds=a.warm_rounds, max_degradation=a.max_degradation, workers=a.workers)
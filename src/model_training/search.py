@@ -0,0 +1,109 @@
+"""
+Parallel hyperparameter search with successive halving on n_estimators.
+
+Every config in the (grid) search space is scored with k-fold CV at a small
+number of trees; only the best 1/eta survive to the next rung, which trains
+eta times as many trees, up to the requested n_estimators. Trials of a rung
+run in a local process pool. Configs are ranked by CV log loss (accuracy on
+iris ties far too often to rank on).
+"""
+import json
+import math
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from xgboost import XGBClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import accuracy_score, log_loss
+
+FIXED_PARAMS = {"random_state": 42, "eval_metric": "mlogloss"}
+# set by the search itself: n_estimators per rung, one thread per trial
+RESERVED = set(FIXED_PARAMS) | {"n_estimators", "n_jobs"}
+DEFAULT_SPACE = {
+    "max_depth": [2, 3, 4, 6],
+    "learning_rate": [0.05, 0.1, 0.3],
+    "subsample": [0.8, 1.0],
+    "colsample_bytree": [0.8, 1.0],
+}
+
+_DATA = None  # (X, y, folds) in each worker
+
+
+def check_space(space):
+    """Raise ValueError unless `space` maps tunable params to non-empty lists of values."""
+    if not isinstance(space, dict):
+        raise ValueError(f"A search space must be a JSON object of {{param: [values]}}, got {space!r}")
+    reserved = sorted(RESERVED & set(space))
+    if reserved:
+        raise ValueError(f"Search space sets {reserved}, which the search fixes itself "
+                         f"(n_estimators comes from the rungs); remove them")
+    bad = sorted(k for k, v in space.items() if not isinstance(v, list) or not v)
+    if bad:
+        raise ValueError(f"Search space values must be non-empty lists; check {bad}")
+    return space
+
+
+def load_space(spec):
+    """A search space from a JSON file path, an inline JSON object, or None for the default."""
+    if not spec:
+        return DEFAULT_SPACE
+    if spec.lstrip().startswith("{"):
+        return check_space(json.loads(spec))
+    with open(spec) as f:
+        return check_space(json.load(f))
+
+
+def grid(space):
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def rungs(max_estimators, eta, min_estimators=1):
+    """n_estimators per rung, e.g. 20 trees with eta=3 -> [2, 6, 20]."""
+    if eta < 2:
+        raise ValueError(f"eta must be at least 2 (keep the best 1/eta of each rung), got {eta}")
+    out = [max_estimators]
+    while out[0] // eta >= min_estimators:
+        out.insert(0, out[0] // eta)
+    return out
+
+
+def _init_worker(X, y, folds):
+    global _DATA
+    _DATA = (X, y, folds)
+
+
+def _evaluate(params, n_estimators):
+    X, y, folds = _DATA
+    accs, losses = [], []
+    for tr, va in folds:
+        model = XGBClassifier(**FIXED_PARAMS, **params, n_estimators=n_estimators, n_jobs=1)
+        model.fit(X.iloc[tr], y.iloc[tr])
+        proba = model.predict_proba(X.iloc[va])
+        accs.append(accuracy_score(y.iloc[va], proba.argmax(axis=1)))
+        losses.append(log_loss(y.iloc[va], proba, labels=np.arange(proba.shape[1])))
+    return float(np.mean(losses)), float(np.mean(accs))
+
+
+def successive_halving(X, y, space=None, max_estimators=20, eta=3, cv_folds=3, workers=None):
+    """
+    Run the search on (X, y) and return (best_params, trials).
+    best_params includes n_estimators; trials lists every evaluation.
+    """
+    configs = grid(check_space(space or DEFAULT_SPACE))
+    folds = list(StratifiedKFold(cv_folds, shuffle=True, random_state=42).split(X, y))
+    trials = []
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(X, y, folds)) as pool:
+        for rung, n_estimators in enumerate(rungs(max_estimators, eta)):
+            results = list(pool.map(_evaluate, configs, [n_estimators] * len(configs)))
+            for params, (loss, acc) in zip(configs, results):
+                trials.append({"trial": len(trials), "rung": rung, "n_estimators": n_estimators,
+                               "params": params, "cv_logloss": loss, "cv_accuracy": acc})
+            print(f"[search] rung={rung} n_estimators={n_estimators} configs={len(configs)} "
+                  f"best_logloss={min(r[0] for r in results):.4f}")
+            order = sorted(range(len(configs)), key=lambda i: results[i][0])
+            configs = [configs[i] for i in order[:max(1, math.ceil(len(configs) / eta))]]
+
+    return {**configs[0], "n_estimators": max_estimators}, trials
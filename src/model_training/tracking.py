@@ -0,0 +1,144 @@
+"""
+Batched, asynchronous MLflow logging for one run.
+
+AsyncRunLogger buffers params, metrics and tags in memory and a background
+thread sends them with MlflowClient.log_batch (at most 1000 entities per
+call, 100 params / 100 tags) every `flush_interval` seconds or as soon as a
+full batch is waiting. Artifact uploads run on their own thread so they
+overlap with the rest of the job. close() flushes everything left and waits
+for every upload; a batch that failed in the background is kept and retried
+there, and any error that still remains is raised instead of dropped.
+
+Every call names the run explicitly, so the logger works from any thread
+and against any tracking URI, e.g. a local file store (file:./mlruns).
+log_model() goes through the flavor's own log_model() and the fluent API,
+so it uses the global tracking URI.
+"""
+import time
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mlflow
+from mlflow.tracking import MlflowClient
+from mlflow.entities import Metric, Param, RunTag
+
+MAX_ENTITIES, MAX_PARAMS, MAX_TAGS = 1000, 100, 100
+
+
+class AsyncRunLogger:
+    def __init__(self, run_id, client=None, flush_interval=1.0):
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._metrics, self._params, self._tags = [], [], []
+        self._wake = threading.Event()
+        self._closed = False
+        self._futures = []
+        self._uploads = ThreadPoolExecutor(1, thread_name_prefix="mlflow-artifacts")
+        self._thread = threading.Thread(target=self._run, name="mlflow-batch", daemon=True)
+        self._thread.start()
+
+    # --- buffering -------------------------------------------------------
+    def log_param(self, key, value):
+        self.log_params({key: value})
+
+    def log_params(self, params):
+        with self._lock:
+            self._params.extend(Param(k, str(v)) for k, v in params.items())
+        self._maybe_wake()
+
+    def log_metric(self, key, value, step=0):
+        self.log_metrics({key: value}, step)
+
+    def log_metrics(self, metrics, step=0):
+        ts = int(time.time() * 1000)
+        with self._lock:
+            self._metrics.extend(Metric(k, float(v), ts, step) for k, v in metrics.items())
+        self._maybe_wake()
+
+    def set_tag(self, key, value):
+        with self._lock:
+            self._tags.append(RunTag(key, str(value)))
+        self._maybe_wake()
+
+    def _maybe_wake(self):
+        if len(self._metrics) + len(self._params) + len(self._tags) >= MAX_ENTITIES:
+            self._wake.set()
+
+    # --- artifacts -------------------------------------------------------
+    def submit(self, fn, *args, **kwargs):
+        """Run `fn` on the upload thread; close() waits for it."""
+        future = self._uploads.submit(fn, *args, **kwargs)
+        self._futures.append(future)
+        return future
+
+    def log_artifacts(self, local_dir, artifact_path=None, cleanup=False):
+        def upload():
+            try:
+                self.client.log_artifacts(self.run_id, local_dir, artifact_path)
+            finally:
+                if cleanup:
+                    shutil.rmtree(local_dir, ignore_errors=True)
+        return self.submit(upload)
+
+    def log_dict(self, dictionary, artifact_file):
+        return self.submit(self.client.log_dict, self.run_id, dictionary, artifact_file)
+
+    def log_model(self, flavor, model, artifact_path, **kwargs):
+        """
+        flavor.log_model() on the upload thread: the model is saved, uploaded
+        and recorded as this run's logged model there.
+        """
+        def upload():
+            self.flush()  # the logged model records the run's params
+            # the fluent API only sees runs active on its own thread; this makes
+            # the model land in the run's experiment. The run is ended again by
+            # whoever started it, with its real status.
+            with mlflow.start_run(run_id=self.run_id):
+                return flavor.log_model(model, artifact_path, **kwargs)
+        return self.submit(upload)
+
+    # --- flushing --------------------------------------------------------
+    def flush(self):
+        """Send everything buffered so far; failed batches go back to the buffer."""
+        with self._lock:
+            metrics, params, tags = self._metrics, self._params, self._tags
+            self._metrics, self._params, self._tags = [], [], []
+        while metrics or params or tags:
+            p, t = params[:MAX_PARAMS], tags[:MAX_TAGS]
+            m = metrics[:MAX_ENTITIES - len(p) - len(t)]
+            try:
+                self.client.log_batch(self.run_id, metrics=m, params=p, tags=t)
+            except Exception:
+                with self._lock:
+                    self._metrics[:0], self._params[:0], self._tags[:0] = metrics, params, tags
+                raise
+            metrics, params, tags = metrics[len(m):], params[len(p):], tags[len(t):]
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass  # the batch was re-queued; retried on the next tick and in close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._uploads.shutdown(wait=True)
+        for future in self._futures:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,23 +1,115 @@
-import pandas as pd
-from evidently.report import Report
-from evidently.metric_preset import DataDriftPreset, DataQualityPreset, TargetDriftPreset
+"""
+Streaming drift report between the reference (processed) data and the
+current predictions.
 
-reference_path = "../preprocessing/processed_local/processed.csv"
-current_path   = "../inference/output_local/predictions.csv"
-output_html    = "./drift_report.html"
+Both files are read once in chunks into fixed-size sketches
+(src/monitoring/sketches.py), so memory does not depend on row count.
+A reference ending in .json is taken to be the reference_profile.json that
+model_train saves next to the model, and is loaded instead of re-profiled.
+Per feature we report PSI and a binned KS test; the label distribution
+(reference `target` vs current `prediction`) gets a chi-square test. The
+HTML and JSON reports are rendered from the sketches alone.
+"""
+import os
+import json
+import html
+import argparse
 
-ref = pd.read_csv(reference_path)
-cur = pd.read_csv(current_path)
+from src.schema import FEATURES
+from src.dataio import iter_batches
+from src.monitoring.sketches import DatasetProfile, PROFILE_FILENAME, psi, ks, chi_square
 
-cur_t = cur.rename(columns={"prediction": "target"})
+PSI_THRESHOLD = 0.2
+P_VALUE_THRESHOLD = 0.05
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
 
-report = Report(metrics=[
-    DataQualityPreset(),
-    DataDriftPreset(),
-    TargetDriftPreset()
-])
 
-report.run(reference_data=ref, current_data=cur_t)
-report.save_html(output_html)
+def profile_file(path, label, batch_rows=100_000):
+    """Sketch `path` in a single streaming pass."""
+    profile = DatasetProfile(FEATURES, label)
+    columns = FEATURES + [label]
+    for chunk in iter_batches(path, batch_rows, columns=columns):
+        profile.update(chunk)
+    return profile
 
-print("Drift report saved to:", output_html)
+
+def compare(ref, cur):
+    features = {}
+    for f in FEATURES:
+        r, c = ref.histograms[f], cur.histograms[f]
+        d, p = ks(r, c)
+        score = psi(r, c)
+        features[f] = {
+            "psi": score, "ks_statistic": d, "ks_p_value": p,
+            "drift": bool(score > PSI_THRESHOLD or p < P_VALUE_THRESHOLD),
+            "reference": {"mean": r.mean, "std": r.variance ** 0.5,
+                          "quantiles": dict(zip(map(str, QUANTILES), r.quantiles(QUANTILES)))},
+            "current": {"mean": c.mean, "std": c.variance ** 0.5,
+                        "quantiles": dict(zip(map(str, QUANTILES), c.quantiles(QUANTILES)))},
+        }
+    chi2, p = chi_square(ref.labels, cur.labels)
+    return {
+        "reference_rows": ref.rows,
+        "current_rows": cur.rows,
+        "features": features,
+        "target": {
+            "chi2": chi2, "p_value": p, "drift": bool(p < P_VALUE_THRESHOLD),
+            "reference": {str(k): v for k, v in sorted(ref.labels.counts.items())},
+            "current": {str(k): v for k, v in sorted(cur.labels.counts.items())},
+        },
+        "dataset_drift": any(v["drift"] for v in features.values()),
+    }
+
+
+def render_html(report):
+    rows = "".join(
+        f"<tr><td>{html.escape(f)}</td><td>{v['psi']:.4f}</td><td>{v['ks_statistic']:.4f}</td>"
+        f"<td>{v['ks_p_value']:.4g}</td><td>{v['reference']['mean']:.3f}</td>"
+        f"<td>{v['current']['mean']:.3f}</td><td>{'DRIFT' if v['drift'] else 'ok'}</td></tr>"
+        for f, v in report["features"].items())
+    t = report["target"]
+    return (
+        "<html><head><meta charset='utf-8'><title>Drift report</title></head><body>"
+        f"<h1>Drift report</h1><p>reference rows: {report['reference_rows']}, "
+        f"current rows: {report['current_rows']}, dataset drift: {report['dataset_drift']}</p>"
+        "<h2>Features</h2><table border='1'><tr><th>feature</th><th>PSI</th><th>KS</th>"
+        "<th>KS p-value</th><th>ref mean</th><th>cur mean</th><th>status</th></tr>"
+        f"{rows}</table>"
+        f"<h2>Target / prediction</h2><p>chi2={t['chi2']:.4f} p-value={t['p_value']:.4g} "
+        f"drift={t['drift']}</p><p>reference: {html.escape(json.dumps(t['reference']))}<br>"
+        f"current: {html.escape(json.dumps(t['current']))}</p></body></html>")
+
+
+def load_reference(path):
+    if path.endswith(".json"):
+        return DatasetProfile.load(path)
+    return profile_file(path, "target")
+
+
+def drift(ref_dir: str, ref_filename: str, curr_dir: str, curr_filename: str, output_dir: str):
+    ref = load_reference(os.path.join(ref_dir, ref_filename))
+    cur = profile_file(os.path.join(curr_dir, curr_filename), "prediction")
+    report = compare(ref, cur)
+    report["reference_meta"] = ref.meta
+
+    os.makedirs(output_dir, exist_ok=True)
+    out_file = os.path.join(output_dir, "drift_report.html")
+    with open(out_file, "w") as f:
+        f.write(render_html(report))
+    with open(os.path.join(output_dir, "drift_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("Drift report saved to:", out_file, " dataset_drift:", report["dataset_drift"])
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ref-dir", default="/opt/ml/processing/reference")
+    parser.add_argument("--ref-filename", default="processed.csv",
+                        help=f"Raw reference data, or the {PROFILE_FILENAME} saved with the model")
+    parser.add_argument("--curr-dir", default="/opt/ml/processing/current")
+    parser.add_argument("--curr-filename", default="predictions.csv")
+    parser.add_argument("--output-dir", default="/opt/ml/processing/output")
+    args = parser.parse_args()
+    drift(args.ref_dir, args.ref_filename, args.curr_dir, args.curr_filename, args.output_dir)
@@ -0,0 +1,240 @@
+"""
+Mergeable, fixed-size sketches for drift monitoring.
+
+HistogramSketch keeps counts over fixed bin edges (plus under/overflow),
+count, NaN count, sum, sum of squares, min and max, so its memory does not
+grow with the number of rows and two sketches over the same edges merge by
+addition. CategoricalSketch counts discrete values (target / prediction).
+DatasetProfile bundles one sketch per feature plus the label distribution
+and round-trips through plain JSON; model_train saves one as
+reference_profile.json next to the model so drift runs never re-read the
+reference data.
+
+The default bins cover 0-10 cm at the 0.1 cm resolution of the iris data.
+"""
+import json
+
+import numpy as np
+
+from src.schema import FEATURES
+
+DEFAULT_RANGE = (0.0, 10.0)
+DEFAULT_BINS = 100
+PROFILE_VERSION = 1
+PROFILE_FILENAME = "reference_profile.json"
+SUMMARY_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+
+class HistogramSketch:
+    def __init__(self, lo=DEFAULT_RANGE[0], hi=DEFAULT_RANGE[1], bins=DEFAULT_BINS):
+        self.lo, self.hi, self.bins = float(lo), float(hi), int(bins)
+        self.edges = np.linspace(self.lo, self.hi, self.bins + 1)
+        self.counts = np.zeros(self.bins + 2, dtype=np.int64)  # [under, bins..., over]
+        self.n = 0
+        self.nan = 0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        v = np.asarray(values, dtype=np.float64)
+        isnan = np.isnan(v)
+        if isnan.any():
+            self.nan += int(isnan.sum())
+            v = v[~isnan]
+        if not len(v):
+            return self
+        self.counts += np.bincount(np.searchsorted(self.edges, v, side="right"),
+                                   minlength=self.bins + 2)
+        self.n += len(v)
+        self.sum += float(v.sum())
+        self.sumsq += float(np.dot(v, v))
+        self.min = min(self.min, float(v.min()))
+        self.max = max(self.max, float(v.max()))
+        return self
+
+    def merge(self, other):
+        if (self.lo, self.hi, self.bins) != (other.lo, other.hi, other.bins):
+            raise ValueError("Cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        self.n += other.n
+        self.nan += other.nan
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return self.sum / self.n if self.n else float("nan")
+
+    @property
+    def variance(self):
+        if self.n < 2:
+            return float("nan")
+        return max(0.0, (self.sumsq - self.sum * self.sum / self.n) / (self.n - 1))
+
+    def cdf(self):
+        """Empirical CDF at every bin boundary (after under, each bin, over)."""
+        return np.cumsum(self.counts) / max(self.n, 1)
+
+    def quantiles(self, qs):
+        """Approximate quantiles, interpolating linearly inside a bin."""
+        if not self.n:
+            return [float("nan")] * len(qs)
+        lows = np.concatenate([[self.min], self.edges])
+        highs = np.concatenate([self.edges, [self.max]])
+        cum = np.cumsum(self.counts)
+        out = []
+        for q in qs:
+            target = q * self.n
+            i = int(np.searchsorted(cum, target, side="left"))
+            i = min(i, len(cum) - 1)
+            before = cum[i - 1] if i else 0
+            frac = (target - before) / self.counts[i] if self.counts[i] else 0.0
+            lo, hi = max(lows[i], self.min), min(highs[i], self.max)
+            out.append(float(lo + frac * (hi - lo)))
+        return out
+
+    def to_dict(self):
+        return {"lo": self.lo, "hi": self.hi, "bins": self.bins,
+                "counts": self.counts.tolist(), "n": self.n, "nan": self.nan,
+                "sum": self.sum, "sumsq": self.sumsq,
+                "min": None if self.n == 0 else self.min,
+                "max": None if self.n == 0 else self.max}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls(d["lo"], d["hi"], d["bins"])
+        s.counts = np.asarray(d["counts"], dtype=np.int64)
+        s.n, s.nan, s.sum, s.sumsq = d["n"], d["nan"], d["sum"], d["sumsq"]
+        s.min = np.inf if d["min"] is None else d["min"]
+        s.max = -np.inf if d["max"] is None else d["max"]
+        return s
+
+
+class CategoricalSketch:
+    def __init__(self):
+        self.counts = {}
+
+    def update(self, values):
+        vals, cnts = np.unique(np.asarray(values), return_counts=True)
+        for v, c in zip(vals.tolist(), cnts.tolist()):
+            self.counts[v] = self.counts.get(v, 0) + c
+        return self
+
+    def merge(self, other):
+        for v, c in other.counts.items():
+            self.counts[v] = self.counts.get(v, 0) + c
+        return self
+
+    @property
+    def n(self):
+        return sum(self.counts.values())
+
+    def to_dict(self):
+        return {"counts": [[v, c] for v, c in sorted(self.counts.items())]}
+
+    @classmethod
+    def from_dict(cls, d):
+        s = cls()
+        s.counts = {v: c for v, c in d["counts"]}
+        return s
+
+
+class DatasetProfile:
+    """Per-feature histograms plus the label distribution of one dataset."""
+
+    def __init__(self, features=FEATURES, label=None):
+        self.features = list(features)
+        self.label = label
+        self.histograms = {f: HistogramSketch() for f in self.features}
+        self.labels = CategoricalSketch()
+        self.meta = {}
+
+    def update(self, df):
+        for f in self.features:
+            self.histograms[f].update(df[f].to_numpy())
+        if self.label is not None and self.label in df.columns:
+            self.labels.update(df[self.label].to_numpy())
+        return self
+
+    def merge(self, other):
+        for f in self.features:
+            self.histograms[f].merge(other.histograms[f])
+        self.labels.merge(other.labels)
+        return self
+
+    @property
+    def rows(self):
+        h = self.histograms[self.features[0]]
+        return h.n + h.nan
+
+    def to_dict(self):
+        return {"features": self.features, "label": self.label,
+                "histograms": {f: h.to_dict() for f, h in self.histograms.items()},
+                "labels": self.labels.to_dict()}
+
+    @classmethod
+    def from_dict(cls, d):
+        p = cls(d["features"], d["label"])
+        p.histograms = {f: HistogramSketch.from_dict(h) for f, h in d["histograms"].items()}
+        p.labels = CategoricalSketch.from_dict(d["labels"])
+        return p
+
+    def save(self, path, **meta):
+        """Write the profile as JSON; `meta` (e.g. the model hash) is stored alongside."""
+        summary = {f: {"mean": h.mean, "variance": h.variance,
+                       "quantiles": dict(zip(map(str, SUMMARY_QUANTILES), h.quantiles(SUMMARY_QUANTILES)))}
+                   for f, h in self.histograms.items()}
+        doc = {"version": PROFILE_VERSION, "meta": {**self.meta, **meta},
+               "rows": self.rows, "summary": summary, **self.to_dict()}
+        with open(path, "w") as f:
+            json.dump(doc, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            doc = json.load(f)
+        if doc.get("version") != PROFILE_VERSION:
+            raise ValueError(f"Unsupported profile version {doc.get('version')} in {path}")
+        p = cls.from_dict(doc)
+        p.meta = doc.get("meta", {})
+        return p
+
+
+def psi(ref, cur, eps=1e-4):
+    """Population stability index between two histograms over the same bins."""
+    p = np.clip(ref.counts / max(ref.n, 1), eps, None)
+    q = np.clip(cur.counts / max(cur.n, 1), eps, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(ref, cur):
+    """
+    Two-sample KS statistic approximated on the shared bin boundaries, with
+    the asymptotic Kolmogorov p-value.
+    """
+    if not ref.n or not cur.n:
+        return float("nan"), float("nan")
+    from scipy import stats  # imported here so training / serving don't load scipy.stats
+
+    d = float(np.max(np.abs(ref.cdf() - cur.cdf())))
+    en = ref.n * cur.n / (ref.n + cur.n)
+    return d, float(stats.kstwobign.sf(np.sqrt(en) * d))
+
+
+def chi_square(ref, cur):
+    """Chi-square test of homogeneity between two categorical sketches."""
+    from scipy import stats
+
+    cats = sorted(set(ref.counts) | set(cur.counts))
+    table = np.array([[ref.counts.get(c, 0) for c in cats],
+                      [cur.counts.get(c, 0) for c in cats]])
+    table = table[:, table.sum(axis=0) > 0]
+    if table.shape[1] < 2 or (table.sum(axis=1) == 0).any():
+        return float("nan"), float("nan")
+    chi2, p, _, _ = stats.chi2_contingency(table, correction=False)
+    return float(chi2), float(p)
@@ -0,0 +1,194 @@
+"""
+Run the pipeline.py step graph on one machine, without SageMaker.
+
+    python -m src.pipelines.local --work-dir local_pipeline --n-estimators 20 --evaluate
+
+PreprocessIris -> TrainModel -> RegisterIrisModel is the graph that
+pipeline.py upserts; --evaluate adds BatchInferIris -> DriftIris after
+TrainModel, which runs concurrently with RegisterIrisModel. Artifacts move
+through directories under --work-dir instead of S3 (processed/, model/,
+predictions/, drift/, registry/IrisModels/<version>/). Steps run as soon as
+their dependencies finish, in a thread pool (--mode thread) or in worker
+processes (--mode process).
+
+Preprocess, train and infer go through the content-hash StepCache (see
+src/step_cache.py), so a step whose inputs, arguments and code are unchanged
+restores its outputs instead of running; register skips a model whose hash
+is already the latest registered version. Each step's wall time and whether
+it ran, was cached or skipped are printed and written to run_report.json.
+"""
+import os
+import json
+import time
+import tarfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from src.step_cache import StepCache
+
+MODEL_PACKAGE_GROUP = "IrisModels"
+PROCESSED_FILENAME = "processed.csv"
+
+
+def _cached(cfg, step, params, inputs, outputs, fn):
+    if cfg["no_cache"]:
+        fn()
+        return "ran"
+    cache = StepCache()
+    cache.run(step, params, inputs, outputs, fn)
+    return "cached" if cache.hit else "ran"
+
+
+def preprocess_step(cfg):
+    from src.preprocessing.preprocessing import run_preprocessing
+
+    out_dir = os.path.join(cfg["work_dir"], "processed")
+    raw = cfg["raw_dir"]
+    return _cached(cfg, "preprocess", {"raw": bool(raw)}, [raw] if raw else [],
+                   [os.path.join(out_dir, PROCESSED_FILENAME)],
+                   lambda: run_preprocessing(out_dir, PROCESSED_FILENAME, input_dir=raw))
+
+
+def train_step(cfg):
+    from src.model_training.sagemaker_train import model_train
+
+    in_dir = os.path.join(cfg["work_dir"], "processed")
+    model_dir = os.path.join(cfg["work_dir"], "model")
+    return _cached(cfg, "train", {"n_estimators": cfg["n_estimators"]},
+                   [os.path.join(in_dir, PROCESSED_FILENAME)], [model_dir],
+                   lambda: model_train(in_dir, model_dir, n_estimators=cfg["n_estimators"],
+                                       input_filename=PROCESSED_FILENAME))
+
+
+def register_step(cfg):
+    """Version the trained model like a SageMaker model package: model.tar.gz + package.json."""
+    from src.inference.model_store import file_sha256
+
+    model_dir = os.path.join(cfg["work_dir"], "model")
+    group = os.path.join(cfg["work_dir"], "registry", MODEL_PACKAGE_GROUP)
+    os.makedirs(group, exist_ok=True)
+    sha = file_sha256(os.path.join(model_dir, "model.joblib"))
+
+    versions = sorted(int(v) for v in os.listdir(group) if v.isdigit())
+    if versions:
+        with open(os.path.join(group, str(versions[-1]), "package.json")) as f:
+            if json.load(f)["model_sha256"] == sha:
+                print(f"[register] model {sha[:12]} is already version {versions[-1]}")
+                return "skipped"
+
+    version = (versions[-1] if versions else 0) + 1
+    target = os.path.join(group, str(version))
+    os.makedirs(target)
+    with tarfile.open(os.path.join(target, "model.tar.gz"), "w:gz") as tar:
+        for name in sorted(os.listdir(model_dir)):
+            tar.add(os.path.join(model_dir, name), arcname=name)
+    with open(os.path.join(target, "package.json"), "w") as f:
+        json.dump({"model_package_group": MODEL_PACKAGE_GROUP, "version": version,
+                   "model_sha256": sha, "approval_status": "PendingManualApproval",
+                   "content_types": ["text/csv", "application/json"],
+                   "response_types": ["application/json"], "created": time.time()}, f, indent=2)
+    print(f"[register] {MODEL_PACKAGE_GROUP} version {version} -> {target}")
+    return "ran"
+
+
+def infer_step(cfg):
+    from src.inference.inference import main as run_inference
+
+    args = argparse.Namespace(
+        input_dir=os.path.join(cfg["work_dir"], "processed"), input_filename=PROCESSED_FILENAME,
+        model_dir=os.path.join(cfg["work_dir"], "model"), model_filename="model.joblib",
+        output_dir=os.path.join(cfg["work_dir"], "predictions"), output_filename="predictions.csv")
+    return _cached(cfg, "infer", {},
+                   [os.path.join(args.input_dir, args.input_filename),
+                    os.path.join(args.model_dir, args.model_filename)],
+                   [args.output_dir], lambda: run_inference(args))
+
+
+def drift_step(cfg):
+    from src.monitoring.drift import drift
+
+    work = cfg["work_dir"]
+    drift(os.path.join(work, "model"), "reference_profile.json", os.path.join(work, "predictions"),
+          "predictions.csv", os.path.join(work, "drift"))
+    return "ran"
+
+
+# name -> (function, dependencies); mirrors the steps in pipeline.py
+STEPS = {
+    "PreprocessIris": (preprocess_step, []),
+    "TrainModel": (train_step, ["PreprocessIris"]),
+    "RegisterIrisModel": (register_step, ["TrainModel"]),
+}
+EVALUATION_STEPS = {
+    "BatchInferIris": (infer_step, ["TrainModel"]),
+    "DriftIris": (drift_step, ["BatchInferIris"]),
+}
+
+
+def _timed(fn, cfg):
+    start = time.perf_counter()
+    status = fn(cfg)
+    return status, time.perf_counter() - start
+
+
+def prepare_mlflow(work_dir):
+    """Track locally unless MLFLOW_TRACKING_URI says otherwise; artifacts stay under work_dir."""
+    if os.getenv("MLFLOW_TRACKING_URI"):
+        return
+    os.environ["MLFLOW_TRACKING_URI"] = f"sqlite:///{os.path.abspath(os.path.join(work_dir, 'mlflow.db'))}"
+    import mlflow
+
+    name = os.getenv("MLFLOW_EXPERIMENT_NAME", "iris-sagemaker")
+    client = mlflow.tracking.MlflowClient()
+    if client.get_experiment_by_name(name) is None:
+        client.create_experiment(name, artifact_location=os.path.abspath(os.path.join(work_dir, "mlartifacts")))
+
+
+def run_local(work_dir, raw_dir=None, n_estimators=20, evaluate=False, workers=2, mode="thread",
+              no_cache=False):
+    """Run the graph and return {step: {"status", "seconds"}} in completion order."""
+    os.makedirs(work_dir, exist_ok=True)
+    prepare_mlflow(work_dir)
+    steps = dict(STEPS, **(EVALUATION_STEPS if evaluate else {}))
+    cfg = {"work_dir": work_dir, "raw_dir": raw_dir, "n_estimators": n_estimators, "no_cache": no_cache}
+
+    Pool = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+    report, running = {}, {}
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        while len(report) < len(steps):
+            for name, (fn, deps) in steps.items():
+                if name not in report and name not in running.values() and all(d in report for d in deps):
+                    print(f"[local] start {name}")
+                    running[pool.submit(_timed, fn, cfg)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                status, seconds = future.result()  # a failed step stops the run here
+                report[name] = {"status": status, "seconds": seconds}
+                print(f"[local] {name} {status} in {seconds:.2f}s")
+
+    total = time.perf_counter() - start
+    with open(os.path.join(work_dir, "run_report.json"), "w") as f:
+        json.dump({"mode": mode, "workers": workers, "total_seconds": total, "steps": report}, f, indent=2)
+    print(f"{'step':<20} {'status':>8} {'seconds':>9}")
+    for name, r in report.items():
+        print(f"{name:<20} {r['status']:>8} {r['seconds']:>9.2f}")
+    print(f"{'total':<20} {'':>8} {total:>9.2f}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--work-dir", default="local_pipeline")
+    parser.add_argument("--raw-dir", default=None,
+                        help="Directory of raw shards for PreprocessIris (default: the bundled iris data)")
+    parser.add_argument("--n-estimators", type=int, default=20)
+    parser.add_argument("--evaluate", action="store_true",
+                        help="Also run batch inference and a drift report after training")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+    run_local(args.work_dir, args.raw_dir, args.n_estimators, args.evaluate, args.workers,
+              args.mode, args.no_cache)
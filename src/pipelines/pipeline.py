@@ -29,6 +29,11 @@ n_estimators_param = ParameterInteger(
     name="N_Estimators", default_value=20
 )
 
+# worker processes on the training instance (data-parallel, XGBoost collective)
+train_workers_param = ParameterInteger(
+    name="TrainWorkers", default_value=1
+)
+
 preproc = ScriptProcessor(
     image_uri=IMAGE_URI,
     role=role,
@@ -48,7 +53,7 @@ trainer = Estimator(
     sagemaker_session=pipe_sess,
     entry_point="../model_training/sagemaker_train.py",
     source_dir=os.path.join(os.path.dirname(__file__), "../model_training"),
-    hyperparameters={"n-estimators": n_estimators_param},
+    hyperparameters={"n-estimators": n_estimators_param, "workers": train_workers_param},
 )
 
 step_preprocess = ProcessingStep(
@@ -90,7 +95,7 @@ step_register = RegisterModel(
 
 pipeline = Pipeline(
     name="IrisPreprocessTrain",
-    parameters=[output_prefix,n_estimators_param],
+    parameters=[output_prefix,n_estimators_param,train_workers_param],
     steps=[step_preprocess,step_train,step_register],
     sagemaker_session=pipe_sess,
 )
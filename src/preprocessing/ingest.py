@@ -0,0 +1,192 @@
+"""
+Streaming ingest of a directory of raw measurement shards.
+
+Every CSV / Parquet / Arrow file in the input directory is a shard. Headers
+are checked against FEATURES up front (all shards must agree on whether a
+`target` column is present); the shards are then processed in parallel, one
+per worker process, each streamed in chunks of `chunk_rows`:
+
+  * values are coerced to numbers, so stray text becomes NaN;
+  * rows with a missing / non-finite measurement or an unknown label are
+    dropped; out-of-range measurements (FEATURE_RANGE) are dropped too, or
+    clipped into range with repair=True, which also maps class names such
+    as "setosa" to their label;
+  * features are downcast to float32 and the label to int8.
+
+Each shard writes its own part-SSSSS-NNNNN files of at most `partition_rows`
+rows into the output dataset directory, so workers never share a file and
+name order is input order (read_table / iter_batches read it as one
+dataset). manifest.json in the same directory lists every part with its
+rows and bytes, the drop / repair counts, throughput and peak memory.
+
+With `store_path`, every shard also writes its rows to a feature store of
+its own (src/feature_store.py), and the parent concatenates those into one
+.f32 file in shard order by copying their raw bytes.
+"""
+import os
+import json
+import time
+import resource
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.schema import FEATURES, TARGET, TARGET_NAMES, FEATURE_RANGE
+from src.dataio import list_parts, read_columns, iter_batches, TableWriter
+from src.instrumentation import StepMetrics
+from src.feature_store import FeatureStore
+
+MANIFEST_FILENAME = "manifest.json"
+CHUNK_ROWS = 250_000
+PARTITION_ROWS = 1_000_000
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    return resource.getrusage(who).ru_maxrss / 1024  # KiB on Linux
+
+
+def validate_schema(shards):
+    """Return the columns to keep; raise ValueError if any shard is unusable."""
+    with_target = []
+    for shard in shards:
+        columns = read_columns(shard)
+        missing = [c for c in FEATURES if c not in columns]
+        if missing:
+            raise ValueError(f"{shard}: missing feature columns {missing}")
+        with_target.append(TARGET in columns)
+    if any(with_target) and not all(with_target):
+        raise ValueError(f"'{TARGET}' is present in some shards but not in others")
+    return FEATURES + [TARGET] if with_target and with_target[0] else list(FEATURES)
+
+
+def clean(df, repair=False):
+    """Validate one chunk; returns (clean frame, rows dropped, rows repaired)."""
+    X = df[FEATURES].apply(pd.to_numeric, errors="coerce").to_numpy(np.float64)
+    lo, hi = FEATURE_RANGE
+    bad = ~np.isfinite(X).all(axis=1)
+    outside = ((X < lo) | (X > hi)).any(axis=1) & ~bad
+    fixed = np.zeros(len(df), dtype=bool)
+    if repair:
+        X = np.clip(X, lo, hi)
+        fixed |= outside
+    else:
+        bad |= outside
+
+    out = pd.DataFrame(X.astype(np.float32), columns=FEATURES)
+    if TARGET in df.columns:
+        y = pd.to_numeric(df[TARGET], errors="coerce").to_numpy(np.float64)
+        if repair:
+            names = df[TARGET].astype(str).str.strip().str.lower()
+            mapped = names.map({n: i for i, n in enumerate(TARGET_NAMES)}).to_numpy(np.float64)
+            by_name = np.isnan(y) & ~np.isnan(mapped)
+            y = np.where(by_name, mapped, y)
+            fixed |= by_name
+        bad |= ~np.isin(y, np.arange(len(TARGET_NAMES)))
+        out[TARGET] = np.where(bad, 0, y).astype(np.int8)
+
+    keep = ~bad
+    return out[keep].reset_index(drop=True), int(bad.sum()), int((fixed & keep).sum())
+
+
+def _store_part(store_path, index):
+    stem, ext = os.path.splitext(store_path)
+    return f"{stem}-part-{index:05d}{ext}"
+
+
+def process_shard(shard, index, out_path, columns, chunk_rows=CHUNK_ROWS,
+                  partition_rows=PARTITION_ROWS, repair=False, store_path=None):
+    """Stream one shard into its own part files (and feature store part); returns the shard's stats."""
+    stats = {"shard": shard, "bytes_in": os.path.getsize(shard),
+             "rows_in": 0, "rows_out": 0, "dropped": 0, "repaired": 0}
+    start = time.perf_counter()
+    metrics = StepMetrics("preprocess")
+    store = TableWriter(_store_part(store_path, index)) if store_path else None
+    with warnings.catch_warnings(), TableWriter(out_path, partition_rows, prefix=f"part-{index:05d}") as writer:
+        # dirty CSV columns parse as mixed types; clean() coerces them anyway
+        warnings.simplefilter("ignore", pd.errors.DtypeWarning)
+        for chunk in metrics.timed_iter("parse", iter_batches(shard, chunk_rows, columns=columns)):
+            with metrics.stage("transform", rows=len(chunk)):
+                df, dropped, repaired = clean(chunk, repair)
+            stats["rows_in"] += len(chunk)
+            stats["dropped"] += dropped
+            stats["repaired"] += repaired
+            if len(df):
+                with metrics.stage("write", rows=len(df)):
+                    writer.write(df)
+                    if store is not None:
+                        store.write(df)
+    if store is not None:
+        store.close()
+    stats["rows_out"] = writer.rows
+    stats["parts"] = [{"file": os.path.basename(p), "rows": n, "bytes": os.path.getsize(p)}
+                      for p, n in zip(writer.parts, writer.part_rows)]
+    stats["seconds"] = time.perf_counter() - start
+    stats["peak_rss_mb"] = peak_rss_mb()
+    stats["stages"] = metrics.stages
+    return stats
+
+
+def _process(job):
+    return process_shard(*job)
+
+
+def ingest(input_dir, out_path, workers=None, chunk_rows=CHUNK_ROWS,
+           partition_rows=PARTITION_ROWS, repair=False, store_path=None):
+    """
+    Preprocess every shard in `input_dir` into the dataset directory
+    `out_path` (e.g. .../processed.parquet) and write its manifest; with
+    `store_path`, also into one .f32 feature store. Returns the manifest.
+    """
+    shards = list_parts(input_dir)
+    if not os.path.isdir(input_dir) or not shards:
+        raise FileNotFoundError(f"No raw data files found in {input_dir}")
+    columns = validate_schema(shards)
+
+    # parts from an earlier run would otherwise be read as part of this one
+    if os.path.isfile(out_path):
+        os.remove(out_path)  # e.g. processed.csv from an earlier run on the bundled data
+    os.makedirs(out_path, exist_ok=True)
+    for name in os.listdir(out_path):
+        if name.startswith("part-") or name == MANIFEST_FILENAME:
+            os.remove(os.path.join(out_path, name))
+
+    jobs = [(s, i, out_path, columns, chunk_rows, partition_rows, repair, store_path)
+            for i, s in enumerate(shards)]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_process(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_process, jobs))
+    if store_path:
+        store = FeatureStore.create(store_path, [c for c in FEATURES + [TARGET] if c in columns],
+                                    [TARGET] if TARGET in columns else [])
+        for i in range(len(jobs)):
+            part = _store_part(store_path, i)
+            if os.path.exists(part):  # a shard whose rows were all dropped writes none
+                store.extend(part)
+                os.remove(part)
+    seconds = time.perf_counter() - start
+
+    totals = {k: sum(r[k] for r in results) for k in ("bytes_in", "rows_in", "rows_out", "dropped", "repaired")}
+    manifest = {
+        "columns": columns,
+        "dtypes": {**{f: "float32" for f in FEATURES}, **({TARGET: "int8"} if TARGET in columns else {})},
+        "partition_rows": partition_rows,
+        "repair": repair,
+        "workers": workers,
+        "feature_store": os.path.basename(store_path) if store_path else None,
+        **totals,
+        "seconds": seconds,
+        "rows_per_sec": totals["rows_in"] / seconds if seconds else 0.0,
+        "mb_per_sec": totals["bytes_in"] / 2**20 / seconds if seconds else 0.0,
+        "peak_rss_mb": max([peak_rss_mb()] + [r["peak_rss_mb"] for r in results]),
+        "parts": [dict(p, shard=os.path.basename(r["shard"])) for r in results for p in r["parts"]],
+        "shards": [{k: v for k, v in r.items() if k != "parts"} for r in results],
+    }
+    with open(os.path.join(out_path, MANIFEST_FILENAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -1,21 +1,70 @@
-from sklearn.datasets import load_iris
 import pandas as pd
 import os
 import argparse
 
-def run_preprocessing(output_dir: str):
-    iris = load_iris(as_frame=True)
-    df = iris.frame
-    df["target"] = iris.target
+from src.dataio import write_table
+from src.preprocessing.ingest import ingest, CHUNK_ROWS, PARTITION_ROWS
+from src.instrumentation import StepMetrics
+from src.feature_store import FEATURE_STORE_FILENAME
 
+def run_preprocessing(output_dir: str, output_filename: str = "processed.csv", partition_rows: int = 0,
+                      input_dir: str = None, workers: int = None, chunk_rows: int = CHUNK_ROWS,
+                      repair: bool = False, feature_store: bool = False):
     os.makedirs(output_dir, exist_ok=True)
-    out_file = os.path.join(output_dir, "processed.csv")
-    df.to_csv(out_file, index=False)
+    out_file = os.path.join(output_dir, output_filename)
+    # features.f32: the same rows as a memory-mapped float32 store for downstream steps
+    store_file = os.path.join(output_dir, FEATURE_STORE_FILENAME) if feature_store else None
+    metrics = StepMetrics("preprocess")
+
+    if input_dir:
+        # --- Raw shards: stream, validate & write a partitioned dataset ---
+        m = ingest(input_dir, out_file, workers=workers, chunk_rows=chunk_rows,
+                   partition_rows=partition_rows or PARTITION_ROWS, repair=repair,
+                   store_path=store_file)
+        print(f"processed dataset created {out_file} rows_in={m['rows_in']} rows_out={m['rows_out']} "
+              f"dropped={m['dropped']} repaired={m['repaired']} parts={len(m['parts'])}")
+        print(f"[ingest] {m['seconds']:.2f}s {m['rows_per_sec']:,.0f} rows/s {m['mb_per_sec']:.1f} MB/s "
+              f"workers={m['workers']} peak_rss={m['peak_rss_mb']:.0f} MB")
+        # per-shard stage times, summed over the workers
+        for shard in m["shards"]:
+            metrics.merge(shard.get("stages", {}))
+        metrics.set(rows_in=m["rows_in"], rows=m["rows_out"], workers=m["workers"])
+        metrics.write(output_dir)
+        return m
+
+    with metrics.stage("load"):
+        from sklearn.datasets import load_iris  # only the bundled-data path needs sklearn
+
+        iris = load_iris(as_frame=True)
+    with metrics.stage("transform", rows=len(iris.frame)):
+        df = iris.frame
+        df["target"] = iris.target
+
+    with metrics.stage("write", rows=len(df)):
+        write_table(df, out_file, partition_rows=partition_rows)
+        if store_file:
+            write_table(df, store_file)
     print("processed file created", out_file, " shape:", df.shape)
+    metrics.set(rows=len(df))
+    metrics.write(output_dir)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--output-dir", type=str,
                         default="/opt/ml/processing/output")
+    parser.add_argument("--output-filename", type=str, default="processed.csv",
+                        help="processed.parquet / processed.feather write a columnar file")
+    parser.add_argument("--partition-rows", type=int, default=0,
+                        help="Write a directory of part files with at most this many rows each")
+    parser.add_argument("--input-dir", type=str, default=None,
+                        help="Directory of raw CSV/Parquet shards (default: the bundled iris data)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Shards processed in parallel (default: one per core)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--repair", action="store_true",
+                        help="Clip out-of-range values and map class names instead of dropping the rows")
+    parser.add_argument("--feature-store", action="store_true",
+                        help=f"Also write {FEATURE_STORE_FILENAME}, a memory-mapped float32 copy of the rows")
     args = parser.parse_args()
-    run_preprocessing(args.output_dir)
+    run_preprocessing(args.output_dir, args.output_filename, args.partition_rows,
+                      args.input_dir, args.workers, args.chunk_rows, args.repair, args.feature_store)
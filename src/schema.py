@@ -0,0 +1,5 @@
+FEATURES = ['sepal length (cm)','sepal width (cm)','petal length (cm)','petal width (cm)']
+TARGET = "target"
+TARGET_NAMES = ["setosa", "versicolor", "virginica"]
+# plausible measurement range in cm; anything outside is a sensor/entry error
+FEATURE_RANGE = (0.0, 100.0)
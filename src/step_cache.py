@@ -0,0 +1,139 @@
+"""
+Content-hash memoization of pipeline steps for src.main.
+
+A step's key is the SHA-256 of its name, its arguments, the content of its
+input files (directories are walked in name order) and the source of every
+.py file in the src/ package, so code a step imports lazily is covered too.
+On a hit the cached outputs are copied back instead of rerunning the step;
+on a miss the step runs and its output paths are stored under
+<STEP_CACHE_DIR>/<key>, written to a temp dir and renamed into place so a
+concurrent run never sees a half-written entry. Entries are evicted least
+recently used first once the cache exceeds STEP_CACHE_MAX_MB.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+CACHE_DIR = os.getenv("STEP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "iris-step-cache"))
+MAX_MB = float(os.getenv("STEP_CACHE_MAX_MB", "2048"))
+META = "step.json"
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _hash_path(h, path, block_size=1 << 20):
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                h.update(os.path.relpath(full, path).encode())
+                _hash_path(h, full, block_size)
+        return
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+
+
+def code_hash(root=SRC_DIR):
+    """Hash of every .py file under `root` (the src/ package), in path order."""
+    h = hashlib.sha256()
+    for top, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                full = os.path.join(top, name)
+                h.update(os.path.relpath(full, root).encode())
+                _hash_path(h, full)
+    return h.hexdigest()
+
+
+def _size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(path) for f in fs)
+
+
+def _copy(src, dst):
+    if os.path.isdir(src):
+        shutil.copytree(src, dst, dirs_exist_ok=True)
+    else:
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        shutil.copy2(src, dst)
+
+
+class StepCache:
+    def __init__(self, cache_dir=None, max_mb=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.max_bytes = (MAX_MB if max_mb is None else max_mb) * 2**20
+        self.hit = False  # whether the last run() was served from the cache
+
+    def key(self, step, params, inputs):
+        h = hashlib.sha256()
+        h.update(json.dumps({"step": step, "params": params}, sort_keys=True, default=str).encode())
+        for path in inputs:
+            h.update(b"\0" + os.path.basename(path.rstrip("/")).encode())
+            if os.path.exists(path):
+                _hash_path(h, path)
+        h.update(code_hash().encode())
+        return h.hexdigest()
+
+    def run(self, step, params, inputs, outputs, fn):
+        """
+        Restore `outputs` (files or directories) from the cache, or call fn()
+        and cache what it wrote there. Returns fn()'s result, or None on a hit.
+        """
+        key = self.key(step, params, inputs)
+        entry = os.path.join(self.cache_dir, key)
+        self.hit = os.path.isfile(os.path.join(entry, META))
+        if self.hit:
+            for i, out in enumerate(outputs):
+                _copy(os.path.join(entry, str(i)), out)
+            os.utime(os.path.join(entry, META))  # recency for LRU eviction
+            print(f"[cache] hit step={step} key={key[:12]} restored {', '.join(outputs)}")
+            return None
+
+        print(f"[cache] miss step={step} key={key[:12]}")
+        start = time.perf_counter()
+        result = fn()
+        self._store(entry, step, outputs, time.perf_counter() - start)
+        return result
+
+    def _store(self, entry, step, outputs, seconds):
+        missing = [out for out in outputs if not os.path.exists(out)]
+        if missing:
+            print(f"[cache] not storing step={step}: outputs missing {missing}")
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".store-", dir=self.cache_dir)
+        try:
+            for i, out in enumerate(outputs):
+                _copy(out, os.path.join(tmp, str(i)))
+            with open(os.path.join(tmp, META), "w") as f:
+                json.dump({"step": step, "outputs": outputs, "seconds": seconds}, f)
+            os.rename(tmp, entry)
+        except OSError:
+            # another process stored the same key first
+            if not os.path.isdir(entry):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            meta = os.path.join(self.cache_dir, name, META)
+            if os.path.isfile(meta):
+                path = os.path.join(self.cache_dir, name)
+                entries.append((os.path.getmtime(meta), _size(path), path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            print(f"[cache] evicted {os.path.basename(path)[:12]} ({size / 2**20:.1f} MB)")
@@ -0,0 +1,14 @@
+import pytest
+import pandas as pd
+from sklearn.datasets import load_iris
+
+from src.schema import FEATURES, TARGET
+
+
+@pytest.fixture(scope="session")
+def iris():
+    """The iris data as the preprocess step writes it: FEATURES + target."""
+    data = load_iris()
+    df = pd.DataFrame(data.data, columns=FEATURES)
+    df[TARGET] = data.target
+    return df
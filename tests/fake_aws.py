@@ -0,0 +1,72 @@
+"""
+In-memory CloudFormation and Step Functions clients on a virtual clock,
+for running lambda_trigger without AWS: a stack reaches CREATE_COMPLETE
+`durations[name]` virtual seconds after create_stack, and sleeping only
+advances the clock.
+"""
+from botocore.exceptions import ClientError
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _validation_error(message, operation):
+    return ClientError({"Error": {"Code": "ValidationError", "Message": message}}, operation)
+
+
+class FakeCloudFormation:
+    def __init__(self, clock, durations=None, outputs=None, existing=(), failing=()):
+        self.clock = clock
+        self.durations = durations or {}
+        self.outputs = outputs or {}
+        self.failing = set(failing)
+        self.started = {name: float("-inf") for name in existing}
+        self.calls = []  # (operation, stack name, virtual time, kwargs)
+
+    def describe_stacks(self, StackName):
+        self.calls.append(("describe", StackName, self.clock(), {}))
+        if StackName not in self.started:
+            raise _validation_error(f"Stack with id {StackName} does not exist", "DescribeStacks")
+        done = self.clock() - self.started[StackName] >= self.durations.get(StackName, 0)
+        if not done:
+            status = "CREATE_IN_PROGRESS"
+        elif StackName in self.failing:
+            status = "ROLLBACK_COMPLETE"
+        else:
+            status = "CREATE_COMPLETE"
+        outputs = [{"OutputKey": k, "OutputValue": v} for k, v in self.outputs.get(StackName, {}).items()]
+        return {"Stacks": [{"StackName": StackName, "StackStatus": status, "Outputs": outputs}]}
+
+    def create_stack(self, StackName, **kwargs):
+        self.calls.append(("create", StackName, self.clock(), kwargs))
+        self.started[StackName] = self.clock()
+        return {"StackId": f"arn:aws:cloudformation:stack/{StackName}"}
+
+    def update_stack(self, StackName, **kwargs):
+        self.calls.append(("update", StackName, self.clock(), kwargs))
+        raise _validation_error("No updates are to be performed.", "UpdateStack")
+
+    def created_at(self):
+        return {name: t for op, name, t, _ in self.calls if op == "create"}
+
+    def count(self, operation):
+        return sum(op == operation for op, *_ in self.calls)
+
+
+class FakeStepFunctions:
+    def __init__(self):
+        self.executions = []
+
+    def start_execution(self, **kwargs):
+        self.executions.append(kwargs)
+        return {"executionArn": f"arn:aws:states:execution:{len(self.executions)}"}
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate
+from src.schema import FEATURES, TARGET
+from src.dataio import write_table, row_ranges, list_parts, TableWriter
+from src.model_training.distributed import train_distributed, shard_chunks
+from src.model_training.out_of_core import iter_split
+from src.model_training.incremental import holdout_accuracies
+from src.model_training.sagemaker_train import DEFAULT_PARAMS
+
+PARAMS = {"n_estimators": 10, **DEFAULT_PARAMS}
+
+
+def sort(df):
+    return df.sort_values(list(df.columns), ignore_index=True)
+
+
+@pytest.mark.parametrize("partition_rows", [0, 1000])
+@pytest.mark.parametrize("ext", ["csv", "parquet", "f32"])
+def test_shards_cover_every_row_once_with_the_out_of_core_split(tmp_path, ext, partition_rows):
+    df = generate(2500, seed=0)
+    path = str(tmp_path / f"processed.{ext}")
+    with TableWriter(path, partition_rows) as writer:  # one Parquet row group per write
+        for start in range(0, len(df), 400):
+            writer.write(df.iloc[start:start + 400])
+    ranges = row_ranges(path, 400)
+    assert len({r.path for r in ranges}) == len(list_parts(path)) == (3 if partition_rows else 1)
+
+    shards = [list(shard_chunks(ranges, rank, 3)) for rank in range(3)]
+    assert all(shards)
+    assert sum(len(chunk) for shard in shards for chunk, _, _ in shard) == len(df)
+    for side in (1, 2):
+        got = pd.concat(parts[side] for shard in shards for parts in shard)
+        expected = pd.concat(rows for _, rows in iter_split(path, 400, 0.2, holdout=side == 2))
+        pd.testing.assert_frame_equal(sort(got), sort(expected), check_dtype=False)
+
+
+def test_small_input_uses_fewer_workers(iris, tmp_path):
+    # 150 rows in one range: a second worker would have an empty shard
+    path = str(tmp_path / "processed.csv")
+    write_table(iris, path)
+    model, acc, profile, sample = train_distributed(path, PARAMS, workers=2)
+
+    assert model.n_classes_ == 3
+    assert profile.rows == len(iris)
+    assert acc == holdout_accuracies([model], [path])[0]
+
+
+def test_workers_train_one_model_on_all_shards(tmp_path):
+    path = str(tmp_path / "processed.parquet")
+    write_table(generate(20_000, seed=0), path, partition_rows=2_500)
+    model, acc, profile, sample = train_distributed(path, PARAMS, workers=2, chunk_rows=2_500)
+
+    assert profile.rows == 20_000
+    assert model.get_booster().num_boosted_rounds() == PARAMS["n_estimators"]
+    assert acc == pytest.approx(holdout_accuracies([model], list_parts(path), chunk_rows=2_500)[0])
+    assert acc > 0.9
+    test = generate(2_000, seed=1)
+    assert np.mean(model.predict(test[FEATURES]) == test[TARGET]) > 0.9
@@ -0,0 +1,116 @@
+import json
+import os
+
+import mlflow
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate
+from src.schema import FEATURES, TARGET
+from src.instrumentation import StepMetrics
+from src.model_training.out_of_core import iter_split
+from src.model_training.incremental import (plan, iter_new_split, NewRows, fingerprint, save_trained_parts,
+                                            TRAINED_PARTS_FILENAME)
+
+
+@pytest.fixture
+def mlflow_db(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"sqlite:///{tmp_path / 'mlflow.db'}")
+    monkeypatch.setenv("MLFLOW_EXPERIMENT_NAME", "tests")
+
+
+def write_csv(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False)
+    return path
+
+
+def trained_on(model_dir, input_file):
+    os.makedirs(model_dir, exist_ok=True)
+    open(os.path.join(model_dir, "model.joblib"), "wb").close()
+    save_trained_parts(model_dir, fingerprint(input_file))
+
+
+def retrain_mode(model_dir):
+    with open(os.path.join(model_dir, TRAINED_PARTS_FILENAME)) as f:
+        return json.load(f)["retrain"]
+
+
+def test_appended_csv_rows_are_the_new_data(tmp_path):
+    old, added = generate(1000, seed=0), generate(300, seed=1)
+    path = write_csv(old, str(tmp_path / "processed.csv"))
+    trained_on(str(tmp_path / "model"), path)
+    write_csv(pd.concat([old, added]), path)
+
+    new, _, reason = plan(path, str(tmp_path / "model"))
+    assert reason is None
+    assert new == [NewRows(path, new[0].byte_offset, 1000)]
+
+    # the same rows, and the same train/holdout split, as reading the whole file
+    for holdout in (False, True):
+        appended = pd.concat(rows for _, rows in iter_new_split(new[0], 128, 0.2, holdout))
+        # chunks of 1000 rows: everything after the first chunk is the appended part
+        expected = pd.concat(rows for i, (_, rows) in enumerate(iter_split(path, 1000, 0.2, holdout)) if i)
+        pd.testing.assert_frame_equal(appended.reset_index(drop=True), expected.reset_index(drop=True),
+                                      check_dtype=False)
+
+
+def test_plan_falls_back_when_warm_start_is_not_possible(tmp_path):
+    parts = tmp_path / "processed"
+    first = write_csv(generate(500, seed=0), str(parts / "part-00000.csv"))
+    model = str(tmp_path / "model")
+
+    assert plan(str(parts), model)[2].startswith("no previous model")
+
+    trained_on(model, str(parts))
+    assert plan(str(parts), model)[2] == "no new data"
+
+    write_csv(generate(200, seed=1), str(parts / "part-00001.csv"))
+    new, _, reason = plan(str(parts), model)
+    assert reason is None and [n.path for n in new] == [str(parts / "part-00001.csv")]
+
+    rewritten = generate(500, seed=0)
+    rewritten.loc[0, FEATURES[0]] += 1
+    write_csv(rewritten, first)  # an old row changed: not an append
+    assert "changed" in plan(str(parts), model)[2]
+
+
+def test_in_memory_training_holds_out_the_guard_rows(tmp_path):
+    from src.model_training.sagemaker_train import load_split
+
+    parts = tmp_path / "processed"
+    write_csv(generate(700, seed=0), str(parts / "part-00000.csv"))
+    write_csv(generate(500, seed=1), str(parts / "part-00001.csv"))
+    df, Xtr, Xte, ytr, yte = load_split(str(parts), StepMetrics("train", enabled=False))
+
+    for X, y, holdout in ((Xtr, ytr, False), (Xte, yte, True)):
+        expected = pd.concat(rows for _, rows in iter_split(str(parts), 128, 0.2, holdout))
+        pd.testing.assert_frame_equal(X.reset_index(drop=True), expected[FEATURES].reset_index(drop=True))
+        assert y.tolist() == expected[TARGET].tolist()
+
+
+def test_model_train_warm_starts_then_guards_and_falls_back(tmp_path, mlflow_db):
+    from src.model_training.sagemaker_train import model_train
+
+    data = str(tmp_path / "data")
+    old, added = generate(3000, seed=0), generate(1000, seed=1)
+    write_csv(old, os.path.join(data, "processed.csv"))
+    base = str(tmp_path / "base")
+    model_train(data, base)
+    assert retrain_mode(base) == "full"
+
+    write_csv(pd.concat([old, added]), os.path.join(data, "processed.csv"))
+    warm = str(tmp_path / "warm")
+    model_train(data, warm, warm_start_from=base, max_degradation=1.0, warm_rounds=5)
+    assert retrain_mode(warm) == "warm"
+    runs = mlflow.search_runs(experiment_names=["tests"], filter_string="tags.retrain = 'warm'")
+    assert runs["params.n_estimators"].tolist() == ["25"]  # the base model's 20 trees + 5
+
+    # a guard no model can pass: the warm-started model is discarded for a full retrain
+    guarded = str(tmp_path / "guarded")
+    model_train(data, guarded, warm_start_from=base, max_degradation=-1.0)
+    assert retrain_mode(guarded) == "full_fallback"
+
+    missing = str(tmp_path / "fresh")
+    model_train(data, missing, warm_start_from=str(tmp_path / "nothing-here"))
+    assert retrain_mode(missing) == "full_fallback"
@@ -0,0 +1,29 @@
+import os
+import warnings
+
+from benchmarks.synthetic import write_shards
+from src.dataio import read_table
+from src.preprocessing.preprocessing import run_preprocessing
+
+
+def test_ingest_replaces_a_bundled_output_of_the_same_name_and_back(tmp_path):
+    out, raw = str(tmp_path / "out"), str(tmp_path / "raw")
+    write_shards(3000, raw, shard_rows=1000, ext=".csv")
+
+    run_preprocessing(out)  # the bundled iris data: processed.csv is a file
+    assert os.path.isfile(os.path.join(out, "processed.csv"))
+
+    m = run_preprocessing(out, input_dir=raw, workers=1)
+    assert os.path.isdir(os.path.join(out, "processed.csv"))
+    assert len(read_table(os.path.join(out, "processed.csv"))) == m["rows_out"] > 0
+
+    run_preprocessing(out)
+    assert len(read_table(os.path.join(out, "processed.csv"))) == 150
+
+
+def test_ingest_does_not_leave_its_warning_filter_behind(tmp_path):
+    raw = str(tmp_path / "raw")
+    write_shards(1000, raw, shard_rows=1000, ext=".csv")
+    before = list(warnings.filters)
+    run_preprocessing(str(tmp_path / "out"), input_dir=raw, workers=1)
+    assert warnings.filters == before
@@ -0,0 +1,111 @@
+import json
+import random
+
+import pytest
+
+import lambda_trigger
+from lambda_trigger import lambda_handler, Backoff
+from tests.fake_aws import VirtualClock, FakeCloudFormation, FakeStepFunctions
+
+INFRA, PIPELINE, EXTRA = "iris-mlops-infra", "iris-mlops-pipeline", "extra"
+OUTPUTS = {INFRA: {"StepFnLogGroupArn": "log-group", "RoleStepFunctionsArn": "role"},
+           PIPELINE: {"StateMachineArn": "arn:aws:states:stateMachine:iris"}}
+DURATIONS = {INFRA: 120, PIPELINE: 200, EXTRA: 100}
+EVENT = {"InfraTemplateS3": "s3://bucket/infra.yaml", "PipelineTemplateS3": "s3://bucket/pipeline.yaml",
+         "PipelineParameters": {"ProjectName": "iris-mlops"},
+         "ExtraStacks": [{"StackName": EXTRA, "TemplateS3": "s3://bucket/extra.yaml"}]}
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+def handle(event, clock, cf, sf, seed=0):
+    return lambda_handler(event, None, cf=cf, sf=sf, sleep=clock.sleep, clock=clock, rng=random.Random(seed))
+
+
+def test_backoff_grows_with_jitter_up_to_the_cap():
+    backoff = Backoff(base=2, cap=60, rng=random.Random(0))
+    delays = [backoff.next() for _ in range(10)]
+    for n, d in enumerate(delays):
+        t = min(60, 2 * 2 ** n)
+        assert t / 2 <= d <= t
+
+
+def test_stacks_deploy_concurrently_then_the_state_machine_starts(clock):
+    cf, sf = FakeCloudFormation(clock, DURATIONS, OUTPUTS), FakeStepFunctions()
+    result = handle(EVENT, clock, cf, sf)
+
+    assert result["status"] == "ok"
+    assert result["executionArn"] == "arn:aws:states:execution:1"
+    created = cf.created_at()
+    # the extra stack does not wait for infra; the pipeline starts within one backoff tick of it
+    assert created[INFRA] == created[EXTRA] == 0
+    assert DURATIONS[INFRA] <= created[PIPELINE] <= DURATIONS[INFRA] + 60
+    assert clock.now <= created[PIPELINE] + DURATIONS[PIPELINE] + 60
+    assert all(0 < d <= 60 for d in clock.sleeps)
+    # one describe per in-flight stack per tick, not one per stack per second
+    assert cf.count("describe") <= 3 * (len(clock.sleeps) + 2)
+
+    params = {p["ParameterKey"]: p["ParameterValue"]
+              for op, name, _, kw in cf.calls if op == "create" and name == PIPELINE
+              for p in kw["Parameters"]}
+    assert params["RoleStepFunctionsArn"] == "role"
+    assert params["StepFnLogGroupArn"] == "log-group"
+    assert json.loads(sf.executions[0]["input"])["trigger"] == "ci-deploy"
+
+
+def test_out_of_time_returns_a_resume_token_and_resumes(clock):
+    cf, sf = FakeCloudFormation(clock, DURATIONS, OUTPUTS), FakeStepFunctions()
+    event, invocations = dict(EVENT, MaxWaitSeconds=0), 0
+    while True:
+        result = handle(event, clock, cf, sf, seed=invocations)
+        invocations += 1
+        if result["status"] != "in_progress":
+            break
+        assert not clock.sleeps  # never sleeps past the budget inside an invocation
+        clock.now += result["retryAfterSeconds"]
+        event = dict(event, ResumeToken=result["resumeToken"])
+
+    assert result["status"] == "ok"
+    assert invocations > 2
+    assert cf.count("create") == 3  # a resumed run never redeploys a stack
+    assert len(sf.executions) == 1
+
+
+def test_unchanged_stacks_complete_without_waiting(clock):
+    cf = FakeCloudFormation(clock, outputs=OUTPUTS, existing=[INFRA, PIPELINE, EXTRA])
+    result = handle(EVENT, clock, cf, FakeStepFunctions())
+
+    assert result["status"] == "ok"
+    assert clock.now == 0 and not clock.sleeps
+    assert cf.count("describe") == 3  # the no-change describe also supplies the outputs
+
+
+def test_missing_outputs_name_the_stack(clock):
+    cf = FakeCloudFormation(clock, outputs={INFRA: {"StepFnLogGroupArn": "log-group"}})
+    result = handle(EVENT, clock, cf, FakeStepFunctions())
+
+    assert result["status"] == "error"
+    assert result["stack"] == INFRA
+    assert INFRA in result["message"] and "RoleStepFunctionsArn" in result["message"]
+    assert cf.created_at().keys() == {INFRA, EXTRA}  # the pipeline never started
+
+
+def test_failed_stack_is_an_error(clock):
+    cf = FakeCloudFormation(clock, DURATIONS, OUTPUTS, failing=[INFRA])
+    result = handle(EVENT, clock, cf, FakeStepFunctions())
+
+    assert result["status"] == "error"
+    assert "ROLLBACK_COMPLETE" in result["message"]
+    assert clock.now <= DURATIONS[INFRA] + 60  # reported on the first poll after it failed
+
+
+def test_timeout_is_reported(clock):
+    cf = FakeCloudFormation(clock, {INFRA: 10_000}, OUTPUTS)
+    result = handle(EVENT, clock, cf, FakeStepFunctions())
+
+    assert result["status"] == "error"
+    assert "Timeout" in result["message"]
+    assert lambda_trigger.TIMEOUT_MINUTES * 60 <= clock.now <= lambda_trigger.TIMEOUT_MINUTES * 60 + 60
@@ -0,0 +1,25 @@
+import pytest
+
+from src.schema import FEATURES
+from src.model_training.search import load_space, successive_halving, DEFAULT_SPACE
+
+
+@pytest.mark.parametrize("key", ["n_estimators", "random_state", "eval_metric", "n_jobs"])
+def test_a_space_that_sets_a_fixed_param_is_rejected_up_front(key):
+    with pytest.raises(ValueError, match=key):
+        load_space(f'{{"max_depth": [2, 3], "{key}": [1]}}')
+
+
+def test_space_values_must_be_lists(tmp_path):
+    path = tmp_path / "space.json"
+    path.write_text('{"max_depth": 3}')
+    with pytest.raises(ValueError, match="max_depth"):
+        load_space(str(path))
+    assert load_space(None) == DEFAULT_SPACE
+
+
+def test_search_returns_the_best_config_with_all_trees(iris):
+    best, trials = successive_halving(iris[FEATURES], iris["target"], {"max_depth": [1, 3]},
+                                      max_estimators=9, eta=3, workers=1)
+    assert best["n_estimators"] == 9 and best["max_depth"] in (1, 3)
+    assert [t["n_estimators"] for t in trials] == [1, 1, 3, 9]
@@ -0,0 +1,69 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.inference.sinks import SQLiteBackend, BulkSink, open_sink
+from src.inference.load_scores import score_rows, SCORE_COLUMNS
+
+
+def chunks(n_chunks, rows, run_id="run-1"):
+    scored_at = pd.Timestamp(datetime(2024, 1, 1, tzinfo=timezone.utc))
+    for i in range(n_chunks):
+        preds = np.arange(i * rows, (i + 1) * rows) % 3
+        yield score_rows(pd.DataFrame(index=range(rows)), preds, i * rows, run_id, scored_at)
+
+
+def read(path, table):
+    with sqlite3.connect(path) as conn:
+        return pd.read_sql(f'SELECT * FROM "{table}"', conn)
+
+
+def test_every_row_is_loaded_once_with_the_legacy_columns(tmp_path):
+    db = tmp_path / "scores.db"
+    with open_sink(f"sqlite:///{db}", "INFERENCE_SCORES", workers=3, queue_size=2, batch_rows=250) as sink:
+        for chunk in chunks(20, 100):
+            sink.put(chunk)
+
+    df = read(db, "INFERENCE_SCORES").sort_values("ID", key=lambda s: s.astype(int), ignore_index=True)
+    assert list(df.columns) == SCORE_COLUMNS
+    assert df["ID"].tolist() == [str(i) for i in range(2000)]
+    assert (df["prediction"] == np.arange(2000) % 3).all()
+    assert set(df["run_id"]) == {"run-1"}
+    assert sink.stats["rows"] == 2000
+    assert sink.stats["connections"] <= 3
+
+
+def test_failed_loads_are_retried_on_a_fresh_connection(tmp_path):
+    class Flaky(SQLiteBackend):
+        failures = 2
+
+        def load(self, conn, table, data):
+            if Flaky.failures:
+                Flaky.failures -= 1
+                raise sqlite3.OperationalError("database is locked")
+            super().load(conn, table, data)
+
+    db = tmp_path / "scores.db"
+    sink = BulkSink(Flaky(str(db)), "INFERENCE_SCORES", workers=1, batch_rows=10_000, sleep=lambda s: None)
+    for chunk in chunks(3, 100):
+        sink.put(chunk)
+    stats = sink.close()
+
+    assert stats["retries"] == 2
+    assert stats["connections"] == 3  # a connection that raised is closed, not reused
+    assert len(read(db, "INFERENCE_SCORES")) == 300
+
+
+def test_a_batch_that_keeps_failing_is_raised(tmp_path):
+    class Down(SQLiteBackend):
+        def load(self, conn, table, data):
+            raise sqlite3.OperationalError("disk I/O error")
+
+    sink = BulkSink(Down(str(tmp_path / "scores.db")), "INFERENCE_SCORES", workers=2, retries=1,
+                    sleep=lambda s: None)
+    sink.put(next(chunks(1, 10)))
+    with pytest.raises(sqlite3.OperationalError, match="disk I/O error"):
+        sink.close()
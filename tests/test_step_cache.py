@@ -0,0 +1,44 @@
+import os
+
+from src.step_cache import StepCache, code_hash
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_code_hash_covers_modules_that_are_not_imported(tmp_path):
+    root = str(tmp_path / "src")
+    write(os.path.join(root, "main.py"), "def main():\n    from src.inference import multi_model\n")
+    write(os.path.join(root, "inference", "multi_model.py"), "VERSION = 1\n")
+    before = code_hash(root)
+
+    write(os.path.join(root, "inference", "__pycache__", "multi_model.cpython-311.pyc"), "stale")
+    assert code_hash(root) == before
+
+    write(os.path.join(root, "inference", "multi_model.py"), "VERSION = 2\n")
+    assert code_hash(root) != before
+
+
+def test_a_changed_input_misses_and_an_unchanged_one_restores(tmp_path):
+    cache = StepCache(str(tmp_path / "cache"))
+    data, out = str(tmp_path / "data.csv"), str(tmp_path / "out.txt")
+    write(data, "a\n1\n")
+    calls = []
+
+    def step():
+        calls.append(1)
+        write(out, f"run {len(calls)}")
+
+    cache.run("step", {}, [data], [out], step)
+    os.remove(out)
+    cache.run("step", {}, [data], [out], step)
+    assert cache.hit and len(calls) == 1
+    with open(out) as f:
+        assert f.read() == "run 1"
+
+    write(data, "a\n2\n")
+    cache.run("step", {}, [data], [out], step)
+    assert not cache.hit and len(calls) == 2
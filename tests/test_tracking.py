@@ -0,0 +1,103 @@
+import json
+
+import mlflow
+import mlflow.xgboost
+import pytest
+from mlflow.tracking import MlflowClient
+from xgboost import XGBClassifier
+
+from src.schema import FEATURES
+from src.model_training.tracking import AsyncRunLogger, MAX_PARAMS
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # recent MLflow only opens a file store when asked to; older versions ignore this
+    monkeypatch.setenv("MLFLOW_ALLOW_FILE_STORE", "true")
+    uri = (tmp_path / "mlruns").as_uri()
+    previous = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(uri)  # flavor.log_model goes through the global tracking URI
+    yield MlflowClient(tracking_uri=uri)
+    mlflow.set_tracking_uri(previous)
+
+
+@pytest.fixture
+def run_id(client):
+    experiment = client.create_experiment("tests")
+    mlflow.set_experiment(experiment_id=experiment)  # as model_train does before starting its run
+    return client.create_run(experiment).info.run_id
+
+
+def test_everything_buffered_reaches_the_file_store(client, run_id, tmp_path):
+    params = {f"p{i}": i for i in range(MAX_PARAMS + 20)}  # more than one log_batch holds
+    with AsyncRunLogger(run_id, client=client, flush_interval=60) as tracker:
+        tracker.log_params(params)
+        for step in range(1500):
+            tracker.log_metric("loss", 1 / (step + 1), step=step)
+        tracker.set_tag("retrain", "full")
+        tracker.log_dict({"trials": [1, 2]}, "search_trials.json")
+        (tmp_path / "art").mkdir()
+        (tmp_path / "art" / "report.txt").write_text("ok")
+        tracker.log_artifacts(str(tmp_path / "art"), "reports")
+
+    run = client.get_run(run_id)
+    assert run.data.params == {k: str(v) for k, v in params.items()}
+    assert run.data.tags["retrain"] == "full"
+    history = client.get_metric_history(run_id, "loss")
+    assert sorted(m.step for m in history) == list(range(1500))
+    assert {a.path for a in client.list_artifacts(run_id)} == {"reports", "search_trials.json"}
+    with open(client.download_artifacts(run_id, "search_trials.json", str(tmp_path))) as f:
+        assert json.load(f) == {"trials": [1, 2]}
+
+
+def test_log_model_registers_the_run_logged_model(client, run_id, iris, tmp_path):
+    model = XGBClassifier(n_estimators=3).fit(iris[FEATURES], iris["target"])
+    with AsyncRunLogger(run_id, client=client, flush_interval=60) as tracker:
+        tracker.log_params({"n_estimators": 3})
+        info = tracker.log_model(mlflow.xgboost, model, "xgb_model",
+                                 input_example=iris[FEATURES].head(3)).result()
+
+    assert info.run_id == run_id
+    logged = mlflow.get_logged_model(info.model_id)
+    assert logged.source_run_id == run_id and logged.params == {"n_estimators": "3"}
+    # MLflow 3 links the run to its logged model (MLflow 2 wrote the mlflow.log-model.history tag)
+    assert [o.model_id for o in client.get_run(run_id).outputs.model_outputs] == [info.model_id]
+    loaded = mlflow.xgboost.load_model(f"runs:/{run_id}/xgb_model")
+    assert (loaded.predict(iris[FEATURES]) == model.predict(iris[FEATURES])).all()
+
+
+def test_failed_batch_is_retried_on_close(client, run_id):
+    calls = []
+
+    class Flaky:
+        def __getattr__(self, name):
+            return getattr(client, name)
+
+        def log_batch(self, *args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise ConnectionError("tracking server unavailable")
+            client.log_batch(*args, **kwargs)
+
+    tracker = AsyncRunLogger(run_id, client=Flaky(), flush_interval=60)
+    tracker.log_metric("accuracy", 0.97)
+    with pytest.raises(ConnectionError):
+        tracker.flush()
+    tracker.close()
+
+    assert client.get_run(run_id).data.metrics == {"accuracy": 0.97}
+    assert len(calls) == 2
+
+
+def test_close_raises_an_upload_error(client, run_id):
+    class Broken:
+        def __getattr__(self, name):
+            return getattr(client, name)
+
+        def log_dict(self, *args, **kwargs):
+            raise OSError("artifact store full")
+
+    tracker = AsyncRunLogger(run_id, client=Broken(), flush_interval=60)
+    tracker.log_dict({"a": 1}, "a.json")
+    with pytest.raises(OSError, match="artifact store full"):
+        tracker.close()
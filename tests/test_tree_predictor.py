@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBClassifier
+
+from src.schema import FEATURES, TARGET
+from src.inference.tree_predictor import TreeEnsemblePredictor
+
+
+def fit(df, target, **params):
+    model = XGBClassifier(**{"n_estimators": 20, "max_depth": 3, "learning_rate": 0.1, "random_state": 42,
+                             **params})
+    return model.fit(df[FEATURES], target)
+
+
+def with_missing(df):
+    X = df[FEATURES].copy()
+    X.iloc[::7, 0] = np.nan
+    X.iloc[::11, 2] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("binary", [False, True], ids=["multiclass", "binary"])
+def test_predict_proba_matches_xgboost_exactly(iris, binary):
+    target = (iris[TARGET] == 2).astype(int) if binary else iris[TARGET]
+    model = fit(iris, target)
+    predictor = TreeEnsemblePredictor.from_model(model)
+
+    for X in (iris[FEATURES], with_missing(iris)):
+        np.testing.assert_array_equal(predictor.predict_proba(X), model.predict_proba(X))
+        np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+
+
+def random_rows(model, n, seed=0):
+    """
+    Uniform rows well outside the iris range (0.1-7.9 cm), a tenth of them
+    NaN, and a tenth set to one of the model's split thresholds exactly.
+    """
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.uniform(-5, 15, (n, len(FEATURES))).astype(np.float32), columns=FEATURES)
+    splits = model.get_booster().trees_to_dataframe().query("Feature != 'Leaf'")
+    for f, values in splits.groupby("Feature")["Split"]:
+        rows = rng.random(n) < 0.1
+        X.loc[rows, f] = rng.choice(values.to_numpy(np.float32), rows.sum())
+    return X.mask(rng.random(X.shape) < 0.1)
+
+
+@pytest.mark.parametrize("max_depth", [3, 6])
+@pytest.mark.parametrize("binary", [False, True], ids=["multiclass", "binary"])
+def test_random_inputs_match_xgboost_exactly(iris, binary, max_depth):
+    target = (iris[TARGET] == 2).astype(int) if binary else iris[TARGET]
+    model = fit(iris, target, max_depth=max_depth, n_estimators=50)
+    predictor = TreeEnsemblePredictor.from_model(model)
+
+    X = random_rows(model, 20_000)
+    assert X.isna().any().all() and (X.abs() > 8).any().all()
+    np.testing.assert_array_equal(predictor.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(predictor.predict(X), model.predict(X))
+
+
+def test_saved_npz_predicts_the_same(iris, tmp_path):
+    model = fit(iris, iris[TARGET])
+    path = tmp_path / "model.npz"
+    TreeEnsemblePredictor.from_model(model).save(path)
+
+    X = with_missing(iris)
+    np.testing.assert_array_equal(TreeEnsemblePredictor.load(path).predict_proba(X), model.predict_proba(X))